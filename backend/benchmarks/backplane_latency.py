@@ -0,0 +1,104 @@
+"""
+Measure the latency the Unix socket backplane adds between workers
+
+Starts one publishing process and several subscriber processes that share
+a broker socket, publishes alert-sized messages at a fixed rate and reports
+publish-to-handler latency percentiles per subscriber.
+
+Usage (from backend/):
+    python -m benchmarks.backplane_latency [subscribers] [messages] [rate_per_s]
+"""
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from services.broadcast_backplane import UnixSocketBackplane
+
+PAYLOAD = {
+    "op": "alert_created",
+    "alert": {
+        "id": 65537,
+        "type": "accident",
+        "severity": "high",
+        "location": {"latitude": 12.971599, "longitude": 77.594566},
+        "message": "Major accident reported",
+        "radius_km": 5,
+        "report_count": 1
+    }
+}
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else 0.0
+
+
+def subscriber(socket_path: str, expected: int, ready, results):
+    async def run():
+        latencies = []
+        done = asyncio.Event()
+
+        async def handler(message):
+            latencies.append((time.time() - message["sent_at"]) * 1000)
+            if len(latencies) >= expected:
+                done.set()
+
+        backplane = UnixSocketBackplane(socket_path)
+        await backplane.start(handler)
+        ready.put(os.getpid())
+        try:
+            async with asyncio.timeout(60):
+                await done.wait()
+        except TimeoutError:
+            pass
+        results.put((os.getpid(), latencies))
+        await backplane.stop()
+
+    asyncio.run(run())
+
+
+async def main(subscribers: int, messages: int, rate: float):
+    async def ignore(message):
+        pass
+
+    # The publisher starts first so it hosts the broker for the whole run
+    socket_path = os.path.join(tempfile.mkdtemp(), "backplane.sock")
+    backplane = UnixSocketBackplane(socket_path)
+    await backplane.start(ignore)
+
+    loop = asyncio.get_running_loop()
+    ready = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=subscriber, args=(socket_path, messages, ready, results))
+        for _ in range(subscribers)
+    ]
+    for worker in workers:
+        worker.start()
+    for _ in workers:
+        await loop.run_in_executor(None, ready.get, True, 30)
+
+    interval = 1.0 / rate
+    for _ in range(messages):
+        await backplane.publish({**PAYLOAD, "sent_at": time.time()})
+        await asyncio.sleep(interval)
+
+    print(f"{subscribers} subscribers, {messages} messages at {rate:.0f}/s")
+    for _ in workers:
+        pid, latencies = await loop.run_in_executor(None, results.get, True, 90)
+        print(f"  worker {pid}: received {len(latencies)} | p50 {percentile(latencies, 0.5):.3f} ms | "
+              f"p99 {percentile(latencies, 0.99):.3f} ms | max {max(latencies, default=0):.3f} ms")
+    for worker in workers:
+        await loop.run_in_executor(None, worker.join)
+    await backplane.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 4,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 2000,
+        float(sys.argv[3]) if len(sys.argv) > 3 else 500
+    ))
@@ -0,0 +1,137 @@
+"""
+Benchmark area-broadcast fan-out against simulated websocket subscribers
+
+Compares the indexed WebSocketManager.broadcast_to_area with a linear
+haversine scan over every subscriber location, and measures how one slow
+consumer affects delivery to everyone else.
+
+Usage (from backend/):
+    python -m benchmarks.broadcast_fanout
+"""
+import asyncio
+import contextlib
+import io
+import json
+import random
+import time
+
+from services.member3_realtime import WebSocketManager
+from utils.distance import haversine_distance
+
+CENTER = (12.9716, 77.5946)
+SPREAD_DEG = 0.3  # ~66 km square metro area
+ALERTS = 200
+RADIUS_KM = 5
+
+
+class FakeWebSocket:
+    """Stand-in connection that accepts every frame instantly"""
+
+    def __init__(self, delay: float = 0):
+        self.received = 0
+        self.delay = delay
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+    async def send_text(self, frame):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received += 1
+
+
+async def build_manager(connections: int, **options) -> WebSocketManager:
+    manager = WebSocketManager(**options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(connections):
+            ws = FakeWebSocket()
+            await manager.connect(ws)
+            manager.update_user_location(
+                ws,
+                CENTER[0] + random.uniform(-SPREAD_DEG, SPREAD_DEG),
+                CENTER[1] + random.uniform(-SPREAD_DEG, SPREAD_DEG)
+            )
+    return manager
+
+
+async def drain(manager: WebSocketManager):
+    """Wait until every writer task has flushed its queue"""
+    while any(channel.queue for channel in manager.channels.values()):
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+
+async def shutdown(manager: WebSocketManager):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for ws in list(manager.active_connections):
+            manager.disconnect(ws)
+
+
+async def linear_scan(manager: WebSocketManager, message: dict, lat: float, lng: float):
+    """Previous behaviour: haversine against every subscriber"""
+    for connection, location in list(manager.user_locations.items()):
+        if haversine_distance(location['latitude'], location['longitude'], lat, lng) <= RADIUS_KM:
+            await connection.send_text(json.dumps(message))
+
+
+async def run(connections: int):
+    manager = await build_manager(connections)
+    targets = [
+        (CENTER[0] + random.uniform(-SPREAD_DEG, SPREAD_DEG),
+         CENTER[1] + random.uniform(-SPREAD_DEG, SPREAD_DEG))
+        for _ in range(ALERTS)
+    ]
+    message = {"event": "new_alert", "data": {"id": 1}}
+
+    start = time.perf_counter()
+    for lat, lng in targets:
+        await linear_scan(manager, message, lat, lng)
+    linear_ms = (time.perf_counter() - start) * 1000 / ALERTS
+
+    start = time.perf_counter()
+    for lat, lng in targets:
+        await manager.broadcast_to_area(message, lat, lng, RADIUS_KM)
+    await drain(manager)
+    indexed_ms = (time.perf_counter() - start) * 1000 / ALERTS
+
+    print(f"{connections:>7} connections | linear {linear_ms:8.3f} ms/alert | "
+          f"indexed {indexed_ms:8.3f} ms/alert | speedup {linear_ms / indexed_ms:6.1f}x")
+    await shutdown(manager)
+
+
+async def run_slow_consumer(connections: int, policy: str):
+    """One client takes 50 ms per frame; everyone else should not notice"""
+    manager = await build_manager(connections, overflow_policy=policy, max_queue_size=16)
+    slow = next(iter(manager.active_connections))
+    slow.delay = 0.05
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(100):
+            await manager.broadcast({"event": "system_update", "data": {"id": i % 4}})
+            await asyncio.sleep(0)
+    while any(c.queue for ws, c in manager.channels.items() if ws is not slow):
+        await asyncio.sleep(0)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    stats = manager.get_stats()
+    print(f"{connections:>7} connections | policy {policy:<11} | 100 broadcasts delivered to "
+          f"fast clients in {elapsed_ms:8.1f} ms | p99 {stats['latency_ms']['p99']:7.2f} ms | "
+          f"dropped {stats['dropped']} coalesced {stats['coalesced']} "
+          f"disconnected {stats['slow_consumer_disconnects']}")
+    await shutdown(manager)
+
+
+async def main():
+    random.seed(42)
+    for connections in (1_000, 10_000, 100_000):
+        await run(connections)
+    for policy in ("drop_oldest", "coalesce", "disconnect"):
+        await run_slow_consumer(1_000, policy)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,157 @@
+"""
+Benchmark mixed SQLite reads and writes under concurrent requests
+
+64 concurrent clients run for a fixed time against 100k accidents, each
+doing ~80% route-sized bounding-box reads and ~20% single-report inserts
+(commit per insert, like POST /api/reports). Compares:
+
+- inline:   sync sessions on the event loop, default rollback journal
+            (how the routes ran before)
+- threads:  the same work on a plain thread pool, default journal, no
+            writer queue (writers race for the lock)
+- executor: WAL + tuned pragmas and DatabaseExecutor (reader pool, one
+            writer thread)
+
+and reports ops/s, the p99 event-loop lag seen by a 10 ms sleep probe and
+"database is locked" errors.
+
+Usage (from backend/):
+    python -m benchmarks.db_mixed_load
+"""
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from models.database import AccidentReport, Base, DatabaseExecutor, apply_sqlite_pragmas
+from routes.member4_routes import _query_route_accidents
+
+CENTER = (12.9716, 77.5946)
+SPREAD_DEG = 0.5
+ACCIDENTS = 100_000
+CLIENTS = 64
+WRITE_RATIO = 0.2
+DURATION_S = 5.0
+COLUMNS = ["latitude", "longitude", "severity", "weather", "road_condition", "speed"]
+
+
+def populate(path: str):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(AccidentReport.__table__.insert(), [
+            {"latitude": CENTER[0] + random.uniform(-SPREAD_DEG, SPREAD_DEG),
+             "longitude": CENTER[1] + random.uniform(-SPREAD_DEG, SPREAD_DEG),
+             "severity": random.choice(["Minor", "Major", "Fatal"]),
+             "weather": random.choice(["Clear", "Rain", "Fog"]),
+             "road_condition": random.choice(["Dry", "Wet"]),
+             "speed": random.uniform(20, 100)}
+            for _ in range(ACCIDENTS)
+        ])
+    engine.dispose()
+
+
+def read_route(db) -> int:
+    lat = CENTER[0] + random.uniform(-SPREAD_DEG, SPREAD_DEG)
+    lng = CENTER[1] + random.uniform(-SPREAD_DEG, SPREAD_DEG)
+    return len(_query_route_accidents(db, [(lat - 0.02, lng - 0.02, lat + 0.02, lng + 0.02)], COLUMNS))
+
+
+def write_report(db):
+    db.add(AccidentReport(
+        latitude=CENTER[0] + random.uniform(-SPREAD_DEG, SPREAD_DEG),
+        longitude=CENTER[1] + random.uniform(-SPREAD_DEG, SPREAD_DEG),
+        severity="Minor", description="benchmark"
+    ))
+    db.commit()
+
+
+def in_session(Session, fn):
+    db = Session()
+    try:
+        return fn(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def run_mode(mode: str, path: str) -> dict:
+    engine = create_engine(f"sqlite:///{path}", pool_size=CLIENTS, max_overflow=0)
+    if mode == "executor":
+        event.listen(engine, "connect", apply_sqlite_pragmas)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    executor = DatabaseExecutor(session_factory=Session) if mode == "executor" else None
+    pool = ThreadPoolExecutor(8) if mode == "threads" else None
+    loop = asyncio.get_running_loop()
+
+    async def do(fn):
+        if mode == "inline":
+            return in_session(Session, fn)
+        if mode == "threads":
+            return await loop.run_in_executor(pool, in_session, Session, fn)
+        if fn is write_report:
+            return await executor.write(fn)
+        return await executor.read(fn)
+
+    counts = {"ops": 0, "locked": 0}
+    lags = []
+    deadline = time.perf_counter() + DURATION_S
+
+    async def client():
+        while time.perf_counter() < deadline:
+            try:
+                await do(write_report if random.random() < WRITE_RATIO else read_route)
+                counts["ops"] += 1
+            except OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                counts["locked"] += 1
+            await asyncio.sleep(0)
+
+    async def probe():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append((time.perf_counter() - start - 0.01) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(probe(), *(client() for _ in range(CLIENTS)))
+    elapsed = time.perf_counter() - start
+
+    if executor:
+        executor.shutdown()
+    if pool:
+        pool.shutdown()
+    engine.dispose()
+    lags.sort()
+    return {
+        "ops_s": counts["ops"] / elapsed,
+        "lag_p99_ms": lags[int(len(lags) * 0.99)] if lags else elapsed * 1000,
+        "locked": counts["locked"]
+    }
+
+
+def main():
+    random.seed(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "base.db")
+        populate(base)
+        for mode in ("inline", "threads", "executor"):
+            path = os.path.join(tmp, f"{mode}.db")
+            shutil.copy(base, path)  # WAL mode sticks to the file, so each mode gets a fresh copy
+            result = asyncio.run(run_mode(mode, path))
+            print(f"{mode:>8} | {result['ops_s']:7.0f} ops/s | loop lag p99 {result['lag_p99_ms']:7.1f} ms | "
+                  f"{result['locked']} locked errors")
+
+
+if __name__ == "__main__":
+    main()
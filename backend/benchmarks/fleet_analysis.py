@@ -0,0 +1,85 @@
+"""
+Benchmark batch route analysis on the process pool
+
+Analyzes 200 random metro routes (20 waypoints each) against 200k
+accidents, first one by one in-process (what 200 /analyze-route calls
+cost) and then through FleetAnalysisService with 1, 2, 4 ... workers up
+to the CPU count, reporting routes/s and the speedup over one worker.
+
+Usage (from backend/):
+    python -m benchmarks.fleet_analysis
+"""
+import asyncio
+import os
+import random
+import time
+
+from services.accident_index import AccidentIndex
+from services.fleet_analysis import FleetAnalysisService
+from services.member4_route import route_service
+
+CENTER = (12.9716, 77.5946)
+SPREAD_DEG = 0.2
+ACCIDENTS = 200_000
+ROUTES = 200
+WAYPOINTS = 20
+
+
+def random_route() -> dict:
+    start = (CENTER[0] + random.uniform(-SPREAD_DEG, SPREAD_DEG), CENTER[1] + random.uniform(-SPREAD_DEG, SPREAD_DEG))
+    end = (CENTER[0] + random.uniform(-SPREAD_DEG, SPREAD_DEG), CENTER[1] + random.uniform(-SPREAD_DEG, SPREAD_DEG))
+    return {
+        "origin": {"latitude": start[0], "longitude": start[1]},
+        "destination": {"latitude": end[0], "longitude": end[1]},
+        "waypoints": [
+            {"latitude": start[0] + (end[0] - start[0]) * i / (WAYPOINTS + 1) + random.uniform(-0.002, 0.002),
+             "longitude": start[1] + (end[1] - start[1]) * i / (WAYPOINTS + 1) + random.uniform(-0.002, 0.002)}
+            for i in range(1, WAYPOINTS + 1)
+        ]
+    }
+
+
+async def run_pool(service: FleetAnalysisService, routes, index) -> float:
+    start = time.perf_counter()
+    done = 0
+    async for _, analysis, error in service.analyze_stream(routes, index):
+        assert error is None, error
+        done += 1
+    assert done == len(routes)
+    elapsed = time.perf_counter() - start
+    service.shutdown()
+    return elapsed
+
+
+def main():
+    random.seed(42)
+    index = AccidentIndex()
+    for i in range(ACCIDENTS):
+        index._insert(i, (
+            CENTER[0] + random.uniform(-SPREAD_DEG - 0.01, SPREAD_DEG + 0.01),
+            CENTER[1] + random.uniform(-SPREAD_DEG - 0.01, SPREAD_DEG + 0.01),
+            random.choice(["Minor", "Major", "Fatal"]),
+            random.choice(["Clear", "Rain", "Fog"]),
+            random.choice(["Dry", "Wet"]),
+            random.uniform(20, 100)
+        ))
+    routes = [random_route() for _ in range(ROUTES)]
+
+    start = time.perf_counter()
+    for route in routes:
+        asyncio.run(route_service.analyze_route(route, index=index))
+    serial_s = time.perf_counter() - start
+    print(f"in-process, one by one | {ROUTES / serial_s:7.1f} routes/s")
+
+    cpus = os.cpu_count() or 1
+    workers, baseline = 1, None
+    while workers <= cpus:
+        elapsed = asyncio.run(run_pool(FleetAnalysisService(max_workers=workers), routes, index))
+        baseline = baseline or elapsed
+        print(f"pool, {workers:2d} worker(s)      | {ROUTES / elapsed:7.1f} routes/s | "
+              f"speedup {baseline / elapsed:4.2f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
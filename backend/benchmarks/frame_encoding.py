@@ -0,0 +1,80 @@
+"""
+Measure the CPU cost of serializing broadcast frames
+
+Compares per-recipient json.dumps (the old send_json behaviour) with
+encode-once frames using the stdlib encoder, orjson and msgpack.
+
+Usage (from backend/):
+    python -m benchmarks.frame_encoding
+"""
+import json
+import time
+
+from services import member3_realtime
+from services.member3_realtime import OutboundFrame
+
+RECIPIENTS = (1_000, 10_000, 100_000)
+
+ALERT_MESSAGE = {
+    "event": "new_alert",
+    "data": {
+        "id": 4211,
+        "type": "accident",
+        "severity": "high",
+        "location": {"latitude": 12.971599, "longitude": 77.594566},
+        "message": "Major accident reported",
+        "created_at": "2026-10-19T08:15:02.118274",
+        "expires_at": "2026-10-19T10:15:02.118274",
+        "radius_km": 5,
+        "active": True,
+        "icon": "🚨",
+        "color": "#FF0000"
+    }
+}
+
+
+def cpu_ms(fn) -> float:
+    start = time.process_time()
+    fn()
+    return (time.process_time() - start) * 1000
+
+
+def per_recipient(recipients: int):
+    for _ in range(recipients):
+        json.dumps(ALERT_MESSAGE)
+
+
+def encode_once(recipients: int, binary: bool = False):
+    frame = OutboundFrame(ALERT_MESSAGE)
+    for _ in range(recipients):
+        frame.binary if binary else frame.text
+
+
+def main():
+    orjson_module = member3_realtime.orjson
+    for recipients in RECIPIENTS:
+        baseline = cpu_ms(lambda: per_recipient(recipients))
+
+        member3_realtime.orjson = None
+        stdlib_once = cpu_ms(lambda: encode_once(recipients))
+        member3_realtime.orjson = orjson_module
+
+        line = (f"{recipients:>7} recipients | per-recipient json {baseline:8.2f} ms | "
+                f"encode-once json {stdlib_once:6.2f} ms")
+        if orjson_module is not None:
+            line += f" | encode-once orjson {cpu_ms(lambda: encode_once(recipients)):6.2f} ms"
+        if member3_realtime.msgpack is not None:
+            line += f" | encode-once msgpack {cpu_ms(lambda: encode_once(recipients, True)):6.2f} ms"
+        print(line)
+
+    single = 20_000
+    stdlib = cpu_ms(lambda: [json.dumps(ALERT_MESSAGE) for _ in range(single)]) / single * 1000
+    print(f"single encode: json {stdlib:.2f} us", end="")
+    if orjson_module is not None:
+        fast = cpu_ms(lambda: [orjson_module.dumps(ALERT_MESSAGE) for _ in range(single)]) / single * 1000
+        print(f" | orjson {fast:.2f} us", end="")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark raster-based route scoring against the exact segment analysis
+
+For 10k, 100k and 1M accidents spread over a metro area, compares
+RouteAnalysisService.score_route (risk raster) with analyze_route fed the
+accidents inside the route's query boxes (what /analyze-route does), and
+reports how closely the per-segment incident counts and risk scores agree.
+
+Usage (from backend/):
+    python -m benchmarks.risk_raster
+"""
+import asyncio
+import random
+import time
+
+import numpy as np
+
+from services import member4_route
+from services.member4_route import route_service
+from services.risk_raster import RiskRaster
+from services.accident_index import AccidentIndex
+
+CENTER = (12.9716, 77.5946)
+SPREAD_DEG = 0.3
+SEVERITIES = ["Minor", "Major", "Fatal"]
+ROUTE = {
+    "origin": {"latitude": 12.9716, "longitude": 77.5946},
+    "destination": {"latitude": 13.0827, "longitude": 77.6470},
+    "waypoints": [
+        {"latitude": 12.9716 + 0.111 * i / 21, "longitude": 77.5946 + 0.052 * i / 21 + 0.003 * (i % 3)}
+        for i in range(1, 21)
+    ]
+}
+
+
+def run(accidents: int):
+    raster = RiskRaster()
+    index = AccidentIndex()
+    start = time.perf_counter()
+    for i in range(accidents):
+        lat = CENTER[0] + random.uniform(-SPREAD_DEG, SPREAD_DEG)
+        lng = CENTER[1] + random.uniform(-SPREAD_DEG, SPREAD_DEG)
+        severity = random.choice(SEVERITIES)
+        raster.add(lat, lng, severity)
+        index._insert(i, (lat, lng, severity, "Clear", "Dry", 50.0))
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    exact = asyncio.run(route_service.analyze_route(dict(ROUTE), index=index))
+    exact_ms = (time.perf_counter() - start) * 1000
+
+    member4_route.risk_raster = raster
+    start = time.perf_counter()
+    fast = route_service.score_route(dict(ROUTE))
+    raster_ms = (time.perf_counter() - start) * 1000
+
+    exact_counts = np.array([s['incident_count'] for s in exact['segment_analysis']])
+    fast_counts = np.array([s['incident_count'] for s in fast['segment_analysis']])
+    exact_scores = np.array([s['risk_score'] for s in exact['segment_analysis']])
+    fast_scores = np.array([s['risk_score'] for s in fast['segment_analysis']])
+    count_error = np.abs(fast_counts - exact_counts).sum() / max(exact_counts.sum(), 1)
+
+    print(f"{accidents:>8} accidents | exact {exact_ms:8.1f} ms | raster {raster_ms:6.1f} ms | "
+          f"count error {count_error * 100:5.1f}% | mean |score diff| "
+          f"{np.abs(fast_scores - exact_scores).mean():5.2f} | raster built in {build_s:5.1f} s")
+
+
+if __name__ == "__main__":
+    random.seed(42)
+    for accidents in (10_000, 100_000, 1_000_000):
+        run(accidents)
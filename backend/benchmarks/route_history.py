@@ -0,0 +1,90 @@
+"""
+Benchmark route statistics from daily rollups against scanning route_analyses
+
+Writes 1M analyzed routes spread over a year through
+RouteHistoryWriter._write_batch into a scratch SQLite database (each batch
+falls on one day, as with the live writer's one-second flushes), then times
+the 30-day /statistics query (rollups) and the equivalent aggregate over
+the raw route_analyses rows.
+
+Usage (from backend/):
+    python -m benchmarks.route_history
+"""
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Base, RouteAnalysis
+from services.member4_route import route_service
+from services.route_history import RouteHistoryWriter
+
+ROUTES = 1_000_000
+BATCH = 2500
+DAYS = 365
+
+
+def sample_analysis() -> tuple:
+    random.seed(42)
+    history = [
+        {"latitude": 12.97 + random.uniform(-0.05, 0.05), "longitude": 77.59 + random.uniform(-0.05, 0.05),
+         "severity": random.choice(["Minor", "Major", "Fatal"]), "weather": "Rain", "road_condition": "Wet"}
+        for _ in range(500)
+    ]
+    route = {
+        "origin": {"latitude": 12.95, "longitude": 77.57},
+        "destination": {"latitude": 13.0, "longitude": 77.62},
+        "waypoints": [{"latitude": 12.97, "longitude": 77.6}]
+    }
+    return route, asyncio.run(route_service.analyze_route(route, history))
+
+
+def main():
+    route, analysis = sample_analysis()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'history.db')}")
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        writer = RouteHistoryWriter()
+        db = Session()
+
+        template = writer.to_row(route, analysis)
+        now = datetime.utcnow()
+        start = time.perf_counter()
+        batches = ROUTES // BATCH
+        for i in range(batches):
+            day = now - timedelta(days=DAYS - 1 - i * DAYS // batches)
+            rows = []
+            for _ in range(BATCH):
+                row = dict(template)
+                row["safety_score"] = random.uniform(20, 100)
+                row["analyzed_at"] = day.replace(hour=0, minute=0, second=0) + timedelta(seconds=random.randrange(86400))
+                rows.append(row)
+            writer._write_batch(db, rows)
+        write_s = time.perf_counter() - start
+        print(f"wrote {ROUTES} analyses in {write_s:5.1f} s ({ROUTES / write_s:,.0f} rows/s)")
+
+        start_date = now - timedelta(days=29)
+
+        start = time.perf_counter()
+        rollup = route_service.get_route_statistics(db, start_date, now)
+        rollup_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        total, avg = db.query(func.count(RouteAnalysis.id), func.avg(RouteAnalysis.safety_score)).filter(
+            RouteAnalysis.analyzed_at >= start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        ).one()
+        scan_ms = (time.perf_counter() - start) * 1000
+        db.close()
+
+        print(f"30-day statistics | rollups {rollup_ms:7.2f} ms ({rollup['total_routes_analyzed']} routes, "
+              f"avg {rollup['average_safety_score']}) | scan {scan_ms:7.2f} ms ({total} routes, avg {avg:.2f})")
+
+
+if __name__ == "__main__":
+    main()
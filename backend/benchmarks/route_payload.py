@@ -0,0 +1,81 @@
+"""
+Benchmark route payloads as JSON points against encoded polylines
+
+For road-following routes of 1k, 5k and 20k vertices, compares the request
+body size and the time to parse it into route_data (json.loads, pydantic
+validation and build_route_data), then the /score-route response size and
+serialization time with per-segment start/end dicts against the polyline
+geometry with vertex indices.
+
+Usage (from backend/):
+    python -m benchmarks.route_payload
+"""
+import json
+import math
+import random
+import time
+
+from routes.member4_routes import RouteAnalysisRequest, build_route_data, with_polyline_geometry
+from services import member4_route
+from services.member4_route import route_service
+from services.risk_raster import RiskRaster
+from utils.polyline import encode_polyline
+
+CENTER = (12.9716, 77.5946)
+REPEATS = 5
+
+
+def road_route(vertices: int) -> list:
+    """A wiggly path with ~15 m between vertices"""
+    lat, lng, heading = CENTER[0], CENTER[1], random.uniform(0, 2 * math.pi)
+    points = []
+    for _ in range(vertices):
+        points.append({"latitude": round(lat, 6), "longitude": round(lng, 6)})
+        heading += random.uniform(-0.3, 0.3)
+        lat += 0.000135 * math.cos(heading)
+        lng += 0.000135 * math.sin(heading)
+    return points
+
+
+def best_of(fn) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def parse(body: str) -> dict:
+    return build_route_data(RouteAnalysisRequest.model_validate(json.loads(body)))
+
+
+def main():
+    random.seed(42)
+    raster = RiskRaster()
+    for _ in range(100_000):
+        raster.add(CENTER[0] + random.uniform(-0.1, 0.1), CENTER[1] + random.uniform(-0.1, 0.1),
+                   random.choice(["Minor", "Major", "Fatal"]))
+    member4_route.risk_raster = raster
+
+    for vertices in (1_000, 5_000, 20_000):
+        points = road_route(vertices)
+        points_body = json.dumps({"origin": points[0], "destination": points[-1], "waypoints": points[1:-1]})
+        polyline_body = json.dumps({"polyline": encode_polyline(points)})
+
+        points_ms = best_of(lambda: parse(points_body))
+        polyline_ms = best_of(lambda: parse(polyline_body))
+        print(f"{vertices:>6} vertices | request {len(points_body) / 1024:7.1f} KB -> {len(polyline_body) / 1024:6.1f} KB | "
+              f"parse {points_ms:7.2f} ms -> {polyline_ms:6.2f} ms")
+
+        route_data = parse(points_body)
+        scores = route_service.score_route(route_data)
+        compact = with_polyline_geometry(route_data, scores)
+        points_out_ms = best_of(lambda: json.dumps(scores))
+        polyline_out_ms = best_of(lambda: json.dumps(with_polyline_geometry(route_data, scores)))
+        print(f"{'':>15} | response {len(json.dumps(scores)) / 1024:6.1f} KB -> {len(json.dumps(compact)) / 1024:6.1f} KB | "
+              f"serialize {points_out_ms:5.2f} ms -> {polyline_out_ms:5.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark loading accidents for route analysis from SQLite
+
+Compares the previous full-table load (every AccidentReport as an ORM object,
+then a dict) with the padded bounding-box query backed by the lat/lng index
+and with the in-memory accident index, for a ~20 km city route over a table
+of 10k, 100k and 1M reports spread across a 2x2 degree region.
+
+Usage (from backend/):
+    python -m benchmarks.route_query
+"""
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.database import AccidentReport, Base
+from routes.member4_routes import _query_route_accidents
+from services.accident_index import AccidentIndex
+from services.member4_route import route_service
+
+CENTER = (12.9716, 77.5946)
+SPREAD_DEG = 1.0
+COLUMNS = ["latitude", "longitude", "severity", "weather", "road_condition", "speed"]
+ROUTE = {
+    "origin": {"latitude": 12.9716, "longitude": 77.5946},
+    "destination": {"latitude": 13.0827, "longitude": 77.6470},
+    "waypoints": [
+        {"latitude": 13.0105, "longitude": 77.6010},
+        {"latitude": 13.0450, "longitude": 77.6230}
+    ]
+}
+REPEATS = 5
+
+
+def populate(engine, rows: int):
+    Base.metadata.create_all(bind=engine)
+    severities = ["Minor", "Major", "Fatal"]
+    weather = ["Clear", "Rain", "Fog"]
+    roads = ["Dry", "Wet", "Potholes"]
+    batch = []
+    with engine.begin() as conn:
+        for _ in range(rows):
+            batch.append({
+                "latitude": CENTER[0] + random.uniform(-SPREAD_DEG, SPREAD_DEG),
+                "longitude": CENTER[1] + random.uniform(-SPREAD_DEG, SPREAD_DEG),
+                "severity": random.choice(severities),
+                "weather": random.choice(weather),
+                "road_condition": random.choice(roads),
+                "speed": random.uniform(20, 100)
+            })
+            if len(batch) == 50_000:
+                conn.execute(AccidentReport.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(AccidentReport.__table__.insert(), batch)
+
+
+def full_scan(db) -> list:
+    """Previous behaviour"""
+    return [
+        {column: getattr(acc, column) for column in COLUMNS}
+        for acc in db.query(AccidentReport).all()
+    ]
+
+
+def timed(fn, db) -> tuple:
+    best = float("inf")
+    for _ in range(REPEATS):
+        db.expunge_all()
+        start = time.perf_counter()
+        result = fn(db)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, len(result)
+
+
+def run(rows: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        populate(engine, rows)
+        db = sessionmaker(bind=engine)()
+
+        full_ms, full_rows = timed(full_scan, db)
+        bbox_ms, bbox_rows = timed(
+            lambda s: _query_route_accidents(s, route_service.get_query_boxes(ROUTE), COLUMNS), db
+        )
+
+        index = AccidentIndex()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            index.load(db)
+        build_s = time.perf_counter() - start
+        index_ms, _ = timed(lambda s: index.query_boxes(route_service.get_query_boxes(ROUTE), COLUMNS), db)
+
+        print(f"{rows:>9} reports | full scan {full_ms:9.1f} ms ({full_rows} rows) | "
+              f"bbox {bbox_ms:7.2f} ms ({bbox_rows} rows) | in-memory {index_ms:6.2f} ms "
+              f"(built in {build_s:5.1f} s)")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    random.seed(42)
+    for rows in (10_000, 100_000, 1_000_000):
+        run(rows)
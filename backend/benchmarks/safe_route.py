@@ -0,0 +1,109 @@
+"""
+Benchmark the offline safest-path engine on a synthetic city graph
+
+Generates a jittered street grid (about 90k intersections and 360k directed
+edges at ~100 m spacing, with some streets missing and some one-way) as a CSV
+edge list, scatters accidents over it, then measures load time, risk
+assignment and A* query latency for random origin/destination pairs.
+
+Usage (from backend/):
+    python -m benchmarks.safe_route
+"""
+import contextlib
+import csv
+import io
+import os
+import random
+import tempfile
+import time
+
+from services.road_graph import RoadGraph
+
+CENTER = (12.9716, 77.5946)
+GRID = 300
+SPACING_DEG = 0.0009  # ~100 m
+ACCIDENTS = 100_000
+QUERIES = 30
+
+
+def write_grid_csv(path: str):
+    origin_lat = CENTER[0] - GRID * SPACING_DEG / 2
+    origin_lng = CENTER[1] - GRID * SPACING_DEG / 2
+    coords = {
+        (r, c): (origin_lat + (r + random.uniform(-0.2, 0.2)) * SPACING_DEG,
+                 origin_lng + (c + random.uniform(-0.2, 0.2)) * SPACING_DEG)
+        for r in range(GRID) for c in range(GRID)
+    }
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["source", "target", "source_lat", "source_lng",
+                         "target_lat", "target_lng", "oneway"])
+        for (r, c), (lat, lng) in coords.items():
+            for nr, nc in ((r + 1, c), (r, c + 1)):
+                if (nr, nc) not in coords or random.random() < 0.05:
+                    continue
+                nlat, nlng = coords[(nr, nc)]
+                oneway = 1 if random.random() < 0.1 else 0
+                writer.writerow([f"{r}:{c}", f"{nr}:{nc}", lat, lng, nlat, nlng, oneway])
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    random.seed(42)
+    graph = RoadGraph()
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "graph.csv")
+        write_grid_csv(csv_path)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            graph.load(csv_path)
+            csv_s = time.perf_counter() - start
+
+            npz_path = os.path.join(tmp, "graph.npz")
+            graph.save(npz_path)
+            start = time.perf_counter()
+            graph.load(npz_path)
+            npz_s = time.perf_counter() - start
+
+    span = GRID * SPACING_DEG / 2
+    accidents = [
+        (CENTER[0] + random.uniform(-span, span), CENTER[1] + random.uniform(-span, span),
+         random.choice(["Minor", "Major", "Fatal"]))
+        for _ in range(ACCIDENTS)
+    ]
+    start = time.perf_counter()
+    graph.set_accidents(accidents)
+    risk_s = time.perf_counter() - start
+
+    print(f"graph: {graph.node_count} nodes, {graph.edge_count} edges | load csv {csv_s:5.1f} s, "
+          f"npz {npz_s:5.1f} s | risk from {ACCIDENTS} accidents {risk_s:5.1f} s")
+
+    pairs = []
+    for _ in range(QUERIES):
+        pairs.append((
+            {"latitude": CENTER[0] + random.uniform(-span, span), "longitude": CENTER[1] + random.uniform(-span, span)},
+            {"latitude": CENTER[0] + random.uniform(-span, span), "longitude": CENTER[1] + random.uniform(-span, span)}
+        ))
+
+    for safety_weight, alternatives in ((0.0, 1), (0.2, 1), (0.2, 3)):
+        latencies, detours, risk_cut = [], [], []
+        for origin, destination in pairs:
+            start = time.perf_counter()
+            routes = graph.find_routes(origin, destination, safety_weight, alternatives)
+            latencies.append((time.perf_counter() - start) * 1000)
+            shortest = graph.find_routes(origin, destination, 0.0, 1)[0]
+            if shortest["distance_km"] > 0:
+                detours.append(routes[0]["distance_km"] / shortest["distance_km"] - 1)
+                risk_cut.append(1 - routes[0]["risk"] / max(shortest["risk"], 1e-9))
+        print(f"safety_weight {safety_weight:3.1f} k={alternatives} | p50 {percentile(latencies, 50):7.1f} ms "
+              f"p95 {percentile(latencies, 95):7.1f} ms | avg detour {sum(detours) / len(detours) * 100:5.1f}% "
+              f"| avg risk avoided {sum(risk_cut) / len(risk_cut) * 100:5.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark and validate the vectorized point-to-segment distance kernel
+
+Compares utils.distance.points_near_segments with the previous per-incident,
+per-segment Python loop (projection in raw degrees, then haversine), and
+checks both against a haversine reference: the minimum over 20k points
+sampled along each segment.
+
+Usage (from backend/):
+    python -m benchmarks.segment_distance
+"""
+import math
+import random
+import time
+
+import numpy as np
+
+from utils.distance import haversine_distance, point_to_segments_distance, points_near_segments
+
+CENTER = (12.9716, 77.5946)
+RADIUS_KM = 0.5
+
+
+def legacy_distance(px, py, x1, y1, x2, y2) -> float:
+    """Previous RouteAnalysisService._point_to_segment_distance"""
+    dx, dy = x2 - x1, y2 - y1
+    if dx == 0 and dy == 0:
+        return haversine_distance(px, py, x1, y1)
+    t = max(0, min(1, ((px - x1) * dx + (py - y1) * dy) / (dx * dx + dy * dy)))
+    return haversine_distance(px, py, x1 + t * dx, y1 + t * dy)
+
+
+def reference_distance(px, py, x1, y1, x2, y2, samples: int = 20000) -> float:
+    ts = np.linspace(0, 1, samples + 1)
+    lats, lngs = x1 + (x2 - x1) * ts, y1 + (y2 - y1) * ts
+    p_lat, p_lng = math.radians(px), math.radians(py)
+    lats, lngs = np.radians(lats), np.radians(lngs)
+    a = np.sin((lats - p_lat) / 2) ** 2 + math.cos(p_lat) * np.cos(lats) * np.sin((lngs - p_lng) / 2) ** 2
+    return float(np.min(2 * 6371 * np.arcsin(np.sqrt(a))))
+
+
+def validate(latitude: float, cases: int = 300):
+    """Worst relative error vs the haversine reference at a latitude"""
+    worst_kernel = worst_legacy = 0.0
+    for _ in range(cases):
+        length_deg = random.uniform(0.05, 50) / 111
+        heading = random.uniform(0, 2 * math.pi)
+        x1, y1 = latitude + random.uniform(-0.5, 0.5), random.uniform(-170, 170)
+        x2 = x1 + length_deg * math.cos(heading)
+        y2 = y1 + length_deg * math.sin(heading) / math.cos(math.radians(x1))
+        t = random.random()
+        px = x1 + (x2 - x1) * t + random.uniform(-0.01, 0.01)
+        py = y1 + (y2 - y1) * t + random.uniform(-0.01, 0.01)
+
+        reference = reference_distance(px, py, x1, y1, x2, y2)
+        if reference < 0.01:
+            continue
+        kernel = point_to_segments_distance([px], [py], [x1], [y1], [x2], [y2])[0, 0]
+        worst_kernel = max(worst_kernel, abs(kernel - reference) / reference)
+        worst_legacy = max(worst_legacy, abs(legacy_distance(px, py, x1, y1, x2, y2) - reference) / reference)
+    print(f"lat {latitude:5.1f} | worst relative error: kernel {worst_kernel * 100:6.3f}% | "
+          f"legacy {worst_legacy * 100:7.2f}%")
+
+
+def benchmark(incidents: int, segments: int):
+    lats = [CENTER[0] + random.uniform(-0.1, 0.1) for _ in range(incidents)]
+    lngs = [CENTER[1] + random.uniform(-0.1, 0.1) for _ in range(incidents)]
+    route = [(CENTER[0] - 0.08 + 0.16 * i / segments, CENTER[1] + random.uniform(-0.02, 0.02))
+             for i in range(segments + 1)]
+    starts, ends = route[:-1], route[1:]
+
+    start = time.perf_counter()
+    legacy_hits = 0
+    for (x1, y1), (x2, y2) in zip(starts, ends):
+        for px, py in zip(lats, lngs):
+            if legacy_distance(px, py, x1, y1, x2, y2) <= RADIUS_KM:
+                legacy_hits += 1
+    legacy_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    rows, _, _ = points_near_segments(
+        lats, lngs,
+        [p[0] for p in starts], [p[1] for p in starts],
+        [p[0] for p in ends], [p[1] for p in ends],
+        RADIUS_KM
+    )
+    kernel_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{incidents:>7} incidents x {segments:>3} segments | legacy {legacy_ms:9.1f} ms "
+          f"({legacy_hits} hits) | kernel {kernel_ms:7.2f} ms ({len(rows)} hits) | "
+          f"speedup {legacy_ms / kernel_ms:6.1f}x")
+
+
+if __name__ == "__main__":
+    random.seed(42)
+    for latitude in (0, 13, 35, 50, 65):
+        validate(latitude)
+    for incidents, segments in ((1_000, 10), (10_000, 20), (100_000, 50)):
+        benchmark(incidents, segments)
@@ -0,0 +1,311 @@
+"""
+Load-test the realtime websocket tier in-process
+
+Starts the FastAPI app (startup hooks included) and drives its real
+/api/member3/ws endpoint over the ASGI interface, so no sockets or network
+access are needed. Simulated drivers are spread over a metro area and send
+GPS updates at a configurable rate while alerts are fired through
+RealTimeAlertService.create_alert.
+
+Reports end-to-end delivery latency (create_alert call to the server handing
+the frame to the transport), server CPU, resident memory per connection and
+frames that were expected but never delivered.
+
+The app runs against a throwaway database in a temporary directory
+(DATABASE_URL is set before main is imported), so the checked-in
+database is never touched.
+
+Usage (from backend/):
+    python -m benchmarks.websocket_load --clients 2000 --location-hz 1 \\
+        --alerts-per-second 20 --duration 15
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import resource
+import tempfile
+import time
+from collections import Counter
+
+# Startup hooks create tables and switch SQLite to WAL; keep that off the real database
+_database_dir = tempfile.TemporaryDirectory(prefix="websocket_load_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_database_dir.name, 'benchmark.db')}"
+
+from main import app
+from services.member3_realtime import realtime_service, websocket_manager
+
+CENTER = (12.9716, 77.5946)
+
+
+def rss_bytes() -> int:
+    """Resident set size of this process (Linux)"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class LoadStats:
+    def __init__(self):
+        self.created_at = {}  # alert_id -> perf_counter at create_alert
+        self.expected = Counter()  # alert_id -> clients in range at creation
+        self.delivered = Counter()  # alert_id -> new_alert frames delivered
+        self.created_frames = Counter()  # alert_id -> alert_created frames delivered
+        self.area_latencies = []
+        self.global_latencies = []
+        self.frames = Counter()
+        self.client_cpu = 0.0  # Time spent inside simulated clients
+        self.merged = 0
+        self.location_updates = 0
+
+
+class SimulatedClient:
+    """One driver speaking ASGI websocket messages to the app"""
+
+    def __init__(self, index: int, latitude: float, longitude: float,
+                 stats: LoadStats, send_delay: float = 0):
+        self.index = index
+        self.latitude = latitude
+        self.longitude = longitude
+        self.stats = stats
+        self.send_delay = send_delay
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.connected = asyncio.Event()
+        self.closed = False
+        self.task = None
+
+    @property
+    def scope(self) -> dict:
+        return {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "http_version": "1.1",
+            "path": "/api/member3/ws",
+            "raw_path": b"/api/member3/ws",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"loadtest")],
+            "client": ("127.0.0.1", 10000 + self.index),
+            "server": ("loadtest", 80),
+            "subprotocols": []
+        }
+
+    async def open(self):
+        await self.inbox.put({"type": "websocket.connect"})
+        self.task = asyncio.create_task(app(self.scope, self.inbox.get, self.send))
+        await self.connected.wait()
+
+    async def close(self):
+        await self.inbox.put({"type": "websocket.disconnect", "code": 1000})
+        if self.task is not None:
+            await self.task
+
+    async def push(self, message: dict):
+        await self.inbox.put({"type": "websocket.receive", "text": json.dumps(message)})
+
+    async def send(self, message: dict):
+        """ASGI send: the moment a frame leaves the server"""
+        now = time.perf_counter()
+        started = time.process_time()
+        if message["type"] == "websocket.send":
+            data = json.loads(message.get("text") or message.get("bytes"))
+            event = data.get("event")
+            self.stats.frames[event] += 1
+            if event == "new_alert":
+                alert_id = data["data"]["id"]
+                self.stats.delivered[alert_id] += 1
+                self.stats.area_latencies.append((now - self.stats.created_at[alert_id]) * 1000)
+            elif event == "alert_created":
+                alert_id = data["alert_id"]
+                self.stats.created_frames[alert_id] += 1
+                self.stats.global_latencies.append((now - self.stats.created_at[alert_id]) * 1000)
+            elif event == "connected":
+                self.connected.set()
+        elif message["type"] == "websocket.close":
+            self.closed = True
+            self.connected.set()
+        self.stats.client_cpu += time.process_time() - started
+
+        if self.send_delay:
+            await asyncio.sleep(self.send_delay)
+
+    async def drive(self, hz: float, speed_kmh: float, stop: asyncio.Event):
+        """Random-walk around the area, reporting GPS `hz` times per second"""
+        interval = 1 / hz
+        await asyncio.sleep(random.uniform(0, interval))
+        heading = random.uniform(0, 2 * math.pi)
+        step_deg = speed_kmh / 3600 * interval / 111
+        while not stop.is_set() and not self.closed:
+            heading += random.uniform(-0.3, 0.3)
+            self.latitude += step_deg * math.cos(heading)
+            self.longitude += step_deg * math.sin(heading)
+            await self.push({
+                "type": "location_update",
+                "latitude": self.latitude,
+                "longitude": self.longitude
+            })
+            self.stats.location_updates += 1
+            await asyncio.sleep(interval)
+
+
+async def fire_alerts(args, stats: LoadStats, stop: asyncio.Event):
+    interval = 1 / args.alerts_per_second
+    next_at = time.perf_counter()
+    while not stop.is_set():
+        lat = CENTER[0] + random.uniform(-args.spread_deg, args.spread_deg)
+        lng = CENTER[1] + random.uniform(-args.spread_deg, args.spread_deg)
+        in_range = len(websocket_manager.location_index.query_radius(lat, lng, args.radius_km))
+
+        created = time.perf_counter()
+        alert = await realtime_service.create_alert({
+            "type": random.choice(["accident", "near_miss", "traffic"]),
+            "severity": random.choice(["low", "medium", "high", "critical"]),
+            "latitude": lat,
+            "longitude": lng,
+            "message": "Load test alert",
+            "radius_km": args.radius_km,
+            "duration_minutes": 5
+        })
+        if alert.get("report_count", 1) > 1:
+            stats.merged += 1  # Folded into an earlier alert; no new_alert frame
+        else:
+            stats.created_at[alert["id"]] = created
+            stats.expected[alert["id"]] = in_range
+
+        next_at += interval
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+
+
+async def drain(timeout: float = 30):
+    """Wait for every outbound queue to empty"""
+    deadline = time.perf_counter() + timeout
+    while any(c.queue for c in websocket_manager.channels.values()):
+        if time.perf_counter() > deadline:
+            break
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.05)
+
+
+async def run(args) -> dict:
+    random.seed(args.seed)
+    stats = LoadStats()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        await app.router.startup()
+
+        rss_before = rss_bytes()
+        clients = []
+        for i in range(args.clients):
+            slow = random.random() < args.slow_fraction
+            client = SimulatedClient(
+                i,
+                CENTER[0] + random.uniform(-args.spread_deg, args.spread_deg),
+                CENTER[1] + random.uniform(-args.spread_deg, args.spread_deg),
+                stats,
+                send_delay=args.slow_delay if slow else 0
+            )
+            await client.open()
+            await client.push({
+                "type": "location_update",
+                "latitude": client.latitude,
+                "longitude": client.longitude
+            })
+            clients.append(client)
+        await asyncio.sleep(0.1)
+        rss_connected = rss_bytes()
+
+        stop = asyncio.Event()
+        drivers = [
+            asyncio.create_task(c.drive(args.location_hz, args.speed_kmh, stop))
+            for c in clients
+        ] if args.location_hz > 0 else []
+        alerts_task = asyncio.create_task(fire_alerts(args, stats, stop))
+
+        wall_start = time.perf_counter()
+        cpu_start = cpu_seconds()
+        client_cpu_start = stats.client_cpu
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await alerts_task
+        await asyncio.gather(*drivers)
+        await drain()
+        wall = time.perf_counter() - wall_start
+        cpu = cpu_seconds() - cpu_start
+        client_cpu = stats.client_cpu - client_cpu_start
+
+        manager_stats = websocket_manager.get_stats()
+        connected_at_end = len(websocket_manager.active_connections)
+        for client in clients:
+            await client.close()
+        await app.router.shutdown()
+
+    alerts = len(stats.created_at)
+    missing_area = sum(max(0, stats.expected[a] - stats.delivered[a]) for a in stats.created_at)
+    missing_global = sum(max(0, args.clients - stats.created_frames[a]) for a in stats.created_at)
+    return {
+        "clients": args.clients,
+        "connected_at_end": connected_at_end,
+        "duration_s": round(wall, 2),
+        "alerts_target": int(args.duration * args.alerts_per_second),
+        "alerts_created": alerts,
+        "alerts_merged": stats.merged,
+        "location_updates_sent": stats.location_updates,
+        "location_updates_applied": manager_stats["location_updates"]["applied"],
+        "frames_delivered": dict(stats.frames),
+        "new_alert_latency_ms": summarize(stats.area_latencies),
+        "alert_created_latency_ms": summarize(stats.global_latencies),
+        "missing_new_alert_frames": missing_area,
+        "missing_alert_created_frames": missing_global,
+        "queue_dropped": manager_stats["dropped"],
+        "queue_coalesced": manager_stats["coalesced"],
+        "slow_consumer_disconnects": manager_stats["slow_consumer_disconnects"],
+        "send_failures": manager_stats["send_failures"],
+        "server_cpu_percent": round((cpu - client_cpu) / wall * 100, 1),
+        "harness_cpu_percent": round(client_cpu / wall * 100, 1),
+        "rss_per_connection_kb": round((rss_connected - rss_before) / args.clients / 1024, 2)
+    }
+
+
+def summarize(latencies) -> dict:
+    return {
+        "p50": round(percentile(latencies, 50), 2),
+        "p90": round(percentile(latencies, 90), 2),
+        "p99": round(percentile(latencies, 99), 2),
+        "max": round(max(latencies, default=0.0), 2),
+        "samples": len(latencies)
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=10, help="seconds of sustained load")
+    parser.add_argument("--location-hz", type=float, default=1, help="GPS updates per client per second")
+    parser.add_argument("--speed-kmh", type=float, default=40)
+    parser.add_argument("--alerts-per-second", type=float, default=10)
+    parser.add_argument("--radius-km", type=float, default=5)
+    parser.add_argument("--spread-deg", type=float, default=0.3, help="half-width of the simulated area")
+    parser.add_argument("--slow-fraction", type=float, default=0, help="share of clients with a slow link")
+    parser.add_argument("--slow-delay", type=float, default=0.05, help="seconds per frame for slow clients")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(run(parse_args())), indent=2))
@@ -1,8 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from models.database import init_db
+from models.database import init_db, SessionLocal, db_executor
 from routes import member1_routes, member2_routes, member3_routes, member4_routes, reporting_routes
+from services.member3_realtime import realtime_service
+from services.accident_index import accident_index
+from services.risk_raster import risk_raster
+from services.fleet_analysis import fleet_service
+from services.road_graph import road_graph, ROAD_GRAPH_PATH
+from services.route_history import route_history
+import os
 import uvicorn
 import logging
 
@@ -39,8 +46,39 @@ async def startup_event():
     """Initialize database on startup"""
     print("🚀 Starting Integrated Accident Analysis System...")
     init_db()
+    db = SessionLocal()
+    try:
+        accident_index.load(db)
+        risk_raster.load(db)
+    finally:
+        db.close()
+    if os.path.exists(ROAD_GRAPH_PATH):
+        road_graph.load(ROAD_GRAPH_PATH)
+        road_graph.set_accidents(accident_index.records.values())
+    else:
+        print(f"ℹ️ No road graph at {ROAD_GRAPH_PATH}; /find-safe-route will analyze the direct route")
+    await realtime_service.start_backplane()
+    realtime_service.start_expiry_scheduler()
+    realtime_service.websocket_manager.start_reaper()
+    route_history.start()
     print("✅ System ready!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks"""
+    await realtime_service.websocket_manager.stop_reaper()
+    await realtime_service.stop_expiry_scheduler()
+    await realtime_service.stop_backplane()
+    await route_history.stop()
+    db = SessionLocal()
+    try:
+        risk_raster.save(db)  # Lets the next start reopen the tiles instead of rebuilding
+    finally:
+        db.close()
+    risk_raster.close()
+    fleet_service.shutdown()
+    db_executor.shutdown()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -69,7 +107,8 @@ async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "service": "integrated-accident-system"
+        "service": "integrated-accident-system",
+        "database": db_executor.get_stats()
     }
 
 if __name__ == "__main__":
@@ -1,14 +1,41 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, Date, DateTime, Boolean, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import asyncio
+import os
 
-DATABASE_URL = "sqlite:///./integrated_accident_system.db"
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./integrated_accident_system.db")
+DB_READER_THREADS = int(os.getenv("DB_READER_THREADS", 4))
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    pool_size=DB_READER_THREADS + 2  # Readers, the writer and startup/maintenance
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Tune every new SQLite connection
+    
+    WAL lets readers run while a write is in progress; synchronous=NORMAL is
+    safe with WAL (a power loss can only drop the last commits). The page
+    cache and memory map are per connection.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')}")
+    cursor.execute(f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_KB', 65536))}")
+    cursor.execute(f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_BYTES', 268435456))}")
+    cursor.execute(f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+event.listen(engine, "connect", apply_sqlite_pragmas)
+
 class AccidentReport(Base):
     """Accident reports submitted by users"""
     __tablename__ = "accident_reports"
@@ -28,6 +55,9 @@ class AccidentReport(Base):
     verified = Column(Boolean, default=False)
     evidence_files = Column(Text)  # JSON string containing list of evidence file paths
     
+    # Bounding-box lookups for route analysis
+    __table_args__ = (Index("ix_accident_reports_lat_lng", "latitude", "longitude"),)
+    
 class RiskPrediction(Base):
     """Risk predictions made by Member 1"""
     __tablename__ = "risk_predictions"
@@ -86,7 +116,25 @@ class RouteAnalysis(Base):
     safety_score = Column(Float)
     total_risk_points = Column(Integer)
     high_risk_zones = Column(Text)  # JSON string
-    analyzed_at = Column(DateTime, default=datetime.utcnow)
+    analyzed_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class RouteStatsDaily(Base):
+    """Per-day totals of route analyses, updated as analyses are written"""
+    __tablename__ = "route_stats_daily"
+    
+    day = Column(Date, primary_key=True)
+    routes_analyzed = Column(Integer, default=0)
+    safety_score_sum = Column(Float, default=0)
+    high_risk_routes = Column(Integer, default=0)
+    high_risk_zones = Column(Integer, default=0)
+
+class RouteRiskFactorDaily(Base):
+    """Per-day count of routes mentioning each risk factor"""
+    __tablename__ = "route_risk_factors_daily"
+    
+    day = Column(Date, primary_key=True)
+    factor = Column(String, primary_key=True)
+    route_count = Column(Integer, default=0)
 
 class TrafficReport(Base):
     """User-submitted traffic reports visible to all users for a limited time"""
@@ -101,15 +149,75 @@ class TrafficReport(Base):
     reported_at = Column(DateTime, default=datetime.utcnow)
     expires_at = Column(DateTime)
 
-def get_db():
-    """Database dependency"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+class DatabaseExecutor:
+    """
+    Runs blocking database work off the event loop
+    
+    `fn(session, *args)` runs on a worker thread with a fresh session, which
+    is closed (after a rollback if fn raised) when it returns. Reads share a
+    small thread pool; writes go through a single writer thread in
+    submission order, so concurrent requests never fight over SQLite's one
+    write lock ("database is locked"). Callers commit their own writes.
+    """
+    
+    def __init__(self, session_factory=None, readers: int = None):
+        self.session_factory = session_factory or SessionLocal
+        self.readers = readers or DB_READER_THREADS
+        self._read_pool = ThreadPoolExecutor(self.readers, thread_name_prefix="db-read")
+        self._write_pool = ThreadPoolExecutor(1, thread_name_prefix="db-write")
+        self.reads = 0
+        self.writes = 0
+        self.pending_writes = 0
+        self.peak_pending_writes = 0
+    
+    async def read(self, fn, *args):
+        """Run a query on a reader thread"""
+        self.reads += 1
+        return await asyncio.get_running_loop().run_in_executor(self._read_pool, self._run, fn, args)
+    
+    async def write(self, fn, *args):
+        """Queue work that modifies the database for the writer thread"""
+        self.writes += 1
+        self.pending_writes += 1
+        self.peak_pending_writes = max(self.peak_pending_writes, self.pending_writes)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._write_pool, self._run, fn, args)
+        finally:
+            self.pending_writes -= 1
+    
+    def shutdown(self):
+        """Wait for queued work, then stop the threads"""
+        self._write_pool.shutdown(wait=True)
+        self._read_pool.shutdown(wait=True)
+    
+    def get_stats(self) -> dict:
+        return {
+            "reader_threads": self.readers,
+            "reads": self.reads,
+            "writes": self.writes,
+            "pending_writes": self.pending_writes,
+            "peak_pending_writes": self.peak_pending_writes
+        }
+    
+    def _run(self, fn, args):
+        db = self.session_factory()
+        try:
+            return fn(db, *args)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+# Global instance
+db_executor = DatabaseExecutor()
 
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
+    
+    # create_all skips indexes on tables that already exist
+    for table in (AccidentReport.__table__, RouteAnalysis.__table__):
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
     print("✅ Database initialized successfully")
\ No newline at end of file
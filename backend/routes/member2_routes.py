@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
-from services.member2_nearmiss import nearmiss_service
+from services.member2_nearmiss import nearmiss_service, HOTSPOT_EPS_KM_RANGE, HOTSPOT_MIN_EVENTS_RANGE
 
 router = APIRouter(prefix="/api/member2", tags=["Near-Miss Detection"])
 
@@ -59,6 +59,38 @@ async def analyze_patterns(request: PatternAnalysisRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@router.get("/hotspots")
+async def get_hotspots(eps_km: float = 0.5, min_events: int = 3):
+    """
+    Discover near-miss hotspots across all recent events
+    
+    Density-based clustering of the event window; results are cached
+    until new events arrive. eps_km is rounded to 0.05 km steps and the
+    values used are returned in data.parameters.
+    """
+    try:
+        if not HOTSPOT_EPS_KM_RANGE[0] <= eps_km <= HOTSPOT_EPS_KM_RANGE[1]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"eps_km must be between {HOTSPOT_EPS_KM_RANGE[0]} and {HOTSPOT_EPS_KM_RANGE[1]}"
+            )
+        if not HOTSPOT_MIN_EVENTS_RANGE[0] <= min_events <= HOTSPOT_MIN_EVENTS_RANGE[1]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"min_events must be between {HOTSPOT_MIN_EVENTS_RANGE[0]} and {HOTSPOT_MIN_EVENTS_RANGE[1]}"
+            )
+        
+        hotspots = nearmiss_service.find_hotspots(eps_km, min_events)
+        
+        return {
+            "success": True,
+            "data": hotspots
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Hotspot detection failed: {str(e)}")
+
 @router.get("/recent-events")
 async def get_recent_events():
     """Get recent near-miss events"""
@@ -24,25 +24,64 @@ async def websocket_endpoint(websocket: WebSocket):
     """
     WebSocket endpoint for real-time updates
     
-    Clients connect here to receive live alerts and updates
+    Clients connect here to receive live alerts and updates. Requesting the
+    "msgpack" subprotocol switches frames to binary MessagePack. A "subscribe"
+    message with bbox/polygon areas and/or event names narrows delivery to
+    matching events.
     """
     await websocket_manager.connect(websocket)
     try:
         while True:
-            data = await websocket.receive_json()
+            data = await websocket_manager.receive_message(websocket)
             
             # Handle different message types
             if data.get("type") == "location_update":
-                websocket_manager.update_user_location(
+                applied = websocket_manager.handle_location_update(
                     websocket,
                     data.get("latitude"),
                     data.get("longitude")
                 )
+                # Acks are opt-in; at 1 Hz GPS they are mostly noise
+                if data.get("ack"):
+                    await websocket_manager.send_personal_message({
+                        "event": "location_updated",
+                        "status": "success" if applied else "throttled"
+                    }, websocket)
+            
+            elif data.get("type") == "subscribe":
+                try:
+                    subscription = websocket_manager.subscribe(
+                        websocket,
+                        data.get("areas"),
+                        data.get("events")
+                    )
+                    await websocket_manager.send_personal_message({
+                        "event": "subscribed",
+                        "data": subscription
+                    }, websocket)
+                except (ValueError, TypeError) as e:
+                    await websocket_manager.send_personal_message({
+                        "event": "error",
+                        "message": f"Invalid subscription: {str(e)}"
+                    }, websocket)
+            
+            elif data.get("type") == "unsubscribe":
+                websocket_manager.unsubscribe(websocket)
                 await websocket_manager.send_personal_message({
-                    "event": "location_updated",
-                    "status": "success"
+                    "event": "unsubscribed"
                 }, websocket)
             
+            elif data.get("type") == "resume":
+                # Clients may include their position so area events replay correctly
+                websocket_manager.update_user_location(
+                    websocket,
+                    data.get("latitude"),
+                    data.get("longitude")
+                )
+                resume_from = data.get("resume_from")
+                if isinstance(resume_from, int) and not isinstance(resume_from, bool):
+                    await realtime_service.resume_client(websocket, resume_from, data.get("log_id"))
+            
             elif data.get("type") == "ping":
                 await websocket_manager.send_personal_message({
                     "event": "pong",
@@ -127,4 +166,20 @@ async def dismiss_alert(alert_id: int):
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to dismiss alert: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to dismiss alert: {str(e)}")
+
+@router.get("/stats")
+async def get_realtime_stats():
+    """Get websocket connection and delivery statistics"""
+    try:
+        return {
+            "success": True,
+            "data": {
+                **websocket_manager.get_stats(),
+                "active_alerts": len(realtime_service.alert_store),
+                "merged_reports": realtime_service.merged_reports,
+                "backplane": realtime_service.backplane.get_stats()
+            }
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch stats: {str(e)}")
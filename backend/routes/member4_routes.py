@@ -1,12 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+import asyncio
+import json
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_
 from services.member4_route import route_service
-from models.database import get_db, AccidentReport
+from services.accident_index import accident_index
+from services.risk_raster import risk_raster
+from services.road_graph import road_graph
+from services.route_cache import route_cache
+from services.report_sync import report_sync
+from services.route_history import route_history
+from services.fleet_analysis import fleet_service
+from utils.polyline import decode_polyline, encode_polyline
+from models.database import db_executor, AccidentReport
 
 router = APIRouter(prefix="/api/member4", tags=["Route Safety Analysis"])
 
+# Accident fields included in route analysis results
+ANALYSIS_COLUMNS = ["latitude", "longitude", "severity", "weather", "road_condition", "speed"]
+MAX_VIA_POINTS = 10  # Road-graph searches run one A* leg per stop
+
 class Location(BaseModel):
     latitude: float
     longitude: float
@@ -16,14 +31,120 @@ class Waypoint(BaseModel):
     longitude: float
 
 class RouteAnalysisRequest(BaseModel):
-    origin: Location
-    destination: Location
+    origin: Optional[Location] = None
+    destination: Optional[Location] = None
     waypoints: Optional[List[Waypoint]] = []
+    polyline: Optional[str] = None  # Encoded polyline instead of origin/waypoints/destination
+    polyline_precision: int = Field(5, ge=1, le=7)
+    geometry: Optional[str] = None  # "points" or "polyline"; defaults to the input format
     distance_km: Optional[float] = None
     duration_minutes: Optional[float] = None
 
+class RiskProfileRequest(RouteAnalysisRequest):
+    spacing_km: float = 1.0
+
+class DepartureSweepRequest(RouteAnalysisRequest):
+    slot_minutes: int = 60  # 15, 30 or 60
+
+class FleetRouteRequest(BaseModel):
+    routes: List[RouteAnalysisRequest]
+
+class SafeRouteRequest(RouteAnalysisRequest):
+    safety_weight: float = 0.2  # km of detour accepted per unit of accident risk avoided
+    alternatives: int = 3
+
+def build_route_data(request: RouteAnalysisRequest) -> dict:
+    """
+    Route dict from a request given as points or as an encoded polyline
+    
+    Raises:
+        HTTPException(400): If neither form is complete or the polyline is invalid
+    """
+    if request.polyline:
+        try:
+            points = decode_polyline(request.polyline, request.polyline_precision)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid polyline: {str(e)}")
+        if len(points) < 2:
+            raise HTTPException(status_code=400, detail="Polyline needs at least 2 points")
+        origin, waypoints, destination = points[0], points[1:-1], points[-1]
+    elif request.origin is not None and request.destination is not None:
+        origin, destination = request.origin.dict(), request.destination.dict()
+        waypoints = [w.dict() for w in request.waypoints or []]
+    else:
+        raise HTTPException(status_code=400, detail="Give origin and destination, or a polyline")
+    
+    return {
+        "origin": origin,
+        "destination": destination,
+        "waypoints": waypoints,
+        "distance_km": request.distance_km or 0,
+        "duration_minutes": request.duration_minutes or 0
+    }
+
+def wants_polyline(request: RouteAnalysisRequest) -> bool:
+    return request.geometry == "polyline" or (request.geometry is None and bool(request.polyline))
+
+def with_polyline_geometry(route_data: dict, analysis: dict, precision: int = 5) -> dict:
+    """
+    Copy of an analysis with the route as one encoded polyline
+    
+    Segments reference vertex indices (start_index/end_index) instead of
+    repeating start/end coordinates. The input is not modified, since it
+    may be shared through the route cache.
+    """
+    points = [route_data['origin'], *route_data['waypoints'], route_data['destination']]
+    compact = dict(analysis)
+    compact["geometry"] = {
+        "polyline": encode_polyline(points, precision),
+        "precision": precision,
+        "vertices": len(points)
+    }
+    compact["segment_analysis"] = [
+        {"start_index": i, "end_index": i + 1,
+         **{k: v for k, v in segment.items() if k not in ("start", "end")}}
+        for i, segment in enumerate(analysis["segment_analysis"])
+    ]
+    return compact
+
+async def load_route_accidents(route_data: dict, columns: List[str]) -> List[dict]:
+    """
+    Fetch only the accidents near a route, as plain dicts
+    
+    Answered from the in-memory accident index once it is built; otherwise
+    filters on the route's padded bounding boxes in SQL (served by the
+    lat/lng index) on a database reader thread and selects just the
+    requested columns.
+    """
+    boxes = route_service.get_query_boxes(route_data)
+    if accident_index.loaded:
+        return accident_index.query_boxes(boxes, columns)
+    return await db_executor.read(_query_route_accidents, boxes, columns)
+
+async def analyze_near_accidents(route_data: dict) -> dict:
+    """
+    Analyze a route against the accidents near it
+    
+    Queries the in-memory accident index per segment corridor once it is
+    built; otherwise loads the route's accidents from the database first.
+    """
+    if accident_index.loaded:
+        return await route_service.analyze_route(route_data, index=accident_index, columns=ANALYSIS_COLUMNS)
+    historical_data = await load_route_accidents(route_data, ANALYSIS_COLUMNS)
+    return await route_service.analyze_route(route_data, historical_data)
+
+def _query_route_accidents(db, boxes: List[tuple], columns: List[str]) -> List[dict]:
+    query = db.query(*(getattr(AccidentReport, c) for c in columns)).filter(or_(*(
+        and_(
+            AccidentReport.latitude.between(min_lat, max_lat),
+            AccidentReport.longitude.between(min_lng, max_lng)
+        )
+        for min_lat, min_lng, max_lat, max_lng in boxes
+    )))
+    return [dict(zip(columns, row)) for row in query]
+
 @router.post("/analyze-route")
-async def analyze_route(request: RouteAnalysisRequest, db: Session = Depends(get_db)):
+async def analyze_route(request: RouteAnalysisRequest):
     """
     Analyze safety of a route
     
@@ -31,91 +152,228 @@ async def analyze_route(request: RouteAnalysisRequest, db: Session = Depends(get
     """
     try:
         # Convert request to dict
-        route_data = {
-            "origin": request.origin.dict(),
-            "destination": request.destination.dict(),
-            "waypoints": [w.dict() for w in request.waypoints],
-            "distance_km": request.distance_km or 0,
-            "duration_minutes": request.duration_minutes or 0
-        }
+        route_data = build_route_data(request)
         
-        # Get historical accident data from database
-        accidents = db.query(AccidentReport).all()
-        historical_data = [
-            {
-                "latitude": acc.latitude,
-                "longitude": acc.longitude,
-                "severity": acc.severity,
-                "weather": acc.weather,
-                "road_condition": acc.road_condition,
-                "speed": acc.speed
-            }
-            for acc in accidents
-        ]
+        async def compute():
+            # Runs as a shared task that can outlive this request, so it opens
+            # its own database session (via db_executor) rather than using a
+            # request-scoped one
+            return await analyze_near_accidents(route_data)
         
-        # Analyze route
-        analysis = await route_service.analyze_route(route_data, historical_data)
+        # Identical routes share one analysis until accident data changes
+        analysis = await route_cache.get_or_compute(route_cache.key_for(route_data), compute)
+        # Every request counts in the history, including cache hits
+        route_history.record(route_data, analysis)
+        if wants_polyline(request):
+            analysis = with_polyline_geometry(route_data, analysis, request.polyline_precision)
         
         return {
             "success": True,
             "data": analysis
         }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Route analysis failed: {str(e)}")
+
+@router.post("/analyze-routes")
+async def analyze_routes(request: FleetRouteRequest):
+    """
+    Analyze a batch of routes in parallel
+    
+    Looks up the accidents near each route once, analyzes the routes on the
+    shared process pool and streams one NDJSON line per route as it finishes:
+    {"index": i, "success": true, "data": {...}} or
+    {"index": i, "success": false, "error": "..."}
+    """
+    if not request.routes:
+        raise HTTPException(status_code=400, detail="No routes given")
+    if len(request.routes) > fleet_service.max_routes:
+        raise HTTPException(status_code=400, detail=f"At most {fleet_service.max_routes} routes per batch")
+    
+    routes = [build_route_data(r) for r in request.routes]
+    try:
+        accidents = await fleet_service.load_accidents(routes)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Route analysis failed: {str(e)}")
+    
+    async def stream():
+        async for index, analysis, error in fleet_service.analyze_stream(routes, accidents):
+            if error is not None:
+                yield json.dumps({"index": index, "success": False, "error": error}) + "\n"
+                continue
+            route_history.record(routes[index], analysis)
+            route_request = request.routes[index]
+            if wants_polyline(route_request):
+                analysis = with_polyline_geometry(routes[index], analysis, route_request.polyline_precision)
+            yield json.dumps({"index": index, "success": True, "data": analysis}) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 @router.post("/find-safe-route")
-async def find_safe_route(request: RouteAnalysisRequest, db: Session = Depends(get_db)):
+async def find_safe_route(request: SafeRouteRequest):
     """
     Find the safest route between two points
     
-    Considers historical accident data and current conditions
+    Searches the local road graph (when one is loaded) for routes that trade
+    distance against accident risk, then analyzes the best one. Waypoints in
+    the request are visited in order (at most MAX_VIA_POINTS); a polyline is
+    thinned to that many via points first. Without a road graph, the route
+    through the given points is analyzed as is.
     """
     try:
-        # This would integrate with a routing service (Google Maps, OSRM, etc.)
-        # For now, we analyze the direct route
-        
-        route_data = {
-            "origin": request.origin.dict(),
-            "destination": request.destination.dict(),
-            "waypoints": [w.dict() for w in request.waypoints],
-            "distance_km": request.distance_km or 0,
-            "duration_minutes": request.duration_minutes or 0
-        }
+        route_data = build_route_data(request)
         
-        accidents = db.query(AccidentReport).all()
-        historical_data = [
-            {
-                "latitude": acc.latitude,
-                "longitude": acc.longitude,
-                "severity": acc.severity,
-                "weather": acc.weather,
-                "road_condition": acc.road_condition
-            }
-            for acc in accidents
-        ]
+        alternatives = []
+        if road_graph.loaded:
+            via = route_data["waypoints"]
+            if len(via) > MAX_VIA_POINTS:
+                if not request.polyline:
+                    raise HTTPException(status_code=400, detail=f"At most {MAX_VIA_POINTS} waypoints are supported")
+                via = route_service.simplify_path(
+                    [route_data["origin"], *via, route_data["destination"]], max_points=MAX_VIA_POINTS
+                )
+            # A* is pure Python; keep it off the event loop
+            routes = await asyncio.to_thread(
+                road_graph.find_routes,
+                route_data["origin"],
+                route_data["destination"],
+                safety_weight=request.safety_weight,
+                alternatives=max(1, min(request.alternatives, 5)),
+                via=via
+            )
+            if routes:
+                best = routes[0]
+                route_data["waypoints"] = route_service.simplify_path(best["path"])
+                route_data["distance_km"] = best["distance_km"]
+                alternatives = routes
         
-        analysis = await route_service.analyze_route(route_data, historical_data)
+        analysis = await analyze_near_accidents(route_data)
+        route_history.record(route_data, analysis)
+        if wants_polyline(request):
+            analysis = with_polyline_geometry(route_data, analysis, request.polyline_precision)
+            alternatives = [
+                {"polyline": encode_polyline(r["path"], request.polyline_precision),
+                 **{k: v for k, v in r.items() if k != "path"}}
+                for r in alternatives
+            ]
         
         return {
             "success": True,
             "data": {
                 "recommended_route": analysis,
-                "message": "Route optimized for safety"
+                "alternatives": alternatives,
+                "message": "Route optimized for safety" if alternatives else "Direct route analyzed (no road graph loaded)"
             }
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to find safe route: {str(e)}")
 
+@router.post("/risk-profile")
+async def risk_profile(request: RiskProfileRequest):
+    """
+    Risk profile along a route
+    
+    One risk score (0-100) and accident count per spacing_km interval
+    (default 1 km, 0.1-10), plus the stretches that are high risk. Much
+    smaller than /analyze-route, and long segments are not averaged out.
+    """
+    try:
+        route_data = build_route_data(request)
+        
+        historical_data = await load_route_accidents(route_data, ["latitude", "longitude", "severity"])
+        
+        # NumPy scoring over every interval; keep it off the event loop
+        profile = await asyncio.to_thread(
+            route_service.risk_profile,
+            route_data, historical_data, spacing_km=min(max(request.spacing_km, 0.1), 10)
+        )
+        
+        return {
+            "success": True,
+            "data": profile
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Risk profile failed: {str(e)}")
+
+@router.post("/departure-times")
+async def departure_times(request: DepartureSweepRequest):
+    """
+    When to leave: route risk for every departure over the next 24 hours
+    
+    Returns the risk curve per departure slot (UTC) and the best
+    departure windows, in one call.
+    """
+    try:
+        route_data = build_route_data(request)
+        slot_minutes = request.slot_minutes if request.slot_minutes in (15, 30, 60) else 60
+        
+        historical_data = await load_route_accidents(route_data, ["latitude", "longitude", "severity", "time_of_day"])
+        
+        # Scores every slot x interval in NumPy; keep it off the event loop
+        sweep = await asyncio.to_thread(
+            route_service.departure_sweep, route_data, historical_data, slot_minutes=slot_minutes
+        )
+        
+        return {
+            "success": True,
+            "data": sweep
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Departure time analysis failed: {str(e)}")
+
+@router.post("/score-route")
+async def score_route(request: RouteAnalysisRequest):
+    """
+    Quick per-segment risk scores for a route
+    
+    Answered from the precomputed risk raster, so it stays fast regardless
+    of how many accidents are on record. Use /analyze-route for incident
+    details, hotspots and recommendations.
+    """
+    try:
+        if not risk_raster.loaded:
+            raise HTTPException(status_code=503, detail="Risk raster is not built yet")
+        
+        route_data = build_route_data(request)
+        scores = route_service.score_route(route_data)
+        if wants_polyline(request):
+            scores = with_polyline_geometry(route_data, scores, request.polyline_precision)
+        
+        return {
+            "success": True,
+            "data": scores
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Route scoring failed: {str(e)}")
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """Route analysis cache hit ratio and size"""
+    return {
+        "success": True,
+        "data": {**route_cache.get_stats(), "report_sync": report_sync.get_stats()}
+    }
+
 @router.get("/statistics")
-async def get_statistics():
-    """Get route analysis statistics"""
+async def get_statistics(days: int = 30):
+    """Get route analysis statistics for the last `days` days"""
     try:
         from datetime import datetime, timedelta
         
         end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=30)
+        start_date = end_date - timedelta(days=max(1, days) - 1)
         
-        stats = route_service.get_route_statistics(start_date, end_date)
+        stats = await db_executor.read(route_service.get_route_statistics, start_date, end_date)
+        stats["pending_writes"] = route_history.get_stats()["queued"]
         
         return {
             "success": True,
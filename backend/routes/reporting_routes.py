@@ -1,10 +1,10 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File
 from pydantic import BaseModel
-from typing import Optional, List
-from sqlalchemy.orm import Session
+from typing import Awaitable, Optional, List
 from datetime import datetime
-from models.database import get_db, AccidentReport
+from models.database import db_executor, AccidentReport
 from services.member3_realtime import realtime_service
+from services.report_sync import report_sync
 from models.database import TrafficReport
 from sqlalchemy import and_
 from datetime import timedelta
@@ -40,8 +40,25 @@ class TrafficReportCreate(BaseModel):
     description: Optional[str] = None
 
 
+def get_report(db, report_id: int) -> Optional[AccidentReport]:
+    return db.query(AccidentReport).filter(AccidentReport.id == report_id).first()
+
+
+async def after_commit(what: str, action: Awaitable):
+    """
+    Run a follow-up of a committed change, logging failures
+    
+    The row is already saved, so a failing cache update or broadcast must
+    not turn the response into an error.
+    """
+    try:
+        await action
+    except Exception as e:
+        print(f"⚠️ {what} failed after the change was saved: {e!r}")
+
+
 @router.post("/")
-async def create_accident_report(report: AccidentReportCreate, db: Session = Depends(get_db)):
+async def create_accident_report(report: AccidentReportCreate):
     """
     Submit a new accident report
     
@@ -78,9 +95,14 @@ async def create_accident_report(report: AccidentReportCreate, db: Session = Dep
             verified=False
         )
         
-        db.add(db_report)
-        db.commit()
-        db.refresh(db_report)
+        def save(db):
+            db.add(db_report)
+            db.commit()
+            db.refresh(db_report)
+        
+        await db_executor.write(save)
+        # Index, raster, graph and cache on every worker
+        await after_commit("Syncing new report", report_sync.report_created(db_report))
         
         # Convert to dict for broadcasting
         report_dict = {
@@ -97,11 +119,11 @@ async def create_accident_report(report: AccidentReportCreate, db: Session = Dep
         }
         
         # Broadcast to connected clients
-        await realtime_service.broadcast_accident_report(report_dict)
+        await after_commit("Broadcasting report", realtime_service.broadcast_accident_report(report_dict))
         
         # Create alert for the accident
         severity_map = {"Minor": "medium", "Major": "high", "Fatal": "critical"}
-        await realtime_service.create_alert({
+        await after_commit("Creating accident alert", realtime_service.create_alert({
             "type": "accident",
             "severity": severity_map.get(report.severity, "medium"),
             "latitude": report.latitude,
@@ -109,7 +131,7 @@ async def create_accident_report(report: AccidentReportCreate, db: Session = Dep
             "message": f"{report.severity} accident reported",
             "radius_km": 5,
             "duration_minutes": 120
-        })
+        }))
         
         return {
             "success": True,
@@ -117,12 +139,11 @@ async def create_accident_report(report: AccidentReportCreate, db: Session = Dep
             "message": "Accident report submitted successfully"
         }
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to create report: {str(e)}")
 
 
 @router.post('/traffic')
-async def create_traffic_report(report: TrafficReportCreate, db: Session = Depends(get_db)):
+async def create_traffic_report(report: TrafficReportCreate):
     """Create a traffic report visible to all users for 2 hours"""
     try:
         now = datetime.utcnow()
@@ -137,12 +158,15 @@ async def create_traffic_report(report: TrafficReportCreate, db: Session = Depen
             reported_at=now,
             expires_at=expires_at
         )
-        db.add(db_report)
-        db.commit()
-        db.refresh(db_report)
+        def save(db):
+            db.add(db_report)
+            db.commit()
+            db.refresh(db_report)
+
+        await db_executor.write(save)
 
         # Broadcast traffic alert to clients
-        await realtime_service.create_alert({
+        await after_commit("Creating traffic alert", realtime_service.create_alert({
             'type': 'traffic',
             'severity': 'high' if report.severity == 'heavy' else 'medium',
             'latitude': report.latitude,
@@ -150,20 +174,21 @@ async def create_traffic_report(report: TrafficReportCreate, db: Session = Depen
             'message': f"Traffic reported on {report.road}",
             'radius_km': 5,
             'duration_minutes': 120
-        })
+        }))
 
         return { 'success': True, 'data': { 'id': db_report.id }, 'message': 'Traffic report created' }
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to create traffic report: {str(e)}")
 
 
 @router.get('/traffic')
-async def get_active_traffic_reports(db: Session = Depends(get_db)):
+async def get_active_traffic_reports():
     """Return active traffic reports (not expired)"""
     try:
         now = datetime.utcnow()
-        reports = db.query(TrafficReport).filter(TrafficReport.expires_at > now).all()
+        reports = await db_executor.read(
+            lambda db: db.query(TrafficReport).filter(TrafficReport.expires_at > now).all()
+        )
         return {
             'success': True,
             'data': {
@@ -190,20 +215,22 @@ async def get_active_traffic_reports(db: Session = Depends(get_db)):
 async def get_accident_reports(
     limit: int = 100,
     severity: Optional[str] = None,
-    verified: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    verified: Optional[bool] = None
 ):
     """Get accident reports with optional filters"""
     try:
-        query = db.query(AccidentReport)
-        
-        if severity:
-            query = query.filter(AccidentReport.severity == severity)
-        
-        if verified is not None:
-            query = query.filter(AccidentReport.verified == verified)
-        
-        reports = query.order_by(AccidentReport.reported_at.desc()).limit(limit).all()
+        def fetch(db):
+            query = db.query(AccidentReport)
+            
+            if severity:
+                query = query.filter(AccidentReport.severity == severity)
+            
+            if verified is not None:
+                query = query.filter(AccidentReport.verified == verified)
+            
+            return query.order_by(AccidentReport.reported_at.desc()).limit(limit).all()
+        
+        reports = await db_executor.read(fetch)
         
         return {
             "success": True,
@@ -234,10 +261,10 @@ async def get_accident_reports(
         raise HTTPException(status_code=500, detail=f"Failed to fetch reports: {str(e)}")
 
 @router.get("/{report_id}")
-async def get_accident_report(report_id: int, db: Session = Depends(get_db)):
+async def get_accident_report(report_id: int):
     """Get a specific accident report"""
     try:
-        report = db.query(AccidentReport).filter(AccidentReport.id == report_id).first()
+        report = await db_executor.read(get_report, report_id)
         
         if not report:
             raise HTTPException(status_code=404, detail="Report not found")
@@ -269,24 +296,33 @@ async def get_accident_report(report_id: int, db: Session = Depends(get_db)):
 @router.patch("/{report_id}")
 async def update_accident_report(
     report_id: int,
-    update: AccidentReportUpdate,
-    db: Session = Depends(get_db)
+    update: AccidentReportUpdate
 ):
     """Update an accident report (e.g., verify it)"""
     try:
-        report = db.query(AccidentReport).filter(AccidentReport.id == report_id).first()
+        def apply(db):
+            report = get_report(db, report_id)
+            if not report:
+                return None, False
+            
+            verification_changed = update.verified is not None and update.verified != report.verified
+            if update.verified is not None:
+                report.verified = update.verified
+            
+            if update.description is not None:
+                report.description = update.description
+            
+            db.commit()
+            db.refresh(report)
+            return report, verification_changed
+        
+        report, verification_changed = await db_executor.write(apply)
         
         if not report:
             raise HTTPException(status_code=404, detail="Report not found")
         
-        if update.verified is not None:
-            report.verified = update.verified
-        
-        if update.description is not None:
-            report.description = update.description
-        
-        db.commit()
-        db.refresh(report)
+        if verification_changed:
+            await after_commit("Syncing report update", report_sync.report_changed(report_id))
         
         return {
             "success": True,
@@ -301,33 +337,41 @@ async def update_accident_report(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to update report: {str(e)}")
 
 @router.delete("/{report_id}")
-async def delete_accident_report(report_id: int, db: Session = Depends(get_db)):
+async def delete_accident_report(report_id: int):
     """Delete an accident report and associated media files"""
     try:
-        report = db.query(AccidentReport).filter(AccidentReport.id == report_id).first()
-        
-        if not report:
+        def remove(db):
+            report = get_report(db, report_id)
+            if not report:
+                return None
+            
+            # Delete associated media files
+            if report.evidence_files:
+                try:
+                    evidence_list = json.loads(report.evidence_files)
+                    for evidence in evidence_list:
+                        filename = evidence.get("filename")
+                        if filename:
+                            file_path = Path(__file__).parent.parent / "media" / "evidence" / filename
+                            if file_path.exists():
+                                file_path.unlink()
+                except json.JSONDecodeError:
+                    pass  # If JSON is invalid, just skip file deletion
+            
+            location = (report.latitude, report.longitude, report.severity)
+            db.delete(report)
+            db.commit()
+            return location
+        
+        location = await db_executor.write(remove)
+        
+        if location is None:
             raise HTTPException(status_code=404, detail="Report not found")
         
-        # Delete associated media files
-        if report.evidence_files:
-            try:
-                evidence_list = json.loads(report.evidence_files)
-                for evidence in evidence_list:
-                    filename = evidence.get("filename")
-                    if filename:
-                        file_path = Path(__file__).parent.parent / "media" / "evidence" / filename
-                        if file_path.exists():
-                            file_path.unlink()
-            except json.JSONDecodeError:
-                pass  # If JSON is invalid, just skip file deletion
-        
-        db.delete(report)
-        db.commit()
+        await after_commit("Syncing report deletion", report_sync.report_deleted(report_id, location))
         
         return {
             "success": True,
@@ -336,7 +380,6 @@ async def delete_accident_report(report_id: int, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to delete report: {str(e)}")
 
 
@@ -349,13 +392,12 @@ MEDIA_DIR.mkdir(parents=True, exist_ok=True)
 @router.post("/{report_id}/upload-media")
 async def upload_media(
     report_id: int,
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    file: UploadFile = File(...)
 ):
     """Upload evidence/media file for a report"""
     try:
         # Get the report
-        report = db.query(AccidentReport).filter(AccidentReport.id == report_id).first()
+        report = await db_executor.read(get_report, report_id)
         
         if not report:
             raise HTTPException(status_code=404, detail="Report not found")
@@ -376,25 +418,34 @@ async def upload_media(
         with open(file_path, 'wb') as f:
             f.write(content)
         
-        # Update report with evidence file path
-        evidence_files = []
-        if report.evidence_files:
-            try:
-                evidence_files = json.loads(report.evidence_files)
-            except:
-                evidence_files = []
-        
-        evidence_files.append({
-            'filename': unique_name,
-            'original_name': file.filename,
-            'uploaded_at': datetime.utcnow().isoformat(),
-            'file_type': file_ext,
-            'url': f"/api/reports/{report_id}/media/{unique_name}"
-        })
-        
-        report.evidence_files = json.dumps(evidence_files)
-        db.commit()
-        db.refresh(report)
+        # Update report with evidence file path (re-read on the writer so
+        # concurrent uploads to one report don't overwrite each other)
+        def attach(db) -> bool:
+            report = get_report(db, report_id)
+            if report is None:
+                return False  # Deleted since the check above
+            evidence_files = []
+            if report.evidence_files:
+                try:
+                    evidence_files = json.loads(report.evidence_files)
+                except:
+                    evidence_files = []
+            
+            evidence_files.append({
+                'filename': unique_name,
+                'original_name': file.filename,
+                'uploaded_at': datetime.utcnow().isoformat(),
+                'file_type': file_ext,
+                'url': f"/api/reports/{report_id}/media/{unique_name}"
+            })
+            
+            report.evidence_files = json.dumps(evidence_files)
+            db.commit()
+            return True
+        
+        if not await db_executor.write(attach):
+            file_path.unlink(missing_ok=True)
+            raise HTTPException(status_code=404, detail="Report not found")
         
         return {
             "success": True,
@@ -408,7 +459,6 @@ async def upload_media(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to upload media: {str(e)}")
 
 
@@ -434,10 +484,10 @@ async def get_media(report_id: int, filename: str):
 
 
 @router.get("/{report_id}/evidence")
-async def get_evidence(report_id: int, db: Session = Depends(get_db)):
+async def get_evidence(report_id: int):
     """Get all evidence files for a report"""
     try:
-        report = db.query(AccidentReport).filter(AccidentReport.id == report_id).first()
+        report = await db_executor.read(get_report, report_id)
         
         if not report:
             raise HTTPException(status_code=404, detail="Report not found")
@@ -0,0 +1,118 @@
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models.database import AccidentReport
+from utils.spatial_index import GridIndex
+
+# Columns route analysis reads from each report
+INDEXED_COLUMNS = ("latitude", "longitude", "severity", "weather", "road_condition", "speed", "time_of_day")
+
+
+class AccidentIndex:
+    """
+    Process-wide spatial index of accident reports
+
+    Built once from `accident_reports` at startup and kept current by the
+    reporting routes, so route analysis can fetch nearby accidents without
+    touching the database. Records are stored as tuples of INDEXED_COLUMNS
+    and only turned into dicts for query results.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.01):
+        self.grid = GridIndex(cell_size_deg)  # ~1.1 km cells
+        self.records: Dict[int, tuple] = {}
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def load(self, db: Session, batch_size: int = 50000):
+        """(Re)build the index from the database"""
+        self.grid.clear()
+        self.records.clear()
+        columns = [AccidentReport.id] + [getattr(AccidentReport, c) for c in INDEXED_COLUMNS]
+        for row in db.query(*columns).yield_per(batch_size):
+            self._insert(row[0], tuple(row[1:]))
+        self.loaded = True
+        print(f"🗺️ Accident index built with {len(self.records)} reports")
+
+    def add(self, report: AccidentReport):
+        """Index a newly created report"""
+        if report.latitude is None or report.longitude is None:
+            return
+        self._insert(report.id, tuple(getattr(report, c) for c in INDEXED_COLUMNS))
+
+    def add_record(self, report_id: int, record: tuple):
+        """Index a report given as a tuple of INDEXED_COLUMNS"""
+        if record[0] is None or record[1] is None:
+            return
+        self._insert(report_id, tuple(record))
+
+    def remove(self, report_id: int):
+        """Drop a deleted report"""
+        if self.records.pop(report_id, None) is not None:
+            self.grid.remove(report_id)
+
+    def query_boxes(self, boxes: List[Tuple[float, float, float, float]],
+                    columns: Optional[List[str]] = None) -> List[dict]:
+        """
+        Accidents inside any of several bounding boxes
+
+        Args:
+            boxes: List of (min_lat, min_lng, max_lat, max_lng)
+            columns: Subset of INDEXED_COLUMNS to return; defaults to all
+
+        Returns:
+            List of accident dicts, each report at most once, in id order
+        """
+        return [self.as_dict(record, columns) for _, record in self.query_records(boxes)]
+
+    def query_records(self, boxes: List[Tuple[float, float, float, float]],
+                      whole_cells: bool = False) -> List[Tuple[int, tuple]]:
+        """
+        Raw (id, record) pairs inside any of the boxes, in id order
+
+        With whole_cells, every report in a cell the boxes touch is
+        returned; much faster for many overlapping boxes, when the caller
+        filters per box afterwards.
+        """
+        if whole_cells:
+            ids = self.grid.query_cells(boxes)
+        else:
+            ids = set()
+            for box in boxes:
+                ids.update(self.grid.query_bbox(*box))
+        return [(i, self.records[i]) for i in sorted(ids)]
+
+    def query_radius(self, latitude: float, longitude: float, radius_km: float,
+                     columns: Optional[List[str]] = None) -> List[dict]:
+        """Accidents within a radius of a point"""
+        return [
+            self.as_dict(self.records[i], columns)
+            for i, _ in sorted(self.grid.query_radius(latitude, longitude, radius_km))
+        ]
+
+    def get_stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "reports": len(self.records),
+            "occupied_cells": len(self.grid.cells),
+            "cell_size_deg": self.grid.cell_size
+        }
+
+    def _insert(self, report_id: int, record: tuple):
+        self.records[report_id] = record
+        self.grid.insert(report_id, record[0], record[1])
+
+    @staticmethod
+    def as_dict(record: tuple, columns: Optional[List[str]] = None) -> dict:
+        """A record as a dict of columns (all INDEXED_COLUMNS by default)"""
+        row = dict(zip(INDEXED_COLUMNS, record))
+        if columns is None:
+            return row
+        return {c: row[c] for c in columns}
+
+
+# Global instance
+accident_index = AccidentIndex()
@@ -0,0 +1,302 @@
+import asyncio
+import json
+import os
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+Handler = Callable[[dict], Awaitable[None]]
+SlotProbe = Callable[[], int]
+MAX_WORKER_SLOT = 0xFFFF  # Alert ids keep the slot in their low 16 bits
+
+
+class InMemoryBackplane:
+    """
+    Backplane for a single process
+
+    Everything is already delivered locally, so publishing is a no-op.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex
+        self.worker_slot = 0  # Alert ids stay 1, 2, 3, ... in a single process
+        self.published = 0
+        self.received = 0
+
+    async def start(self, handler: Handler, highest_slot: Optional[SlotProbe] = None):
+        self.handler = handler
+
+    async def publish(self, message: dict):
+        self.published += 1
+
+    async def stop(self):
+        pass
+
+    def get_stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "worker_id": self.worker_id,
+            "published": self.published,
+            "received": self.received
+        }
+
+
+class UnixSocketBackplane(InMemoryBackplane):
+    """
+    Relays messages between worker processes on one machine
+
+    The first worker to bind the Unix domain socket hosts a tiny broker that
+    forwards every newline-delimited JSON message to all other connected
+    workers. Every worker, including the host, connects as a client. If the
+    host dies, the remaining workers race to take over the socket.
+
+    On connecting, a worker registers and the broker hands it a slot (alert
+    ids embed it). A slot belongs to the worker it was first given to and is
+    never handed to another one, so a restarted worker, whose id counter
+    starts again at 1, cannot repeat the ids of a dead worker's alerts that
+    are still replicated. Workers ask for their previous slot back after a
+    reconnect so their ids stay stable, and report the highest slot seen in
+    their alert ids so a broker taking over from a dead one starts above it.
+    """
+
+    name = "unix"
+
+    def __init__(self, socket_path: str, reconnect_delay: float = 0.5):
+        super().__init__()
+        self.socket_path = socket_path
+        self.reconnect_delay = reconnect_delay
+        self.worker_slot = 0  # Assigned by the broker on registration
+        self.is_broker = False
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._broker_clients: Set[asyncio.StreamWriter] = set()
+        self._broker_slots: Dict[asyncio.StreamWriter, int] = {}
+        self._slot_owners: Dict[int, str] = {}  # Every slot handed out -> worker id
+        self._next_slot = 1
+        self._highest_slot: Optional[SlotProbe] = None
+        self._broker_tasks: Set[asyncio.Task] = set()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, handler: Handler, highest_slot: Optional[SlotProbe] = None):
+        """
+        Connect, hosting the broker if nobody does
+
+        Args:
+            handler: Called with each message published by another worker
+            highest_slot: Returns the highest worker slot in alert ids this
+                worker holds; slots up to it are never handed out again
+        """
+        self.handler = handler
+        self._highest_slot = highest_slot
+        self._task = asyncio.create_task(self._run())
+        try:
+            async with asyncio.timeout(5):
+                await self._connected.wait()
+        except TimeoutError:
+            print(f"⚠️ Backplane not connected yet at {self.socket_path}")
+
+    async def publish(self, message: dict):
+        """Send a message to every other worker"""
+        if self._writer is None:
+            return  # Disconnected; local delivery already happened
+        line = json.dumps({"origin": self.worker_id, "message": message},
+                          separators=(",", ":")).encode() + b"\n"
+        try:
+            self._writer.write(line)
+            await self._writer.drain()
+            self.published += 1
+        except (ConnectionError, RuntimeError) as e:
+            print(f"Backplane publish failed: {e}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._writer is not None:
+            self._writer.close()
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._broker_clients):
+                writer.close()
+            # Let client handlers see EOF and exit rather than being cancelled
+            if self._broker_tasks:
+                await asyncio.wait(self._broker_tasks, timeout=1)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def get_stats(self) -> dict:
+        stats = super().get_stats()
+        stats.update({
+            "socket_path": self.socket_path,
+            "is_broker": self.is_broker,
+            "connected": self._writer is not None,
+            "worker_slot": self.worker_slot,
+            "broker_clients": len(self._broker_clients)
+        })
+        return stats
+
+    async def _run(self):
+        """Connect to the broker (hosting it if nobody does) and read forever"""
+        while True:
+            if self._server is None:
+                await self._try_host_broker()
+            try:
+                reader, writer = await asyncio.open_unix_connection(
+                    self.socket_path, limit=2 ** 22
+                )
+            except (FileNotFoundError, ConnectionRefusedError):
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            try:
+                await self._register(reader, writer)
+            except (ConnectionError, TimeoutError, ValueError, KeyError) as e:
+                print(f"Backplane registration failed: {e!r}")
+                writer.close()
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            self._writer = writer
+            self._connected.set()
+            try:
+                await self._read_loop(reader)
+            finally:
+                self._writer = None
+                self._connected.clear()
+                writer.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _register(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Announce this worker to the broker and take the slot it assigns"""
+        request = {
+            "register": self.worker_id,
+            "slot": self.worker_slot or None,
+            "highest_slot": self._highest_slot() if self._highest_slot else 0
+        }
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        async with asyncio.timeout(5):
+            line = await reader.readline()
+        if not line:
+            raise ConnectionError("broker closed the connection")
+        self.worker_slot = int(json.loads(line)["slot"])
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            try:
+                envelope = json.loads(line)
+            except ValueError:
+                continue
+            if envelope.get("origin") == self.worker_id:
+                continue
+            self.received += 1
+            try:
+                await self.handler(envelope["message"])
+            except Exception as e:
+                print(f"Backplane handler error: {e}")
+
+    async def _try_host_broker(self):
+        """Become the broker unless a live one already owns the socket"""
+        if os.path.exists(self.socket_path):
+            try:
+                _, writer = await asyncio.open_unix_connection(self.socket_path)
+                writer.close()
+                return  # A broker is alive
+            except (ConnectionRefusedError, FileNotFoundError):
+                try:
+                    os.unlink(self.socket_path)  # Stale socket from a dead broker
+                except FileNotFoundError:
+                    pass
+        try:
+            self._server = await asyncio.start_unix_server(
+                self._serve_client, path=self.socket_path, limit=2 ** 22
+            )
+            self.is_broker = True
+            print(f"📡 Backplane broker listening on {self.socket_path}")
+        except OSError:
+            self._server = None  # Another worker won the race
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Broker side: register the worker, then forward each line to every other one"""
+        task = asyncio.current_task()
+        self._broker_tasks.add(task)
+        try:
+            line = await reader.readline()
+            if not line:
+                return  # A worker probing whether the broker is alive
+            registration = json.loads(line)
+            slot = self._assign_slot(
+                registration["register"], registration.get("slot"), registration.get("highest_slot")
+            )
+            writer.write(json.dumps({"slot": slot}).encode() + b"\n")
+            await writer.drain()
+            self._broker_slots[writer] = slot
+            self._broker_clients.add(writer)
+
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for peer in list(self._broker_clients):
+                    if peer is writer:
+                        continue
+                    try:
+                        peer.write(line)
+                    except (ConnectionError, RuntimeError):
+                        self._broker_clients.discard(peer)
+                await asyncio.gather(
+                    *(self._drain(peer) for peer in list(self._broker_clients) if peer is not writer)
+                )
+        except (ConnectionError, ValueError, KeyError):
+            pass
+        finally:
+            self._broker_clients.discard(writer)
+            self._broker_slots.pop(writer, None)
+            self._broker_tasks.discard(task)
+            writer.close()
+
+    def _assign_slot(self, worker_id: str, requested: Optional[int], highest_seen: Optional[int]) -> int:
+        """
+        The worker's own previous slot, else a slot never handed out before
+
+        Raises:
+            ValueError: If all slots have been used
+        """
+        if isinstance(highest_seen, int):
+            self._next_slot = max(self._next_slot, min(highest_seen, MAX_WORKER_SLOT) + 1)
+        taken = set(self._broker_slots.values())
+        if (isinstance(requested, int) and 0 < requested <= MAX_WORKER_SLOT and requested not in taken
+                and self._slot_owners.get(requested, worker_id) == worker_id):
+            self._slot_owners[requested] = worker_id
+            self._next_slot = max(self._next_slot, requested + 1)
+            return requested
+        if self._next_slot > MAX_WORKER_SLOT:
+            raise ValueError("no unused worker slots left")
+        slot = self._next_slot
+        self._next_slot += 1
+        self._slot_owners[slot] = worker_id
+        return slot
+
+    async def _drain(self, writer: asyncio.StreamWriter):
+        try:
+            await writer.drain()
+        except (ConnectionError, RuntimeError):
+            self._broker_clients.discard(writer)
+
+
+def create_backplane() -> InMemoryBackplane:
+    """Build the backplane selected by BROADCAST_BACKEND (memory or unix)"""
+    backend = os.getenv("BROADCAST_BACKEND", "memory")
+    if backend == "memory":
+        return InMemoryBackplane()
+    if backend == "unix":
+        return UnixSocketBackplane(os.getenv("BROADCAST_SOCKET", "/tmp/integrated-accident-alerts.sock"))
+    raise ValueError(f"Unknown broadcast backend: {backend}")
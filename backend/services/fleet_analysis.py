@@ -0,0 +1,128 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models.database import AccidentReport, db_executor
+from services.accident_index import AccidentIndex, INDEXED_COLUMNS, accident_index
+from services.member4_route import route_service
+
+
+def _analyze_in_worker(route_data: dict, records: List[Tuple[int, tuple]]) -> dict:
+    """Analyze one route against the accidents near it"""
+    historical_data = [AccidentIndex.as_dict(record) for _, record in records]
+    return asyncio.run(route_service.analyze_route(route_data, historical_data))
+
+
+class FleetAnalysisService:
+    """
+    Analyzes many routes at once on a process pool
+
+    The accidents near each route are looked up in the parent and sent with
+    that route only, so every task is CPU work on a small payload that runs
+    in parallel across cores. One pool lives for the whole process and
+    at most max_batches batches use it at a time; further batches wait.
+    """
+
+    def __init__(self, max_workers: int = None, max_routes: int = None, max_batches: int = None):
+        self.max_workers = max_workers or int(os.getenv("FLEET_WORKERS", os.cpu_count() or 1))
+        self.max_routes = max_routes or int(os.getenv("FLEET_MAX_ROUTES", 1000))
+        self.max_batches = max_batches or int(os.getenv("FLEET_MAX_BATCHES", 2))
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.batch_slots = asyncio.Semaphore(self.max_batches)
+
+    async def load_accidents(self, routes: List[dict]) -> AccidentIndex:
+        """
+        Index holding every accident a route in the batch could use
+
+        The in-memory accident index once it is built, otherwise an index
+        over one SQL range query on the union bounding box, run on a
+        database reader thread.
+        """
+        if accident_index.loaded:
+            return accident_index
+        boxes = [box for route in routes for box in route_service.get_query_boxes(route)]
+        batch_index = AccidentIndex()
+        for report_id, record in await db_executor.read(self._query_accidents, boxes):
+            batch_index._insert(report_id, record)
+        return batch_index
+
+    @staticmethod
+    def _query_accidents(db: Session, boxes: List[tuple]) -> List[Tuple[int, tuple]]:
+        min_lat = min(b[0] for b in boxes)
+        min_lng = min(b[1] for b in boxes)
+        max_lat = max(b[2] for b in boxes)
+        max_lng = max(b[3] for b in boxes)
+        columns = [AccidentReport.id] + [getattr(AccidentReport, c) for c in INDEXED_COLUMNS]
+        query = db.query(*columns).filter(
+            AccidentReport.latitude.between(min_lat, max_lat),
+            AccidentReport.longitude.between(min_lng, max_lng)
+        )
+        return [(row[0], tuple(row[1:])) for row in query]
+
+    async def analyze_stream(self, routes: List[dict],
+                             index: AccidentIndex) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+        """
+        Analyze routes in parallel, yielding results as they finish
+
+        Each route's accidents are looked up in index just before its task
+        is submitted, and only a few tasks per worker are queued at a time,
+        so the batch never holds every route's payload at once.
+
+        Args:
+            routes: Routes to analyze
+            index: Accidents to analyze against, as from load_accidents
+
+        Yields:
+            (route_index, analysis, error) with exactly one of analysis/error set
+        """
+        loop = asyncio.get_running_loop()
+        async with self.batch_slots:
+            executor = self._pool()
+            queued = self.max_workers * 2
+            pending = {}
+            submitted = 0
+            try:
+                while pending or submitted < len(routes):
+                    while submitted < len(routes) and len(pending) < queued:
+                        route = routes[submitted]
+                        records = index.query_records(route_service.get_query_boxes(route))
+                        pending[loop.run_in_executor(executor, _analyze_in_worker, route, records)] = submitted
+                        submitted += 1
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        route_index = pending.pop(future)
+                        try:
+                            analysis = future.result()
+                        except BrokenProcessPool as e:
+                            self.executor = None  # Start a fresh pool for the next batch
+                            yield route_index, None, str(e)
+                            continue
+                        except Exception as e:
+                            yield route_index, None, str(e)
+                            continue
+                        yield route_index, analysis, None
+            finally:
+                # Also reached when the client disconnects mid-stream; the
+                # pool is shared, so only this batch's queued tasks are dropped
+                for future in pending:
+                    future.cancel()
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """The long-lived worker pool, started on first use"""
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self.executor
+
+
+# Global instance
+fleet_service = FleetAnalysisService()
@@ -1,6 +1,12 @@
 import numpy as np
+from collections import Counter, OrderedDict
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+
+from utils.spatial_index import GridIndex
+
+HOTSPOT_EPS_KM_RANGE = (0.05, 5.0)  # Accepted hotspot clustering radius, in 0.05 km steps
+HOTSPOT_MIN_EVENTS_RANGE = (1, 50)
 
 class NearMissDetectionService:
     """Member 2: Near-Miss Detection & Pattern Analysis"""
@@ -9,6 +15,19 @@ class NearMissDetectionService:
         self.near_miss_threshold = 0.7  # Threshold for near-miss detection
         self.pattern_window = timedelta(hours=1)  # Time window for pattern analysis
         self.recent_events = []  # Store recent events for pattern detection
+        self.hotspot_eps_km = 0.5  # Neighbourhood radius for hotspot clustering
+        self.hotspot_min_events = 3  # Events needed within eps to seed a hotspot
+        self._event_index = GridIndex(cell_size_deg=self.hotspot_eps_km / 111.0)
+        self._indexed_events: Dict[int, dict] = {}  # event key -> event, oldest first
+        self._next_event_key = 0
+        self._events_version = 0  # Bumped whenever the event window changes
+        # (version, key, lat, lng) for every event added to or expired from the
+        # index, so cached clusterings can be updated around the changes only
+        self._event_changes: List[Tuple[int, int, float, float]] = []
+        self._event_changes_floor = 0  # Changes up to this version were trimmed
+        self.max_event_changes = 10000
+        self._hotspot_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+        self.hotspot_cache_size = 16
     
     def detect_near_miss(self, event_data: dict) -> dict:
         """
@@ -47,6 +66,8 @@ class NearMissDetectionService:
         # Store for pattern analysis
         if result["is_near_miss"]:
             self.recent_events.append(result)
+            self._index_event(result)
+            self._events_version += 1
             self._cleanup_old_events()
         
         return result
@@ -186,18 +207,207 @@ class NearMissDetectionService:
             "recommendations": self._generate_area_recommendations(nearby_events, is_hotspot)
         }
     
+    def find_hotspots(self, eps_km: float = None, min_events: int = None) -> dict:
+        """
+        Discover near-miss hotspots across all windowed events (DBSCAN-style)
+
+        Args:
+            eps_km: Neighbourhood radius in kilometers (0.05-5, in 0.05 steps)
+            min_events: Minimum events within eps_km for a core point (1-50)
+
+        Returns:
+            Hotspot clusters with centroids, extents and dominant patterns;
+            'parameters' holds the eps_km/min_events actually used
+
+        Raises:
+            ValueError: If a parameter is outside its range
+        """
+        eps_km, min_events = self._hotspot_parameters(eps_km, min_events)
+
+        self._cleanup_old_events()
+
+        cache_key = (eps_km, min_events)
+        state = self._hotspot_cache.get(cache_key)
+        if state is not None:
+            self._hotspot_cache.move_to_end(cache_key)
+            if state["version"] == self._events_version:
+                return state["result"]
+
+        state = self._update_clusters(state, eps_km, min_events)
+        hotspots = sorted(state["summaries"].values(), key=lambda h: h['event_count'], reverse=True)
+
+        clustered = sum(h['event_count'] for h in hotspots)
+        state["result"] = {
+            "total_events": len(self.recent_events),
+            "clustered_events": clustered,
+            "noise_events": len(self.recent_events) - clustered,
+            "hotspot_count": len(hotspots),
+            "parameters": {"eps_km": eps_km, "min_events": min_events},
+            "hotspots": hotspots
+        }
+        state["version"] = self._events_version
+
+        self._hotspot_cache[cache_key] = state
+        while len(self._hotspot_cache) > self.hotspot_cache_size:
+            self._hotspot_cache.popitem(last=False)
+        return state["result"]
+
+    def _hotspot_parameters(self, eps_km: Optional[float], min_events: Optional[int]) -> Tuple[float, int]:
+        """Check and quantize clustering parameters so they make a small set of cache keys"""
+        eps_km = self.hotspot_eps_km if eps_km is None else eps_km
+        min_events = self.hotspot_min_events if min_events is None else min_events
+        if not HOTSPOT_EPS_KM_RANGE[0] <= eps_km <= HOTSPOT_EPS_KM_RANGE[1]:
+            raise ValueError(f"eps_km must be between {HOTSPOT_EPS_KM_RANGE[0]} and {HOTSPOT_EPS_KM_RANGE[1]}")
+        if not HOTSPOT_MIN_EVENTS_RANGE[0] <= min_events <= HOTSPOT_MIN_EVENTS_RANGE[1]:
+            raise ValueError(
+                f"min_events must be between {HOTSPOT_MIN_EVENTS_RANGE[0]} and {HOTSPOT_MIN_EVENTS_RANGE[1]}"
+            )
+        return round(round(eps_km / 0.05) * 0.05, 2), int(min_events)
+
+    def _update_clusters(self, state: Optional[dict], eps_km: float, min_events: int) -> dict:
+        """
+        Bring a cached clustering up to date with the event window
+
+        Adding or expiring an event can only change the core status of
+        events within eps_km of it, and core-to-core links within 2 * eps_km,
+        so only clusters with an event that close are dissolved and
+        reclustered; the rest are kept as they are. Falls back to clustering
+        everything when there is no usable state or most events changed.
+        """
+        events = self._indexed_events
+        changes = self._changes_since(state["version"]) if state else None
+        if changes is None or len(changes) * 2 > len(events):
+            state = {"labels": {}, "clusters": {}, "summaries": {}, "next_cluster": 0}
+            self._expand_clusters(state, list(events), eps_km, min_events)
+            return state
+
+        labels, clusters = state["labels"], state["clusters"]
+        seeds = set()
+        for key, lat, lng in changes:
+            seeds.add(key)
+            seeds.update(k for k, _ in self._event_index.query_radius(lat, lng, 2 * eps_km))
+
+        affected = {labels[k] for k in seeds if labels.get(k, -1) != -1}
+        for cluster_id in affected:
+            seeds.update(clusters.pop(cluster_id))
+            del state["summaries"][cluster_id]
+        for key in seeds:
+            labels.pop(key, None)
+
+        self._expand_clusters(state, sorted(k for k in seeds if k in events), eps_km, min_events)
+        return state
+
+    def _changes_since(self, version: int) -> Optional[List[Tuple[int, float, float]]]:
+        """(key, lat, lng) of events added or expired after version, None if no longer logged"""
+        if version < self._event_changes_floor:
+            return None
+        return [(key, lat, lng) for v, key, lat, lng in self._event_changes if v > version]
+
+    def _expand_clusters(self, state: dict, seeds: List[int], eps_km: float, min_events: int):
+        """Grow density-connected clusters from unlabelled seed events into state"""
+        index = self._event_index
+        events = self._indexed_events
+        labels: Dict[int, int] = state["labels"]  # event key -> cluster id (-1 for noise)
+
+        for key in seeds:
+            if key in labels:
+                continue
+
+            lat, lng = index.positions[key]
+            neighbors = [k for k, _ in index.query_radius(lat, lng, eps_km)]
+            if len(neighbors) < min_events:
+                labels[key] = -1
+                continue
+
+            cluster_id = state["next_cluster"]
+            state["next_cluster"] += 1
+            members = [key]
+            labels[key] = cluster_id
+            queue = [k for k in neighbors if k != key]
+
+            while queue:
+                neighbor = queue.pop()
+                if labels.get(neighbor, -1) != -1:
+                    continue
+                was_unvisited = neighbor not in labels
+                labels[neighbor] = cluster_id
+                members.append(neighbor)
+                if not was_unvisited:
+                    continue  # Former noise becomes a border point
+
+                n_lat, n_lng = index.positions[neighbor]
+                expansion = [k for k, _ in index.query_radius(n_lat, n_lng, eps_km)]
+                if len(expansion) >= min_events:
+                    queue.extend(k for k in expansion if labels.get(k, -1) == -1)
+
+            state["clusters"][cluster_id] = members
+            state["summaries"][cluster_id] = self._summarize_cluster([events[k] for k in members])
+
+    def _summarize_cluster(self, events: List[dict]) -> dict:
+        """Describe a hotspot cluster"""
+        lats = [e['location']['latitude'] for e in events]
+        lngs = [e['location']['longitude'] for e in events]
+        centroid_lat = sum(lats) / len(lats)
+        centroid_lng = sum(lngs) / len(lngs)
+
+        pattern_counts = Counter(e.get("pattern_type", "unknown") for e in events)
+        severity_counts = {"Critical": 0, "High": 0, "Moderate": 0, "Low": 0}
+        for event in events:
+            severity = event.get("severity", "Low")
+            severity_counts[severity] = severity_counts.get(severity, 0) + 1
+
+        radius_km = max(
+            self._calculate_distance(centroid_lat, centroid_lng, lat, lng)
+            for lat, lng in zip(lats, lngs)
+        )
+
+        is_severe = len(events) >= 5 or severity_counts["Critical"] >= 2
+
+        return {
+            "centroid": {
+                "latitude": round(centroid_lat, 6),
+                "longitude": round(centroid_lng, 6)
+            },
+            "extent": {
+                "min_latitude": min(lats),
+                "min_longitude": min(lngs),
+                "max_latitude": max(lats),
+                "max_longitude": max(lngs),
+                "radius_km": round(float(radius_km), 3)
+            },
+            "event_count": len(events),
+            "risk_level": "High" if is_severe else "Moderate",
+            "patterns": dict(pattern_counts),
+            "dominant_pattern": pattern_counts.most_common(1)[0][0],
+            "severity_distribution": severity_counts,
+            "last_event_at": max(e['timestamp'] for e in events)
+        }
+
     def _get_nearby_events(self, location: dict, radius_km: float) -> List[dict]:
         """Get events within radius of location"""
-        nearby = []
-        for event in self.recent_events:
-            event_loc = event.get("location", {})
-            distance = self._calculate_distance(
-                location['latitude'], location['longitude'],
-                event_loc.get('latitude'), event_loc.get('longitude')
-            )
-            if distance <= radius_km:
-                nearby.append(event)
-        return nearby
+        matches = self._event_index.query_radius(
+            location['latitude'], location['longitude'], radius_km
+        )
+        return [self._indexed_events[key] for key, _ in matches]
+
+    def _index_event(self, event: dict):
+        """Add an event to the spatial index"""
+        event_loc = event.get("location", {})
+        if event_loc.get('latitude') is None or event_loc.get('longitude') is None:
+            return
+        key = self._next_event_key
+        self._next_event_key += 1
+        self._indexed_events[key] = event
+        self._event_index.insert(key, event_loc['latitude'], event_loc['longitude'])
+        self._log_event_change(key, event_loc['latitude'], event_loc['longitude'])
+
+    def _log_event_change(self, key: int, latitude: float, longitude: float):
+        """Record an index change made in the upcoming version"""
+        self._event_changes.append((self._events_version + 1, key, latitude, longitude))
+        if len(self._event_changes) > self.max_event_changes:
+            trimmed = self._event_changes[:len(self._event_changes) // 2]
+            self._event_changes = self._event_changes[len(trimmed):]
+            self._event_changes_floor = trimmed[-1][0]
     
     def _calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate distance between two points in km (Haversine formula)"""
@@ -237,10 +447,22 @@ class NearMissDetectionService:
     def _cleanup_old_events(self):
         """Remove events older than the pattern window"""
         cutoff = datetime.utcnow() - self.pattern_window
-        self.recent_events = [
+        kept = [
             e for e in self.recent_events 
             if datetime.fromisoformat(e['timestamp']) > cutoff
         ]
+        if len(kept) == len(self.recent_events):
+            return
+
+        for key, event in list(self._indexed_events.items()):
+            if datetime.fromisoformat(event['timestamp']) <= cutoff:
+                self._indexed_events.pop(key)
+                lat, lng = self._event_index.positions[key]
+                self._event_index.remove(key)
+                self._log_event_change(key, lat, lng)
+
+        self.recent_events = kept
+        self._events_version += 1
 
 # Global instance
 nearmiss_service = NearMissDetectionService()
\ No newline at end of file
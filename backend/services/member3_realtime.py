@@ -1,88 +1,1022 @@
-from typing import Dict, List, Set
-from datetime import datetime, timedelta
-from fastapi import WebSocket
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from datetime import datetime
+from collections import Counter, defaultdict, deque
+from fastapi import WebSocket, WebSocketDisconnect
 import json
 import asyncio
+import heapq
+import math
+import os
+import time
+import uuid
+
+from services.broadcast_backplane import create_backplane
+from utils.distance import get_bounding_box, haversine_distance, point_in_polygon, point_to_segments_distance
+from utils.spatial_index import GridIndex, RegionIndex
+
+try:
+    import orjson
+except ImportError:  # Optional faster encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional binary subprotocol
+    msgpack = None
+
+OVERFLOW_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+MSGPACK_SUBPROTOCOL = "msgpack"
+MAX_SUBSCRIPTION_AREAS = 20
+MAX_POLYGON_VERTICES = 500
+ALERT_SEVERITY_RANK = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+
+
+def encode_json(message: dict) -> str:
+    """Serialize a message to JSON text, using orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(message).decode()
+    return json.dumps(message, separators=(",", ":"))
+
+
+class OutboundFrame:
+    """A message serialized once and shared by every recipient"""
+    
+    __slots__ = ("message", "key", "_text", "_binary")
+    
+    def __init__(self, message: dict):
+        self.message = message
+        self.key = self._coalesce_key(message)
+        self._text = None
+        self._binary = None
+    
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = encode_json(self.message)
+        return self._text
+    
+    @property
+    def binary(self) -> bytes:
+        if self._binary is None:
+            self._binary = msgpack.packb(self.message, use_bin_type=True)
+        return self._binary
+    
+    @staticmethod
+    def _coalesce_key(message: dict) -> Optional[tuple]:
+        """
+        Frames sharing a key supersede each other when coalescing
+        
+        Only frames about one subject (alert_id or data.id) have a key;
+        batch frames such as alert_expired carry different items each time
+        and are never coalesced.
+        """
+        event = message.get("event")
+        if event is None:
+            return None
+        subject = message.get("alert_id")
+        if subject is None and isinstance(message.get("data"), dict):
+            subject = message["data"].get("id")
+        if subject is None:
+            return None
+        return (event, subject)
+
+
+class DeliveryStats:
+    """Delivery latency and drop counters for outbound websocket frames"""
+    
+    def __init__(self, sample_size: int = 10000):
+        self.latencies_ms = deque(maxlen=sample_size)
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.slow_disconnects = 0
+        self.send_failures = 0
+    
+    def record_sent(self, enqueued_at: float):
+        self.sent += 1
+        self.latencies_ms.append((time.perf_counter() - enqueued_at) * 1000)
+    
+    def snapshot(self) -> dict:
+        """Get counters and latency percentiles"""
+        samples = sorted(self.latencies_ms)
+        
+        def percentile(p: float) -> float:
+            if not samples:
+                return 0.0
+            return round(samples[min(len(samples) - 1, int(len(samples) * p))], 3)
+        
+        return {
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "slow_consumer_disconnects": self.slow_disconnects,
+            "send_failures": self.send_failures,
+            "latency_ms": {
+                "p50": percentile(0.50),
+                "p90": percentile(0.90),
+                "p99": percentile(0.99),
+                "max": round(samples[-1], 3) if samples else 0.0,
+                "samples": len(samples)
+            }
+        }
+
+
+class ClientChannel:
+    """Bounded outbound queue for one websocket, drained by its own writer task"""
+    
+    def __init__(self, websocket: WebSocket, manager: "WebSocketManager", binary: bool = False):
+        self.websocket = websocket
+        self.manager = manager
+        self.binary = binary  # Negotiated msgpack subprotocol
+        self.queue: deque = deque()  # (enqueued_at, frame)
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.last_seen = time.monotonic()  # Last message received from the client
+        self.connected_seq = manager.event_log.seq  # Later events reach the client live
+        self.task = asyncio.create_task(self._writer())
+    
+    def enqueue(self, frame: OutboundFrame) -> bool:
+        """
+        Queue a frame without blocking
+        
+        Returns:
+            False if the client overflowed under the disconnect policy
+        """
+        if self.closed:
+            return True
+        
+        manager = self.manager
+        
+        if len(self.queue) >= manager.max_queue_size:
+            if manager.overflow_policy == "disconnect":
+                manager.stats.slow_disconnects += 1
+                return False
+            
+            if manager.overflow_policy == "coalesce" and frame.key is not None:
+                for i, (queued_at, queued) in enumerate(self.queue):
+                    if queued.key == frame.key:
+                        # Keep the original enqueue time so latency stays honest
+                        self.queue[i] = (queued_at, frame)
+                        manager.stats.coalesced += 1
+                        return True
+            
+            self.queue.popleft()
+            manager.stats.dropped += 1
+        
+        self.queue.append((time.perf_counter(), frame))
+        self.ready.set()
+        return True
+    
+    def close(self):
+        """Stop the writer task"""
+        self.closed = True
+        self.queue.clear()
+        self.ready.set()
+        if self.task is not asyncio.current_task():
+            self.task.cancel()
+    
+    async def _writer(self):
+        manager = self.manager
+        while not self.closed:
+            if not self.queue:
+                self.ready.clear()
+                await self.ready.wait()
+                continue
+            
+            enqueued_at, frame = self.queue.popleft()
+            try:
+                async with asyncio.timeout(manager.send_timeout):
+                    if self.binary:
+                        await self.websocket.send_bytes(frame.binary)
+                    else:
+                        await self.websocket.send_text(frame.text)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error sending message: {e!r}")
+                manager.stats.send_failures += 1
+                manager.disconnect(self.websocket)
+                return
+            
+            manager.stats.record_sent(enqueued_at)
+
+
+class EventLog:
+    """
+    Bounded log of sequenced broadcast frames for reconnecting clients
+    
+    `log_id` changes on every process start, so a client resuming against a
+    restarted server is told to take a full snapshot instead.
+    """
+    
+    def __init__(self, max_events: int = 5000):
+        self.log_id = uuid.uuid4().hex
+        self.seq = 0
+        self.entries: deque = deque(maxlen=max_events)  # (seq, frame, areas, point)
+    
+    def next_seq(self) -> int:
+        self.seq += 1
+        return self.seq
+    
+    def append(self, seq: int, frame: OutboundFrame, areas: Optional[List[tuple]] = None,
+               point: Optional[tuple] = None):
+        self.entries.append((seq, frame, areas, point))
+    
+    def since(self, seq: int) -> Optional[List[tuple]]:
+        """
+        Entries after a sequence number
+        
+        Returns:
+            None if the log has rolled past `seq` and a snapshot is needed
+        """
+        if seq > self.seq:
+            return None
+        if seq == self.seq:
+            return []
+        if not self.entries or self.entries[0][0] > seq + 1:
+            return None
+        return [entry for entry in self.entries if entry[0] > seq]
+
 
 class WebSocketManager:
     """Manager for WebSocket connections"""
     
-    def __init__(self):
+    def __init__(self, max_queue_size: int = None, overflow_policy: str = None,
+                 send_timeout: float = None):
         self.active_connections: Set[WebSocket] = set()
         self.user_locations: Dict[WebSocket, dict] = {}
+        self.location_index = GridIndex(cell_size_deg=0.05)  # ~5.5 km cells
+        self.channels: Dict[WebSocket, ClientChannel] = {}
+        self.stats = DeliveryStats()
+        self.event_log = EventLog(int(os.getenv("WS_EVENT_LOG_SIZE", 5000)))
+        
+        # Geofenced subscriptions: {"areas": [...], "events": set | None}
+        self.subscriptions: Dict[WebSocket, dict] = {}
+        self.subscription_index = RegionIndex(cell_size_deg=0.05)
+        self.geofenced_connections: Set[WebSocket] = set()  # Subscribed with areas
+        self.unfenced_connections: Set[WebSocket] = set()  # Everyone else
+        
+        # Location throttling: apply an update once the client moved far enough
+        # or enough time passed since the last applied one
+        self.location_min_distance_km = float(os.getenv("WS_LOCATION_MIN_DISTANCE_M", 25)) / 1000
+        self.location_min_interval = float(os.getenv("WS_LOCATION_MIN_INTERVAL_SECONDS", 15))
+        self.location_updates_received = 0
+        self.location_updates_applied = 0
+        
+        # Heartbeat reaper: nudge quiet clients, close ones that stay silent
+        self.heartbeat_interval = float(os.getenv("WS_HEARTBEAT_INTERVAL", 30))
+        self.idle_timeout = float(os.getenv("WS_IDLE_TIMEOUT", 90))
+        self.reaped_connections = 0
+        self.peak_connections = 0
+        self.total_connections = 0
+        self._reaper_task: Optional[asyncio.Task] = None
+        self._rate_window = (time.monotonic(), 0, 0)  # (started, received, applied)
+        self._update_rates = {"received_per_second": 0.0, "applied_per_second": 0.0}
+        
+        self.max_queue_size = max_queue_size or int(os.getenv("WS_MAX_QUEUE_SIZE", 256))
+        self.overflow_policy = overflow_policy or os.getenv("WS_OVERFLOW_POLICY", "drop_oldest")
+        self.send_timeout = send_timeout or float(os.getenv("WS_SEND_TIMEOUT", 10))
+        if self.overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {self.overflow_policy}")
     
     async def connect(self, websocket: WebSocket):
-        """Accept new WebSocket connection"""
-        await websocket.accept()
+        """Accept new WebSocket connection, negotiating msgpack if requested"""
+        requested = websocket.scope.get("subprotocols", []) if hasattr(websocket, "scope") else []
+        binary = msgpack is not None and MSGPACK_SUBPROTOCOL in requested
+        if binary:
+            await websocket.accept(subprotocol=MSGPACK_SUBPROTOCOL)
+        else:
+            await websocket.accept()
         self.active_connections.add(websocket)
+        self.unfenced_connections.add(websocket)
+        self.channels[websocket] = ClientChannel(websocket, self, binary=binary)
+        self.total_connections += 1
+        self.peak_connections = max(self.peak_connections, len(self.active_connections))
         print(f"✅ WebSocket connected. Total connections: {len(self.active_connections)}")
+        
+        # Tell the client where the event stream stands so it can resume later
+        await self.send_personal_message({
+            "event": "connected",
+            "seq": self.event_log.seq,
+            "log_id": self.event_log.log_id
+        }, websocket)
     
     def disconnect(self, websocket: WebSocket):
         """Remove WebSocket connection"""
+        if websocket not in self.active_connections:
+            return
         self.active_connections.discard(websocket)
         self.user_locations.pop(websocket, None)
+        self.location_index.remove(websocket)
+        self.unsubscribe(websocket)
+        self.unfenced_connections.discard(websocket)
+        channel = self.channels.pop(websocket, None)
+        if channel:
+            channel.close()
         print(f"❌ WebSocket disconnected. Total connections: {len(self.active_connections)}")
     
+    async def receive_message(self, websocket: WebSocket) -> dict:
+        """Receive and decode a client message in its negotiated format"""
+        channel = self.channels.get(websocket)
+        if channel is not None and channel.binary:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            channel.last_seen = time.monotonic()
+            if message.get("bytes") is not None:
+                return msgpack.unpackb(message["bytes"], raw=False)
+            return json.loads(message["text"])
+        
+        data = await websocket.receive_json()
+        if channel is not None:
+            channel.last_seen = time.monotonic()
+        return data
+    
     async def send_personal_message(self, message: dict, websocket: WebSocket):
-        """Send message to specific client"""
-        try:
-            await websocket.send_json(message)
-        except Exception as e:
-            print(f"Error sending message: {e}")
+        """Queue a message for a specific client"""
+        self._enqueue(websocket, OutboundFrame(message))
+    
+    async def broadcast(self, message: dict, location: Optional[tuple] = None):
+        """
+        Broadcast message to all connected clients
+        
+        Args:
+            location: Optional (latitude, longitude) of the event; geofenced
+                subscribers only receive located events inside their areas
+        """
+        frame = self._sequenced_frame(message, point=location)
+        if not self.subscriptions:
+            for connection in list(self.active_connections):
+                self._enqueue(connection, frame)
+            return
+        
+        # Geofenced clients come from the region index, never a full scan
+        if location is None:
+            fenced = self.geofenced_connections
+        else:
+            fenced = self._geofence_matches([(location[0], location[1], 0)])
+        event = message.get("event")
+        for connection in [*self.unfenced_connections, *fenced]:
+            if self._accepts_event(connection, event):
+                self._enqueue(connection, frame)
+    
+    async def broadcast_to_area(self, message: dict, center_lat: float, center_lng: float, radius_km: float = 10):
+        """Broadcast message to clients in specific geographic area"""
+        await self.broadcast_to_areas(message, [(center_lat, center_lng, radius_km)])
+    
+    async def broadcast_to_areas(self, message: dict, areas: List[tuple]):
+        """
+        Broadcast one frame to clients inside any of several areas
+        
+        Args:
+            areas: List of (latitude, longitude, radius_km) circles
+        
+        Located clients match by distance; geofenced subscribers match when an
+        area's circle overlaps one of their regions. Each client receives the
+        frame at most once.
+        """
+        frame = self._sequenced_frame(message, areas)
+        for connection in self._area_recipients(areas, message.get("event")):
+            self._enqueue(connection, frame)
+    
+    async def broadcast_batch(self, event: str, field: str, items: List[dict], areas: List[tuple]):
+        """
+        Send each client one frame holding only the items meant for it
+        
+        Args:
+            event: Event name of the frames
+            field: Message key for the item list
+            items: Payloads, each targeted at its own area
+            areas: (latitude, longitude, radius_km) circle per item
+        
+        Each client gets the items it would have received as separate
+        broadcast_to_area calls, in one frame. Clients receiving the same
+        items share a frame. Items are logged one by one so a resuming
+        client replays exactly its own.
+        """
+        batches: Dict[WebSocket, List[int]] = defaultdict(list)
+        for i, (item, area) in enumerate(zip(items, areas)):
+            self._sequenced_frame({"event": event, "count": 1, field: [item]}, [area])
+            for connection in self._area_recipients([area], event):
+                batches[connection].append(i)
+        
+        frames: Dict[tuple, OutboundFrame] = {}
+        for connection, indices in batches.items():
+            group = tuple(indices)
+            frame = frames.get(group)
+            if frame is None:
+                frame = frames[group] = OutboundFrame({
+                    "event": event,
+                    "count": len(group),
+                    field: [items[i] for i in group],
+                    "seq": self.event_log.seq
+                })
+            self._enqueue(connection, frame)
+    
+    def subscribe(self, websocket: WebSocket, areas: List[dict] = None, events: List[str] = None) -> dict:
+        """
+        Restrict a client to events inside geofences and/or of given types
+        
+        Args:
+            areas: [{'bbox': [min_lat, min_lng, max_lat, max_lng]} or
+                    {'polygon': [[lat, lng], ...]}, ...]
+            events: Event names to receive; None for all
+        
+        Raises:
+            ValueError: If an area is malformed or there are too many
+            TypeError: If areas or events have the wrong shape
+        
+        The previous subscription is only replaced once the new one is valid.
+        """
+        areas = areas or []
+        if not isinstance(areas, list):
+            raise TypeError("areas must be a list")
+        if len(areas) > MAX_SUBSCRIPTION_AREAS:
+            raise ValueError(f"At most {MAX_SUBSCRIPTION_AREAS} areas per subscription")
+        normalized = [self._normalize_area(area) for area in areas]
+        
+        if events is not None and (
+            not isinstance(events, list) or not all(isinstance(e, str) for e in events)
+        ):
+            raise TypeError("events must be a list of event names")
+        event_names = sorted(set(events)) if events else None
+        
+        self.unsubscribe(websocket)
+        self.subscriptions[websocket] = {
+            "areas": normalized,
+            "events": set(event_names) if event_names else None
+        }
+        for i, area in enumerate(normalized):
+            self.subscription_index.insert((websocket, i), *area["bbox"])
+        if normalized:
+            self.geofenced_connections.add(websocket)
+            self.unfenced_connections.discard(websocket)
+        
+        return {
+            "areas": len(normalized),
+            "events": event_names
+        }
+    
+    def unsubscribe(self, websocket: WebSocket):
+        """Remove a client's geofences and event filters"""
+        subscription = self.subscriptions.pop(websocket, None)
+        if subscription is None:
+            return
+        for i in range(len(subscription["areas"])):
+            self.subscription_index.remove((websocket, i))
+        self.geofenced_connections.discard(websocket)
+        if websocket in self.active_connections:
+            self.unfenced_connections.add(websocket)
+    
+    def replay(self, websocket: WebSocket, resume_from: int, log_id: str = None) -> Optional[int]:
+        """
+        Re-send events a reconnecting client missed
+        
+        Only events from before this connection opened are replayed; later
+        ones were already sent live. Area-targeted events are only replayed
+        if the client's current location (or geofence) covers the original
+        area, and subscription event filters apply.
+        
+        Returns:
+            Number of replayed events, or None if a full snapshot is needed
+        """
+        if log_id is not None and log_id != self.event_log.log_id:
+            return None
+        entries = self.event_log.since(resume_from)
+        if entries is None:
+            return None
+        
+        channel = self.channels.get(websocket)
+        live_from = channel.connected_seq if channel is not None else self.event_log.seq
+        location = self.user_locations.get(websocket)
+        geofenced = self._is_geofenced(websocket)
+        replayed = 0
+        for seq, frame, areas, point in entries:
+            if seq > live_from:
+                break  # Broadcast since this connection opened, so already delivered live
+            if not self._accepts_event(websocket, frame.message.get("event")):
+                continue
+            
+            if geofenced:
+                circles = [(point[0], point[1], 0)] if point else areas or []
+                if circles and not any(self._in_geofence(websocket, *circle) for circle in circles):
+                    continue
+            elif areas is not None:
+                if location is None:
+                    continue
+                if not any(
+                    haversine_distance(location['latitude'], location['longitude'], lat, lng) <= radius_km
+                    for lat, lng, radius_km in areas
+                ):
+                    continue
+            
+            self._enqueue(websocket, frame)
+            replayed += 1
+        return replayed
+    
+    def get_stats(self) -> dict:
+        """Get connection and delivery statistics"""
+        queued = [len(c.queue) for c in self.channels.values()]
+        return {
+            "connections": len(self.active_connections),
+            "located_connections": len(self.user_locations),
+            "binary_connections": sum(1 for c in self.channels.values() if c.binary),
+            "json_encoder": "orjson" if orjson is not None else "json",
+            "geofenced_subscriptions": len(self.subscriptions),
+            "peak_connections": self.peak_connections,
+            "total_connections": self.total_connections,
+            "reaped_connections": self.reaped_connections,
+            "location_updates": {
+                "received": self.location_updates_received,
+                "applied": self.location_updates_applied,
+                "throttled": self.location_updates_received - self.location_updates_applied,
+                **self._update_rates
+            },
+            "event_seq": self.event_log.seq,
+            "event_log_size": len(self.event_log.entries),
+            "overflow_policy": self.overflow_policy,
+            "max_queue_size": self.max_queue_size,
+            "queued_messages": sum(queued),
+            "max_client_backlog": max(queued, default=0),
+            **self.stats.snapshot()
+        }
+    
+    def _sequenced_frame(self, message: dict, areas: Optional[List[tuple]] = None,
+                         point: Optional[tuple] = None) -> OutboundFrame:
+        """Stamp a broadcast with the next sequence number and log it"""
+        seq = self.event_log.next_seq()
+        frame = OutboundFrame({**message, "seq": seq})
+        self.event_log.append(seq, frame, areas, point)
+        return frame
+    
+    def _area_recipients(self, areas: List[tuple], event: str) -> Set[WebSocket]:
+        """Clients an area broadcast reaches: located ones in range and matching geofences"""
+        recipients = set()
+        for center_lat, center_lng, radius_km in areas:
+            recipients.update(
+                connection for connection, _ in
+                self.location_index.query_radius(center_lat, center_lng, radius_km)
+            )
+        
+        if self.subscriptions:
+            recipients -= self.geofenced_connections
+            recipients |= self._geofence_matches(areas)
+            recipients = {c for c in recipients if self._accepts_event(c, event)}
+        return recipients
+    
+    def _is_geofenced(self, websocket: WebSocket) -> bool:
+        subscription = self.subscriptions.get(websocket)
+        return bool(subscription and subscription["areas"])
+    
+    def _accepts_event(self, websocket: WebSocket, event: str) -> bool:
+        subscription = self.subscriptions.get(websocket)
+        return subscription is None or subscription["events"] is None or event in subscription["events"]
+    
+    def _geofence_matches(self, circles: List[tuple]) -> Set[WebSocket]:
+        """
+        Subscribers with a region overlapping any of the circles
+        
+        Args:
+            circles: (latitude, longitude, radius_km); radius 0 for a point
+        """
+        matched = set()
+        for lat, lng, radius_km in circles:
+            for websocket, i in self.subscription_index.query_bbox(*get_bounding_box(lat, lng, radius_km)):
+                if websocket in matched:
+                    continue
+                if self._area_overlaps_circle(self.subscriptions[websocket]["areas"][i], lat, lng, radius_km):
+                    matched.add(websocket)
+        return matched
+    
+    def _in_geofence(self, websocket: WebSocket, lat: float, lng: float, radius_km: float = 0) -> bool:
+        return any(
+            self._area_overlaps_circle(area, lat, lng, radius_km)
+            for area in self.subscriptions[websocket]["areas"]
+        )
+    
+    @staticmethod
+    def _area_overlaps_circle(area: dict, lat: float, lng: float, radius_km: float) -> bool:
+        """Whether a normalized area and a circle share any point"""
+        min_lat, min_lng, max_lat, max_lng = area["bbox"]
+        nearest_lat = min(max(lat, min_lat), max_lat)
+        nearest_lng = min(max(lng, min_lng), max_lng)
+        if haversine_distance(lat, lng, nearest_lat, nearest_lng) > radius_km:
+            return False
+        polygon = area["polygon"]
+        if polygon is None or point_in_polygon(lat, lng, polygon):
+            return True
+        if radius_km <= 0:
+            return False
+        # Center outside the polygon: overlap means an edge comes within the radius
+        starts = polygon
+        ends = polygon[1:] + polygon[:1]
+        distances = point_to_segments_distance(
+            [lat], [lng],
+            [p[0] for p in starts], [p[1] for p in starts],
+            [p[0] for p in ends], [p[1] for p in ends]
+        )
+        return bool(distances.min() <= radius_km)
+    
+    @staticmethod
+    def _coordinate(lat, lng) -> tuple:
+        """A validated (lat, lng) pair of finite, in-range floats"""
+        lat, lng = float(lat), float(lng)
+        if not (math.isfinite(lat) and math.isfinite(lng)):
+            raise ValueError("coordinates must be finite numbers")
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise ValueError("latitude must be within [-90, 90] and longitude within [-180, 180]")
+        return lat, lng
+    
+    @classmethod
+    def _normalize_area(cls, area: dict) -> dict:
+        """Validate an area spec into {'bbox': (...), 'polygon': [...] | None}"""
+        if not isinstance(area, dict):
+            raise TypeError("Each area must be an object")
+        
+        if "bbox" in area:
+            bbox = area["bbox"]
+            if not isinstance(bbox, list) or len(bbox) != 4:
+                raise ValueError("bbox must be [min_lat, min_lng, max_lat, max_lng]")
+            min_lat, min_lng = cls._coordinate(bbox[0], bbox[1])
+            max_lat, max_lng = cls._coordinate(bbox[2], bbox[3])
+            if min_lat > max_lat or min_lng > max_lng:
+                raise ValueError("bbox must be [min_lat, min_lng, max_lat, max_lng]")
+            return {"bbox": (min_lat, min_lng, max_lat, max_lng), "polygon": None}
+        
+        if "polygon" in area:
+            vertices = area["polygon"]
+            if not isinstance(vertices, list) or not 3 <= len(vertices) <= MAX_POLYGON_VERTICES:
+                raise ValueError(f"polygon needs 3 to {MAX_POLYGON_VERTICES} vertices")
+            polygon = []
+            for vertex in vertices:
+                if not isinstance(vertex, list) or len(vertex) != 2:
+                    raise ValueError("polygon vertices must be [lat, lng] pairs")
+                polygon.append(cls._coordinate(*vertex))
+            lats = [p[0] for p in polygon]
+            lngs = [p[1] for p in polygon]
+            return {"bbox": (min(lats), min(lngs), max(lats), max(lngs)), "polygon": polygon}
+        
+        raise ValueError("Each area needs a bbox or polygon")
+    
+    def _enqueue(self, websocket: WebSocket, frame: OutboundFrame):
+        """Hand a frame to a client's writer, enforcing the overflow policy"""
+        channel = self.channels.get(websocket)
+        if channel is None:
+            return
+        if not channel.enqueue(frame):
+            print("Disconnecting slow websocket consumer")
             self.disconnect(websocket)
+            asyncio.create_task(self._close_quietly(websocket))
+    
+    async def _close_quietly(self, websocket: WebSocket, code: int = 1008):
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+    
+    def start_reaper(self):
+        """Start the background task that closes idle or dead connections"""
+        if self._reaper_task is not None and not self._reaper_task.done():
+            return
+        self._reaper_task = asyncio.create_task(self._reaper_loop())
+    
+    async def stop_reaper(self):
+        """Stop the reaper task"""
+        if self._reaper_task is None:
+            return
+        self._reaper_task.cancel()
+        try:
+            await self._reaper_task
+        except asyncio.CancelledError:
+            pass
+        self._reaper_task = None
     
-    async def broadcast(self, message: dict):
-        """Broadcast message to all connected clients"""
-        disconnected = set()
-        for connection in self.active_connections:
+    async def _reaper_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
             try:
-                await connection.send_json(message)
+                self.reap_idle_connections()
             except Exception as e:
-                print(f"Error broadcasting to client: {e}")
-                disconnected.add(connection)
+                print(f"WebSocket reaper error: {e}")
+    
+    def reap_idle_connections(self, now: float = None) -> int:
+        """
+        Heartbeat quiet clients and close silent or dead ones
+        
+        Clients quiet for a heartbeat interval get a "heartbeat" frame, which
+        also surfaces dead sockets through a failed send. Clients silent past
+        the idle timeout, or whose writer task already exited, are closed.
+        
+        Returns:
+            Number of connections reaped
+        """
+        now = now or time.monotonic()
+        heartbeat = None
+        reaped = 0
+        for websocket, channel in list(self.channels.items()):
+            idle = now - channel.last_seen
+            if channel.task.done() or idle >= self.idle_timeout:
+                self.disconnect(websocket)
+                asyncio.create_task(self._close_quietly(websocket, code=1001))
+                reaped += 1
+            elif idle >= self.heartbeat_interval:
+                heartbeat = heartbeat or OutboundFrame({"event": "heartbeat"})
+                self._enqueue(websocket, heartbeat)
         
-        # Clean up disconnected clients
-        for conn in disconnected:
-            self.disconnect(conn)
+        self.reaped_connections += reaped
+        if reaped:
+            print(f"🧹 Reaped {reaped} idle websocket connections")
+        self._roll_update_rates(now)
+        return reaped
     
-    async def broadcast_to_area(self, message: dict, center_lat: float, center_lng: float, radius_km: float = 10):
-        """Broadcast message to clients in specific geographic area"""
-        for connection, location in self.user_locations.items():
-            if self._is_within_radius(location, center_lat, center_lng, radius_km):
-                await self.send_personal_message(message, connection)
+    def _roll_update_rates(self, now: float):
+        started, received, applied = self._rate_window
+        elapsed = now - started
+        if elapsed <= 0:
+            return
+        self._update_rates = {
+            "received_per_second": round((self.location_updates_received - received) / elapsed, 2),
+            "applied_per_second": round((self.location_updates_applied - applied) / elapsed, 2)
+        }
+        self._rate_window = (now, self.location_updates_received, self.location_updates_applied)
+    
+    def handle_location_update(self, websocket: WebSocket, latitude: float, longitude: float) -> bool:
+        """
+        Apply a client GPS update unless it is too close in space and time
+        
+        Returns:
+            True if the stored location changed
+        """
+        if latitude is None or longitude is None:
+            return False
+        self.location_updates_received += 1
+        
+        previous = self.user_locations.get(websocket)
+        if previous is not None:
+            elapsed = time.monotonic() - previous["applied_at"]
+            moved_km = haversine_distance(previous["latitude"], previous["longitude"], latitude, longitude)
+            if moved_km < self.location_min_distance_km and elapsed < self.location_min_interval:
+                return False
+        
+        self.update_user_location(websocket, latitude, longitude)
+        self.location_updates_applied += 1
+        return True
     
     def update_user_location(self, websocket: WebSocket, latitude: float, longitude: float):
         """Update user's location"""
+        if latitude is None or longitude is None:
+            return
+        
         self.user_locations[websocket] = {
+            "applied_at": time.monotonic(),
             "latitude": latitude,
             "longitude": longitude,
             "updated_at": datetime.utcnow()
         }
+        self.location_index.insert(websocket, latitude, longitude)
+
+
+class AlertStore:
+    """
+    Active alerts indexed by id, expiry time and location
     
-    def _is_within_radius(self, location: dict, lat: float, lng: float, radius_km: float) -> bool:
-        """Check if location is within radius"""
-        import math
-        
-        R = 6371  # Earth's radius in km
-        lat1, lon1 = math.radians(location['latitude']), math.radians(location['longitude'])
-        lat2, lon2 = math.radians(lat), math.radians(lng)
-        
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
+    Records keep `created_at`/`expires_at` as epoch seconds; ISO strings are
+    only produced by `serialize`. Expired and dismissed alerts are evicted
+    rather than flagged, so memory tracks the live alert count.
+    """
+    
+    def __init__(self):
+        self.alerts: Dict[int, dict] = {}
+        self.expiry_heap: List[tuple] = []  # (expires_at, alert_id)
+        self.location_index = GridIndex(cell_size_deg=0.05)
+        self.radius_counts = Counter()  # Tracks the widest alert radius
+    
+    def __len__(self) -> int:
+        return len(self.alerts)
+    
+    def __contains__(self, alert_id: int) -> bool:
+        return alert_id in self.alerts
+    
+    def get(self, alert_id: int) -> Optional[dict]:
+        return self.alerts.get(alert_id)
+    
+    def values(self) -> List[dict]:
+        return list(self.alerts.values())
+    
+    def add(self, alert: dict):
+        """Store an alert record"""
+        self.alerts[alert['id']] = alert
+        heapq.heappush(self.expiry_heap, (alert['expires_at'], alert['id']))
+        self.location_index.insert(
+            alert['id'], alert['location']['latitude'], alert['location']['longitude']
+        )
+        self.radius_counts[alert['radius_km']] += 1
+    
+    def remove(self, alert_id: int) -> Optional[dict]:
+        """Remove an alert; its heap entry is discarded lazily"""
+        alert = self.alerts.pop(alert_id, None)
+        if alert is None:
+            return None
+        self.location_index.remove(alert_id)
+        self.radius_counts[alert['radius_km']] -= 1
+        if self.radius_counts[alert['radius_km']] <= 0:
+            del self.radius_counts[alert['radius_km']]
+        return alert
+    
+    def extend_expiry(self, alert_id: int, expires_at: float):
+        """Push an alert's expiry later; the old heap entry goes stale"""
+        alert = self.alerts.get(alert_id)
+        if alert is None or expires_at <= alert['expires_at']:
+            return
+        alert['expires_at'] = expires_at
+        heapq.heappush(self.expiry_heap, (expires_at, alert_id))
+    
+    def evict_expired(self, now: float = None) -> List[dict]:
+        """Pop every alert whose expiry time has passed"""
+        now = now if now is not None else time.time()
+        expired = []
+        heap = self.expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, alert_id = heapq.heappop(heap)
+            alert = self.alerts.get(alert_id)
+            if alert is not None and alert['expires_at'] == expires_at:
+                expired.append(self.remove(alert_id))
+        return expired
+    
+    def next_expiry(self) -> Optional[float]:
+        """Earliest pending expiry time, skipping stale heap entries"""
+        heap = self.expiry_heap
+        while heap:
+            expires_at, alert_id = heap[0]
+            alert = self.alerts.get(alert_id)
+            if alert is not None and alert['expires_at'] == expires_at:
+                return expires_at
+            heapq.heappop(heap)
+        return None
+    
+    def nearby(self, latitude: float, longitude: float, radius_km: float = None) -> List[tuple]:
+        """
+        Find alerts near a point
         
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
+        Args:
+            radius_km: Search radius; when omitted each alert's own radius applies
         
-        return R * c <= radius_km
+        Returns:
+            List of (alert, distance_km) tuples
+        """
+        search_radius = radius_km if radius_km is not None else max(self.radius_counts, default=0)
+        matches = []
+        for alert_id, distance in self.location_index.query_radius(latitude, longitude, search_radius):
+            alert = self.alerts[alert_id]
+            if distance <= (radius_km or alert['radius_km']):
+                matches.append((alert, distance))
+        return matches
+    
+    @staticmethod
+    def serialize(alert: dict) -> dict:
+        """Public representation with ISO timestamps"""
+        public = dict(alert)
+        public['created_at'] = datetime.utcfromtimestamp(alert['created_at']).isoformat()
+        public['expires_at'] = datetime.utcfromtimestamp(alert['expires_at']).isoformat()
+        public['last_reported_at'] = datetime.utcfromtimestamp(alert['last_reported_at']).isoformat()
+        return public
 
 
 class RealTimeAlertService:
     """Member 3: Real-Time Alert System"""
     
-    def __init__(self):
+    def __init__(self, expiry_tick_seconds: float = 1.0, expiry_batch_size: int = 500,
+                 dedup_radius_km: float = None, dedup_window_seconds: float = None,
+                 update_flush_seconds: float = None):
         self.websocket_manager = WebSocketManager()
-        self.active_alerts: List[dict] = []
+        self.alert_store = AlertStore()
         self.alert_id_counter = 0
+        self.backplane = create_backplane()  # Fans alert state out to other workers
+        self.backplane_handlers: Dict[str, Callable[[dict], Awaitable[None]]] = {}  # Ops owned by other services
+        
+        # Reports of the same type close in space and time merge into one alert
+        self.dedup_radius_km = dedup_radius_km or float(os.getenv("ALERT_DEDUP_RADIUS_KM", 0.5))
+        self.dedup_window_seconds = dedup_window_seconds or float(os.getenv("ALERT_DEDUP_WINDOW_SECONDS", 600))
+        self.update_flush_seconds = update_flush_seconds or float(os.getenv("ALERT_UPDATE_FLUSH_SECONDS", 0.25))
+        self._pending_updates: Dict[int, dict] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self.merged_reports = 0
+        
+        # Expiry scheduler: one wakeup per tick, however many alerts expire in it
+        self.expiry_tick_seconds = expiry_tick_seconds
+        self.expiry_batch_size = expiry_batch_size
+        self._expiry_task: Optional[asyncio.Task] = None
+        self._expiry_wakeup: Optional[asyncio.Event] = None
+        self._next_expiry_wakeup: Optional[float] = None
+        self._expired_backlog: List[int] = []
+    
+    async def start_backplane(self):
+        """Connect to the cross-process backplane"""
+        await self.backplane.start(self._on_backplane_message, self._highest_alert_slot)
+    
+    async def stop_backplane(self):
+        await self.backplane.stop()
+    
+    def register_backplane_handler(self, op: str, handler: Callable[[dict], Awaitable[None]]):
+        """Let another service receive its own backplane messages"""
+        self.backplane_handlers[op] = handler
+    
+    async def _on_backplane_message(self, message: dict):
+        """Apply alert state and broadcasts published by another worker"""
+        op = message.get("op")
+        if op in self.backplane_handlers:
+            await self.backplane_handlers[op](message)
+            return
+        if op == "alert_created":
+            await self._apply_alert_created(message["alert"])
+        elif op == "alert_merged":
+            self._apply_alert_merged(message["alert"], message.get("added_reports", 1))
+        elif op == "alert_dismissed":
+            await self._apply_alert_dismissed(message["alert_id"])
+        elif op == "broadcast":
+            location = message.get("location")
+            await self.websocket_manager.broadcast(
+                message["message"], tuple(location) if location else None
+            )
+    
+    def _highest_alert_slot(self) -> int:
+        """Highest worker slot among the alert ids held here"""
+        return max((alert_id & 0xFFFF for alert_id in self.alert_store.alerts if alert_id > 0xFFFF), default=0)
+    
+    def _next_alert_id(self) -> int:
+        """Alert ids are unique across workers sharing a backplane"""
+        self.alert_id_counter += 1
+        slot = self.backplane.worker_slot
+        return (self.alert_id_counter << 16) | slot if slot else self.alert_id_counter
+    
+    def start_expiry_scheduler(self):
+        """Start the background task that expires alerts on time"""
+        if self._expiry_task is not None and not self._expiry_task.done():
+            return
+        self._expiry_wakeup = asyncio.Event()
+        self._expiry_task = asyncio.create_task(self._expiry_loop())
+    
+    async def stop_expiry_scheduler(self):
+        """Stop the expiry task"""
+        if self._expiry_task is None:
+            return
+        self._expiry_task.cancel()
+        try:
+            await self._expiry_task
+        except asyncio.CancelledError:
+            pass
+        self._expiry_task = None
+    
+    async def _expiry_loop(self):
+        """Sleep until the next expiry tick, then expire and announce in batches"""
+        tick = self.expiry_tick_seconds
+        while True:
+            next_expiry = self.alert_store.next_expiry()
+            if next_expiry is None:
+                self._next_expiry_wakeup = None
+                delay = None
+            else:
+                # Round up to the tick boundary so nearby expiries share a wakeup
+                self._next_expiry_wakeup = math.ceil(next_expiry / tick) * tick
+                delay = max(0.0, self._next_expiry_wakeup - time.time())
+            
+            # Always await, even when the expiry is already due (delay 0), so a
+            # run of due expiries cannot keep the loop from other tasks
+            self._expiry_wakeup.clear()
+            try:
+                async with asyncio.timeout(delay):
+                    await self._expiry_wakeup.wait()
+            except TimeoutError:
+                pass
+            
+            expired_ids = self._expired_backlog
+            self._expired_backlog = []
+            expired_ids.extend(a['id'] for a in self.alert_store.evict_expired())
+            
+            try:
+                await self._broadcast_expired(expired_ids)
+            except Exception as e:
+                print(f"Error broadcasting expired alerts: {e}")
+    
+    async def _broadcast_expired(self, alert_ids: List[int]):
+        """Announce expired alerts in batched frames"""
+        for i in range(0, len(alert_ids), self.expiry_batch_size):
+            batch = alert_ids[i:i + self.expiry_batch_size]
+            await self.websocket_manager.broadcast({
+                "event": "alert_expired",
+                "alert_ids": batch,
+                "count": len(batch)
+            })
+    
+    def _schedule_expiry(self, expires_at: float):
+        """Wake the scheduler early if an alert expires before its next tick"""
+        if self._expiry_task is None or self._expiry_task.done():
+            try:
+                self.start_expiry_scheduler()
+            except RuntimeError:
+                return  # No running event loop; get_active_alerts still evicts
+        elif self._next_expiry_wakeup is None or expires_at < self._next_expiry_wakeup:
+            self._expiry_wakeup.set()
     
     async def create_alert(self, alert_data: dict) -> dict:
         """
@@ -100,14 +1034,19 @@ class RealTimeAlertService:
             }
         
         Returns:
-            Created alert object
+            Created alert object, or the existing alert it was merged into
         """
-        self.alert_id_counter += 1
+        now = time.time()
+        duration = alert_data.get('duration_minutes', 60) * 60
         
-        duration = timedelta(minutes=alert_data.get('duration_minutes', 60))
+        duplicate = self._find_duplicate(alert_data, now)
+        if duplicate is not None:
+            merged = self._merge_alert(duplicate, alert_data, now + duration, now)
+            await self.backplane.publish({"op": "alert_merged", "alert": duplicate, "added_reports": 1})
+            return merged
         
         alert = {
-            "id": self.alert_id_counter,
+            "id": self._next_alert_id(),
             "type": alert_data['type'],
             "severity": alert_data['severity'],
             "location": {
@@ -115,21 +1054,108 @@ class RealTimeAlertService:
                 "longitude": alert_data['longitude']
             },
             "message": alert_data['message'],
-            "created_at": datetime.utcnow().isoformat(),
-            "expires_at": (datetime.utcnow() + duration).isoformat(),
+            "created_at": now,
+            "expires_at": now + duration,
             "radius_km": alert_data.get('radius_km', 10),
+            "report_count": 1,
+            "last_reported_at": now,
             "active": True,
             "icon": self._get_alert_icon(alert_data['type']),
             "color": self._get_alert_color(alert_data['severity'])
         }
         
-        # Store alert
-        self.active_alerts.append(alert)
+        public_alert = await self._apply_alert_created(alert)
+        await self.backplane.publish({"op": "alert_created", "alert": alert})
+        
+        return public_alert
+    
+    async def _apply_alert_created(self, alert: dict) -> dict:
+        """Store a new alert and broadcast it to local clients"""
+        self.alert_store.add(alert)
+        self._schedule_expiry(alert['expires_at'])
         
         # Broadcast to affected area
-        await self._broadcast_alert(alert)
+        public_alert = AlertStore.serialize(alert)
+        await self._broadcast_alert(public_alert)
         
-        return alert
+        return public_alert
+    
+    def _find_duplicate(self, alert_data: dict, now: float) -> Optional[dict]:
+        """Nearest active alert of the same type reported within the dedup window"""
+        candidates = [
+            (distance, alert)
+            for alert, distance in self.alert_store.nearby(
+                alert_data['latitude'], alert_data['longitude'], self.dedup_radius_km
+            )
+            if alert['type'] == alert_data['type']
+            and now - alert['last_reported_at'] <= self.dedup_window_seconds
+            and alert['expires_at'] > now
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda c: c[0])[1]
+    
+    def _merge_alert(self, alert: dict, alert_data: dict, expires_at: float, now: float) -> dict:
+        """Fold a repeat report into an existing alert and queue an update"""
+        alert['report_count'] += 1
+        alert['last_reported_at'] = now
+        
+        if ALERT_SEVERITY_RANK.get(alert_data['severity'], 0) > ALERT_SEVERITY_RANK.get(alert['severity'], 0):
+            alert['severity'] = alert_data['severity']
+            alert['color'] = self._get_alert_color(alert['severity'])
+            alert['message'] = alert_data['message']
+        
+        self.alert_store.extend_expiry(alert['id'], expires_at)
+        self.merged_reports += 1
+        self._queue_update(alert)
+        
+        return AlertStore.serialize(alert)
+    
+    def _apply_alert_merged(self, state: dict, added_reports: int):
+        """
+        Fold in a merge made by another worker
+        
+        Report counts add up, so merges made concurrently on several workers
+        are all counted; the latest report time and highest severity win.
+        """
+        alert = self.alert_store.get(state['id'])
+        if alert is None:
+            return
+        alert['report_count'] += added_reports
+        alert['last_reported_at'] = max(alert['last_reported_at'], state['last_reported_at'])
+        if ALERT_SEVERITY_RANK.get(state['severity'], 0) > ALERT_SEVERITY_RANK.get(alert['severity'], 0):
+            for field in ("severity", "color", "message"):
+                alert[field] = state[field]
+        self.alert_store.extend_expiry(alert['id'], state['expires_at'])
+        self._queue_update(alert)
+    
+    def _queue_update(self, alert: dict):
+        """Collect an alert update for the next batched flush"""
+        self._pending_updates[alert['id']] = alert
+        if self._flush_task is None or self._flush_task.done():
+            try:
+                self._flush_task = asyncio.create_task(self._flush_updates_later())
+            except RuntimeError:
+                pass  # No running event loop; nothing to broadcast to
+    
+    async def _flush_updates_later(self):
+        """Send the alert updates from the last interval as one frame per client"""
+        await asyncio.sleep(self.update_flush_seconds)
+        pending = self._pending_updates
+        self._pending_updates = {}
+        
+        updates = [AlertStore.serialize(a) for a in pending.values() if a['id'] in self.alert_store]
+        if not updates:
+            return
+        
+        areas = [
+            (a['location']['latitude'], a['location']['longitude'], a['radius_km'])
+            for a in updates
+        ]
+        try:
+            await self.websocket_manager.broadcast_batch("alert_updates", "updates", updates, areas)
+        except Exception as e:
+            print(f"Error broadcasting alert updates: {e}")
     
     async def _broadcast_alert(self, alert: dict):
         """Broadcast alert to clients in affected area"""
@@ -152,7 +1178,7 @@ class RealTimeAlertService:
             "alert_id": alert['id'],
             "type": alert['type'],
             "location": alert['location']
-        })
+        }, location=(alert['location']['latitude'], alert['location']['longitude']))
     
     def _get_alert_icon(self, alert_type: str) -> str:
         """Get icon for alert type"""
@@ -179,28 +1205,21 @@ class RealTimeAlertService:
     def get_active_alerts(self, latitude: float = None, longitude: float = None, 
                          radius_km: float = None) -> List[dict]:
         """Get active alerts, optionally filtered by location"""
-        # Cleanup expired alerts
-        self._cleanup_expired_alerts()
+        # Evict expired alerts the scheduler has not reached yet
+        expired = self.alert_store.evict_expired()
+        if expired and self._expiry_wakeup is not None:
+            self._expired_backlog.extend(a['id'] for a in expired)
+            self._expiry_wakeup.set()
         
         if latitude is None or longitude is None:
-            return [a for a in self.active_alerts if a['active']]
+            return [AlertStore.serialize(a) for a in self.alert_store.values()]
         
         # Filter by location
         nearby_alerts = []
-        for alert in self.active_alerts:
-            if not alert['active']:
-                continue
-            
-            distance = self._calculate_distance(
-                latitude, longitude,
-                alert['location']['latitude'],
-                alert['location']['longitude']
-            )
-            
-            if distance <= (radius_km or alert['radius_km']):
-                alert_copy = alert.copy()
-                alert_copy['distance_km'] = round(distance, 2)
-                nearby_alerts.append(alert_copy)
+        for alert, distance in self.alert_store.nearby(latitude, longitude, radius_km):
+            alert_copy = AlertStore.serialize(alert)
+            alert_copy['distance_km'] = round(distance, 2)
+            nearby_alerts.append(alert_copy)
         
         # Sort by severity and distance
         severity_order = {"critical": 0, "high": 1, "medium": 2, "low": 3}
@@ -208,57 +1227,78 @@ class RealTimeAlertService:
         
         return nearby_alerts
     
+    async def resume_client(self, websocket: WebSocket, resume_from: int, log_id: str = None):
+        """
+        Bring a reconnecting client up to date
+        
+        Replays missed events when the log still covers them; otherwise sends
+        one snapshot frame with every active alert.
+        """
+        manager = self.websocket_manager
+        replayed = manager.replay(websocket, resume_from, log_id)
+        
+        if replayed is None:
+            await manager.send_personal_message({
+                "event": "snapshot",
+                "seq": manager.event_log.seq,
+                "log_id": manager.event_log.log_id,
+                "data": {
+                    "alerts": self.get_active_alerts(),
+                    "reports_stale": True  # Accident reports must be re-fetched
+                }
+            }, websocket)
+            return
+        
+        await manager.send_personal_message({
+            "event": "resume_complete",
+            "replayed": replayed,
+            "seq": manager.event_log.seq,
+            "log_id": manager.event_log.log_id
+        }, websocket)
+    
     async def dismiss_alert(self, alert_id: int):
         """Dismiss an alert"""
-        for alert in self.active_alerts:
-            if alert['id'] == alert_id:
-                alert['active'] = False
-                
-                # Broadcast dismissal
-                await self.websocket_manager.broadcast({
-                    "event": "alert_dismissed",
-                    "alert_id": alert_id
-                })
-                
-                return True
-        return False
-    
-    def _cleanup_expired_alerts(self):
-        """Remove expired alerts"""
-        now = datetime.utcnow()
-        for alert in self.active_alerts:
-            expires_at = datetime.fromisoformat(alert['expires_at'])
-            if now > expires_at:
-                alert['active'] = False
-    
-    def _calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-        """Calculate distance in km"""
-        import math
+        if not await self._apply_alert_dismissed(alert_id):
+            return False
         
-        R = 6371
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
+        await self.backplane.publish({"op": "alert_dismissed", "alert_id": alert_id})
+        return True
+    
+    async def _apply_alert_dismissed(self, alert_id: int) -> bool:
+        alert = self.alert_store.remove(alert_id)
+        if alert is None:
+            return False
         
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
+        # Broadcast dismissal
+        await self.websocket_manager.broadcast({
+            "event": "alert_dismissed",
+            "alert_id": alert_id
+        }, location=(alert['location']['latitude'], alert['location']['longitude']))
         
-        return R * c
+        return True
     
     async def broadcast_accident_report(self, report: dict):
         """Broadcast new accident report to all clients"""
-        await self.websocket_manager.broadcast({
+        location = None
+        if report.get('latitude') is not None and report.get('longitude') is not None:
+            location = (report['latitude'], report['longitude'])
+        await self._broadcast_everywhere({
             "event": "new_accident",
             "data": report
-        })
+        }, location)
     
     async def broadcast_system_update(self, update_type: str, data: dict):
         """Broadcast system updates"""
-        await self.websocket_manager.broadcast({
+        await self._broadcast_everywhere({
             "event": "system_update",
             "type": update_type,
             "data": data
         })
+    
+    async def _broadcast_everywhere(self, message: dict, location: Optional[tuple] = None):
+        """Broadcast to local clients and to every other worker's clients"""
+        await self.websocket_manager.broadcast(message, location)
+        await self.backplane.publish({"op": "broadcast", "message": message, "location": location})
 
 # Global instance
 realtime_service = RealTimeAlertService()
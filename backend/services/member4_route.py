@@ -1,7 +1,22 @@
 import math
+from collections import Counter, defaultdict
 from typing import List, Dict, Tuple
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from utils.distance import get_bounding_box, points_near_segments, split_path
+from utils.risk_calculator import RiskScoreCalculator
+from services.accident_index import AccidentIndex
+from services.risk_raster import SEVERITY_WEIGHTS, risk_raster
+from services.route_history import route_history
+
+# UTC hours covered by each time_of_day label (as assigned in reporting_routes)
+TIME_OF_DAY_HOURS = {
+    "Morning": range(6, 12),
+    "Afternoon": range(12, 17),
+    "Evening": range(17, 21),
+    "Night": [21, 22, 23, 0, 1, 2, 3, 4, 5]
+}
 
 class RouteAnalysisService:
     """Member 4: Route Safety Analysis"""
@@ -9,8 +24,10 @@ class RouteAnalysisService:
     def __init__(self):
         self.high_risk_threshold = 60  # Risk score threshold for high-risk zones
         self.zone_radius = 0.5  # km radius for risk zones
+        self.average_speed_kmh = 40  # Trip duration estimate when none is given
     
-    async def analyze_route(self, route_data: dict, historical_data: List[dict] = None) -> dict:
+    async def analyze_route(self, route_data: dict, historical_data: List[dict] = None,
+                            index: AccidentIndex = None, columns: List[str] = None) -> dict:
         """
         Analyze safety of a route between origin and destination
         
@@ -23,12 +40,17 @@ class RouteAnalysisService:
                 'duration_minutes': float
             }
             historical_data: List of historical accidents/incidents
+            index: Accident index to query per segment corridor instead of
+                historical_data (e.g. the process-wide accident_index)
+            columns: Accident fields included in the results when querying index
         
         Returns:
             Comprehensive route safety analysis
         """
         # Extract route points
         route_points = self._extract_route_points(route_data)
+        historical_data = historical_data or []
+        nearby_by_segment = self._find_nearby_by_segment(route_points, historical_data, index, columns)
         
         # Analyze each segment
         segment_analyses = []
@@ -39,7 +61,7 @@ class RouteAnalysisService:
             start = route_points[i]
             end = route_points[i + 1]
             
-            segment_analysis = self._analyze_segment(start, end, historical_data or [])
+            segment_analysis = self._analyze_segment(start, end, historical_data, nearby_by_segment[i])
             segment_analyses.append(segment_analysis)
             total_risk_score += segment_analysis['risk_score']
             
@@ -66,7 +88,7 @@ class RouteAnalysisService:
             alternatives = self._suggest_alternatives(route_points, high_risk_zones)
         
         # Create hotspots from high-risk zones with accident data
-        hotspots = self._create_hotspots(route_points, historical_data or [])
+        hotspots = self._create_hotspots(route_points, historical_data, index, columns)
         
         # Determine safety level
         if avg_risk_score < 20:
@@ -99,28 +121,65 @@ class RouteAnalysisService:
             }
         }
     
-    def _create_hotspots(self, route_points: List[dict], historical_data: List[dict]) -> List[dict]:
-        """Create hotspot data from accidents near route"""
+    def _create_hotspots(self, route_points: List[dict], historical_data: List[dict],
+                         index: AccidentIndex = None, columns: List[str] = None) -> List[dict]:
+        """
+        Create hotspot data from accidents near route
+        
+        Route points are grouped by 0.01° cell and each cell with 2+
+        accidents within reach of its points becomes one hotspot, placed at
+        the cell's first route point. Cells are taken in route order and a
+        cell is skipped when an earlier hotspot lies within 0.01° in both
+        axes, so neighbouring cells do not yield near-duplicate hotspots.
+        Candidates come from index (one box query per cell) when given,
+        else from historical_data.
+        """
         hotspots = []
-        
-        # Find all accidents within radius of any route point
+        radius = self.zone_radius * 2  # Wider radius for hotspot detection
+        if index is None:
+            if len(historical_data) < 2:
+                return hotspots
+            lats = np.array([a.get('latitude', 0) for a in historical_data], dtype=float)
+            lngs = np.array([a.get('longitude', 0) for a in historical_data], dtype=float)
+        
+        points_by_cell = defaultdict(list)
         for point in route_points:
-            nearby_accidents = []
-            
-            for accident in historical_data:
-                distance = self._calculate_distance(
-                    point['latitude'], point['longitude'],
-                    accident.get('latitude', 0), accident.get('longitude', 0)
-                )
-                
-                if distance <= self.zone_radius * 2:  # Wider radius for hotspot detection
-                    nearby_accidents.append(accident)
+            points_by_cell[(math.floor(point['latitude'] / 0.01), math.floor(point['longitude'] / 0.01))].append(point)
+        kept_by_cell = defaultdict(list)
+        
+        for (row, col), points in points_by_cell.items():
+            anchor = points[0]
+            if any(
+                abs(anchor['latitude'] - kept['latitude']) < 0.01 and abs(anchor['longitude'] - kept['longitude']) < 0.01
+                for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+                for kept in kept_by_cell.get((row + dr, col + dc), ())
+            ):
+                continue
+            min_lat, min_lng, max_lat, max_lng = self._padded_bbox(points, radius)
+            if index is not None:
+                records = index.query_records([(min_lat, min_lng, max_lat, max_lng)])
+                candidate_lats = np.array([r[0] for _, r in records], dtype=float)
+                candidate_lngs = np.array([r[1] for _, r in records], dtype=float)
+                incident_at = lambda i: index.as_dict(records[i][1], columns)
+            else:
+                in_box = np.flatnonzero((lats >= min_lat) & (lats <= max_lat) & (lngs >= min_lng) & (lngs <= max_lng))
+                candidate_lats, candidate_lngs = lats[in_box], lngs[in_box]
+                incident_at = lambda i: historical_data[in_box[i]]
+            if len(candidate_lats) < 2:
+                continue
+            point_lats = [p['latitude'] for p in points]
+            point_lngs = [p['longitude'] for p in points]
+            rows, _, _ = points_near_segments(
+                candidate_lats, candidate_lngs, point_lats, point_lngs, point_lats, point_lngs, radius
+            )
+            nearby_accidents = [incident_at(i) for i in np.unique(rows)]
             
             if len(nearby_accidents) >= 2:  # Only create hotspot if 2+ accidents
                 # Count by severity
-                fatal_count = sum(1 for a in nearby_accidents if a.get('severity') == 'Fatal')
-                serious_count = sum(1 for a in nearby_accidents if a.get('severity') == 'Major')
-                minor_count = sum(1 for a in nearby_accidents if a.get('severity') == 'Minor')
+                severities = Counter(a.get('severity') for a in nearby_accidents)
+                fatal_count = severities['Fatal']
+                serious_count = severities['Major']
+                minor_count = severities['Minor']
                 
                 # Determine risk level
                 if fatal_count > 0:
@@ -133,15 +192,12 @@ class RouteAnalysisService:
                     risk_level = "Low"
                 
                 # Get common weather and road conditions
-                weather_list = [a.get('weather', 'Unknown') for a in nearby_accidents]
-                road_list = [a.get('road_condition', 'Unknown') for a in nearby_accidents]
-                
-                common_weather = max(set(weather_list), key=weather_list.count) if weather_list else 'N/A'
-                common_road = max(set(road_list), key=road_list.count) if road_list else 'N/A'
+                common_weather = Counter(a.get('weather', 'Unknown') for a in nearby_accidents).most_common(1)[0][0]
+                common_road = Counter(a.get('road_condition', 'Unknown') for a in nearby_accidents).most_common(1)[0][0]
                 
-                hotspots.append({
-                    "latitude": point['latitude'],
-                    "longitude": point['longitude'],
+                hotspot = {
+                    "latitude": anchor['latitude'],
+                    "longitude": anchor['longitude'],
                     "accident_count": len(nearby_accidents),
                     "fatal_count": fatal_count,
                     "serious_count": serious_count,
@@ -149,21 +205,63 @@ class RouteAnalysisService:
                     "risk_level": risk_level,
                     "common_weather": common_weather,
                     "common_road_condition": common_road
-                })
+                }
+                hotspots.append(hotspot)
+                kept_by_cell[(row, col)].append(hotspot)
+        
+        return hotspots
+    
+    def get_query_boxes(self, route_data: dict, padding_km: float = None,
+                        max_boxes: int = 32) -> List[Tuple[float, float, float, float]]:
+        """
+        Bounding boxes that contain every accident the analysis can use
+        
+        One padded box per run of consecutive segments, so a long diagonal
+        route does not pull in the whole rectangle between its endpoints.
+        
+        Args:
+            padding_km: Margin around the route; defaults to the widest
+                radius used by the analysis (hotspot detection)
+            max_boxes: Upper bound on boxes, merging adjacent segments
+        
+        Returns:
+            List of (min_lat, min_lng, max_lat, max_lng)
+        """
+        if padding_km is None:
+            padding_km = self.zone_radius * 2
+        
+        points = self._extract_route_points(route_data)
+        segments = max(len(points) - 1, 1)
+        per_box = math.ceil(segments / max_boxes)
         
-        # Remove duplicate hotspots (same location)
-        unique_hotspots = []
-        for hotspot in hotspots:
-            is_duplicate = False
-            for existing in unique_hotspots:
-                if abs(hotspot['latitude'] - existing['latitude']) < 0.01 and \
-                   abs(hotspot['longitude'] - existing['longitude']) < 0.01:
-                    is_duplicate = True
-                    break
-            if not is_duplicate:
-                unique_hotspots.append(hotspot)
-        
-        return unique_hotspots
+        return [
+            self._padded_bbox(points[i:i + per_box + 1], padding_km)
+            for i in range(0, segments, per_box)
+        ]
+    
+    def _padded_bbox(self, points: List[dict], padding_km: float) -> Tuple[float, float, float, float]:
+        """Bounding box of some points, grown by padding_km on every side"""
+        lats = [p['latitude'] for p in points]
+        lngs = [p['longitude'] for p in points]
+        # Pad at the latitude farthest from the equator, where a km of
+        # longitude spans the most degrees
+        widest = max(lats, key=abs)
+        south, west, _, _ = get_bounding_box(widest, 0.0, padding_km)
+        lat_pad, lng_pad = widest - south, -west
+        return (min(lats) - lat_pad, min(lngs) - lng_pad, max(lats) + lat_pad, max(lngs) + lng_pad)
+    
+    def simplify_path(self, path: List[dict], max_points: int = 64) -> List[dict]:
+        """
+        Interior points of a path, thinned to at most max_points
+        
+        Road-graph paths have a vertex every intersection; analysis only
+        needs enough of them to follow the road.
+        """
+        interior = path[1:-1]
+        if len(interior) <= max_points:
+            return interior
+        step = len(interior) / max_points
+        return [interior[int(i * step)] for i in range(max_points)]
     
     def _extract_route_points(self, route_data: dict) -> List[dict]:
         """Extract ordered list of points along route"""
@@ -181,7 +279,8 @@ class RouteAnalysisService:
         
         return points
     
-    def _analyze_segment(self, start: dict, end: dict, historical_data: List[dict]) -> dict:
+    def _analyze_segment(self, start: dict, end: dict, historical_data: List[dict],
+                         nearby_incidents: List[dict] = None) -> dict:
         """Analyze safety of a route segment"""
         # Calculate segment length
         segment_length = self._calculate_distance(
@@ -189,21 +288,17 @@ class RouteAnalysisService:
             end['latitude'], end['longitude']
         )
         
-        # Find nearby incidents
-        nearby_incidents = self._find_nearby_incidents(start, end, historical_data)
+        # Find nearby incidents unless already computed for the whole route
+        if nearby_incidents is None:
+            nearby_incidents = self._find_nearby_incidents(start, end, historical_data)
         
-        # Calculate risk score based on incident density
+        # Calculate risk score based on incident density and severity
         incident_density = len(nearby_incidents) / max(segment_length, 0.1)
-        base_risk_score = min(incident_density * 20, 80)
-        
-        # Adjust for severity of incidents
-        severity_weights = {"Minor": 1, "Major": 2, "Fatal": 3}
-        severity_adjustment = sum(
-            severity_weights.get(inc.get('severity', 'Minor'), 1) 
+        severity_weight = sum(
+            SEVERITY_WEIGHTS.get(inc.get('severity', 'Minor'), 1)
             for inc in nearby_incidents
-        ) * 5
-        
-        risk_score = min(base_risk_score + severity_adjustment, 100)
+        )
+        risk_score = self._segment_risk_score(len(nearby_incidents), severity_weight, segment_length)
         
         # Identify risk factors
         risk_factors = []
@@ -231,55 +326,312 @@ class RouteAnalysisService:
             "incidents": nearby_incidents[:5]  # Top 5 nearest incidents
         }
     
-    def _find_nearby_incidents(self, start: dict, end: dict, incidents: List[dict]) -> List[dict]:
-        """Find incidents near a route segment"""
-        nearby = []
+    def _segment_risk_score(self, incident_count: int, severity_weight: int, segment_length: float) -> float:
+        """Risk score (0-100) from incident density plus severity weighting"""
+        incident_density = incident_count / max(segment_length, 0.1)
+        base_risk_score = min(incident_density * 20, 80)
+        return min(base_risk_score + severity_weight * 5, 100)
+    
+    def score_route(self, route_data: dict) -> dict:
+        """
+        Score route segments from the precomputed risk raster
         
-        for incident in incidents:
-            # Calculate distance from incident to segment
-            distance = self._point_to_segment_distance(
-                incident.get('latitude', 0), incident.get('longitude', 0),
+        Uses the same formula as _analyze_segment, but counts incidents by
+        summing raster cells along each segment's corridor, so the cost
+        grows with route length only. No per-incident details are returned.
+        """
+        route_points = self._extract_route_points(route_data)
+        segments = []
+        for start, end in zip(route_points[:-1], route_points[1:]):
+            segment_length = self._calculate_distance(
                 start['latitude'], start['longitude'],
                 end['latitude'], end['longitude']
             )
-            
-            if distance <= self.zone_radius:
-                incident_copy = incident.copy()
-                incident_copy['distance_to_route_km'] = round(distance, 3)
-                nearby.append(incident_copy)
+            incident_count, severity_weight = risk_raster.segment_totals(
+                start['latitude'], start['longitude'],
+                end['latitude'], end['longitude'],
+                self.zone_radius
+            )
+            risk_score = self._segment_risk_score(incident_count, severity_weight, segment_length)
+            segments.append({
+                "start": start,
+                "end": end,
+                "distance_km": round(segment_length, 2),
+                "risk_score": round(risk_score, 2),
+                "is_high_risk": risk_score >= self.high_risk_threshold,
+                "incident_count": incident_count
+            })
+        
+        avg_risk_score = sum(s['risk_score'] for s in segments) / len(segments) if segments else 0
+        return {
+            "safety_analysis": {
+                "overall_risk_score": round(avg_risk_score / 10, 2),  # Scale to 0-10
+                "safety_score": round(max(0, 100 - avg_risk_score), 2),
+                "high_risk_zones": sum(1 for s in segments if s['is_high_risk'])
+            },
+            "segment_analysis": segments
+        }
+    
+    def risk_profile(self, route_data: dict, historical_data: List[dict] = None,
+                     spacing_km: float = 1.0) -> dict:
+        """
+        Risk along a route in fixed-length intervals
+        
+        The route is cut into spacing_km intervals (following its waypoints)
+        and every interval is scored with the _analyze_segment formula from
+        the accidents within zone_radius of it, all in one vectorized pass.
+        Long straight segments get a real profile instead of one average.
+        
+        Returns:
+            {
+                'spacing_km', 'total_distance_km',
+                'risk': [score per interval, 0-100],
+                'incidents': [accident count per interval],
+                'flagged': [{'start_km', 'end_km', 'max_risk', 'incidents'}, ...]
+            }
+            where flagged merges consecutive high-risk intervals
+        """
+        risk, counts, bin_lengths = self._interval_risk(route_data, historical_data, spacing_km)
+        
+        flagged = []
+        high = risk >= self.high_risk_threshold
+        for i in np.flatnonzero(high):
+            if flagged and flagged[-1]['last'] == i - 1:
+                run = flagged[-1]
+            else:
+                run = {'first': i, 'max_risk': 0.0, 'incidents': 0}
+                flagged.append(run)
+            run['last'] = i
+            run['max_risk'] = max(run['max_risk'], float(risk[i]))
+            run['incidents'] += int(counts[i])
+        
+        ends = np.cumsum(bin_lengths)
+        return {
+            "spacing_km": spacing_km,
+            "total_distance_km": round(float(ends[-1]), 2),
+            "risk": np.round(risk, 1).tolist(),
+            "incidents": counts.astype(int).tolist(),
+            "flagged": [
+                {
+                    "start_km": round(float(ends[run['first']] - bin_lengths[run['first']]), 2),
+                    "end_km": round(float(ends[run['last']]), 2),
+                    "max_risk": round(run['max_risk'], 1),
+                    "incidents": run['incidents']
+                }
+                for run in flagged
+            ]
+        }
+    
+    def _interval_risk(self, route_data: dict, historical_data: List[dict],
+                       spacing_km: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Risk score, accident count and length (km) of each spacing_km interval
+        
+        The last interval is usually shorter than spacing_km.
+        """
+        route_points = self._extract_route_points(route_data)
+        historical_data = historical_data or []
+        start_lats, start_lngs, end_lats, end_lngs, piece_bins, bin_lengths = split_path(
+            [p['latitude'] for p in route_points], [p['longitude'] for p in route_points], spacing_km
+        )
+        bins = len(bin_lengths)
+        counts = np.zeros(bins)
+        weights = np.zeros(bins)
+        
+        if historical_data and len(piece_bins):
+            lats = np.array([a.get('latitude', 0) for a in historical_data], dtype=float)
+            lngs = np.array([a.get('longitude', 0) for a in historical_data], dtype=float)
+            candidates = np.flatnonzero(self._corridor_mask(
+                lats, lngs, start_lats, start_lngs, end_lats, end_lngs, self.zone_radius
+            ))
+            rows, cols, _ = points_near_segments(
+                lats[candidates], lngs[candidates],
+                start_lats, start_lngs, end_lats, end_lngs,
+                self.zone_radius
+            )
+            # An accident near several pieces of one interval counts once there
+            pairs = np.unique(candidates[rows] * bins + piece_bins[cols])
+            accident_rows, accident_bins = pairs // bins, pairs % bins
+            severity_weights = np.array([
+                SEVERITY_WEIGHTS.get(a.get('severity', 'Minor'), 1) for a in historical_data
+            ])
+            counts = np.bincount(accident_bins, minlength=bins).astype(float)
+            weights = np.bincount(accident_bins, weights=severity_weights[accident_rows], minlength=bins)
+        
+        # Same formula as _segment_risk_score, for every interval at once
+        density = counts / np.maximum(bin_lengths, 0.1)
+        risk = np.minimum(np.minimum(density * 20, 80) + weights * 5, 100)
+        return risk, counts, bin_lengths
+    
+    def departure_sweep(self, route_data: dict, historical_data: List[dict] = None,
+                        slot_minutes: int = 60, hours: int = 24, start: datetime = None) -> dict:
+        """
+        Route risk for every departure slot over the coming hours
+        
+        The route's risk profile is computed once; each departure then
+        weights the km the driver is on at each moment by an hourly factor.
+        That factor blends the time_of_day distribution of the route's own
+        accidents with RiskScoreCalculator.calculate_time_risk, trusting the
+        local data more as it grows. All slots x intervals are scored at once.
+        
+        Args:
+            route_data: Route as for analyze_route; duration_minutes or
+                distance_km sets the trip length (else average_speed_kmh)
+            slot_minutes: Spacing between candidate departures
+            hours: Horizon to sweep
+            start: First candidate departure; defaults to the next slot (UTC)
+        
+        Returns:
+            Risk curve, best departure windows and the data behind the factor
+        """
+        historical_data = historical_data or []
+        interval_risk, _, interval_lengths = self._interval_risk(route_data, historical_data, spacing_km=1.0)
+        route_km = float(interval_lengths.sum())
+        
+        trip_minutes = route_data.get('duration_minutes') or (
+            (route_data.get('distance_km') or route_km) / self.average_speed_kmh * 60
+        )
+        
+        # Hourly factor, averaging 1 over the day
+        counts = Counter(a.get('time_of_day') for a in historical_data)
+        local_rate = np.zeros(24)
+        for label, label_hours in TIME_OF_DAY_HOURS.items():
+            for hour in label_hours:
+                # One pseudo-accident per hour keeps sparse data near uniform
+                local_rate[hour] = (counts.get(label, 0) + len(label_hours)) / len(label_hours)
+        local_rate /= local_rate.mean()
+        prior = np.array([RiskScoreCalculator.calculate_time_risk(h) for h in range(24)])
+        prior /= prior.mean()
+        known = sum(counts.get(label, 0) for label in TIME_OF_DAY_HOURS)
+        trust = known / (known + 20)
+        hourly_factor = trust * local_rate + (1 - trust) * prior
+        
+        # Minute offset at which the driver reaches the middle of each interval
+        total_km = max(route_km, 1e-9)
+        middles = np.cumsum(interval_lengths) - interval_lengths / 2
+        offsets = middles / total_km * trip_minutes
+        
+        if start is None:
+            now = datetime.utcnow()
+            start = now.replace(second=0, microsecond=0) + timedelta(
+                minutes=-(now.minute % slot_minutes) + slot_minutes
+            )
+        slots = int(hours * 60 // slot_minutes)
+        departures = start.hour * 60 + start.minute + np.arange(slots) * slot_minutes
+        hours_on_route = ((departures[:, None] + offsets[None, :]) // 60).astype(int) % 24
+        weighted = np.minimum(interval_risk[None, :] * hourly_factor[hours_on_route], 100)
+        # A zero-length route has one empty interval; use its risk unweighted
+        lengths = interval_lengths if route_km > 0 else np.ones_like(interval_lengths)
+        risk = (weighted * lengths).sum(axis=1) / lengths.sum()
+        
+        times = [start + timedelta(minutes=int(m)) for m in np.arange(slots) * slot_minutes]
+        return {
+            "trip_minutes": round(float(trip_minutes), 1),
+            "slot_minutes": slot_minutes,
+            "curve": [
+                {"departure": t.isoformat(), "risk_score": round(float(r), 1)}
+                for t, r in zip(times, risk)
+            ],
+            "best_windows": self._best_departure_windows(times, risk, slot_minutes),
+            "hourly_factor": np.round(hourly_factor, 2).tolist(),
+            "time_of_day_distribution": {label: counts.get(label, 0) for label in TIME_OF_DAY_HOURS}
+        }
+    
+    def _best_departure_windows(self, times: List[datetime], risk: np.ndarray,
+                                slot_minutes: int, limit: int = 3) -> List[dict]:
+        """Runs of consecutive slots within 10% (of the curve's range) of the lowest risk"""
+        threshold = risk.min() + 0.1 * (risk.max() - risk.min())
+        windows = []
+        for i in np.flatnonzero(risk <= threshold):
+            if windows and windows[-1]['last'] == i - 1:
+                windows[-1]['last'] = i
+            else:
+                windows.append({'first': i, 'last': i})
+        windows = [
+            {
+                "depart_from": times[w['first']].isoformat(),
+                "depart_until": (times[w['last']] + timedelta(minutes=slot_minutes)).isoformat(),
+                "average_risk": round(float(risk[w['first']:w['last'] + 1].mean()), 1)
+            }
+            for w in windows
+        ]
+        return sorted(windows, key=lambda w: w['average_risk'])[:limit]
+    
+    def _corridor_mask(self, lats: np.ndarray, lngs: np.ndarray,
+                       start_lats: np.ndarray, start_lngs: np.ndarray,
+                       end_lats: np.ndarray, end_lngs: np.ndarray,
+                       radius_km: float, cell_size_deg: float = 0.01) -> np.ndarray:
+        """Points lying in a grid cell touched by some segment's padded box"""
+        columns = math.ceil(360 / cell_size_deg) + 1
+        corridor = set()
+        for segment in zip(start_lats, start_lngs, end_lats, end_lngs):
+            min_lat, min_lng, max_lat, max_lng = self._padded_bbox([
+                {'latitude': segment[0], 'longitude': segment[1]},
+                {'latitude': segment[2], 'longitude': segment[3]}
+            ], radius_km)
+            for row in range(math.floor((min_lat + 90) / cell_size_deg), math.floor((max_lat + 90) / cell_size_deg) + 1):
+                first = row * columns
+                corridor.update(range(
+                    first + math.floor((min_lng + 180) / cell_size_deg),
+                    first + math.floor((max_lng + 180) / cell_size_deg) + 1
+                ))
+        keys = (np.floor((lats + 90) / cell_size_deg) * columns + np.floor((lngs + 180) / cell_size_deg)).astype(np.int64)
+        return np.isin(keys, np.fromiter(corridor, dtype=np.int64))
+    
+    def _find_nearby_incidents(self, start: dict, end: dict, incidents: List[dict]) -> List[dict]:
+        """Find incidents near a route segment"""
+        return self._find_nearby_by_segment([start, end], incidents)[0]
+    
+    def _find_nearby_by_segment(self, route_points: List[dict], incidents: List[dict],
+                                index: AccidentIndex = None, columns: List[str] = None) -> List[List[dict]]:
+        """
+        Find incidents within zone_radius of each route segment
+        
+        With an index, candidates are the accidents in each segment's corridor
+        box; otherwise every incident is a candidate. Distances for all
+        candidates against all segments are computed in one vectorized pass
+        (see utils.distance.point_to_segments_distance).
+        
+        Returns:
+            One list per segment of incident copies with 'distance_to_route_km',
+            sorted by that distance
+        """
+        starts, ends = route_points[:-1], route_points[1:]
+        nearby = [[] for _ in starts]
+        
+        # Only accidents in some segment's corridor box can be within range
+        if index is not None:
+            records = index.query_records([
+                self._padded_bbox([start, end], self.zone_radius) for start, end in zip(starts, ends)
+            ])
+            candidate_lats = [r[0] for _, r in records]
+            candidate_lngs = [r[1] for _, r in records]
+            incident_at = lambda row: index.as_dict(records[row][1], columns)
+        else:
+            candidate_lats = [i.get('latitude', 0) for i in incidents]
+            candidate_lngs = [i.get('longitude', 0) for i in incidents]
+            incident_at = lambda row: incidents[row].copy()
+        if not nearby or not candidate_lats:
+            return nearby
+        
+        rows, cols, distances = points_near_segments(
+            candidate_lats, candidate_lngs,
+            [p['latitude'] for p in starts], [p['longitude'] for p in starts],
+            [p['latitude'] for p in ends], [p['longitude'] for p in ends],
+            self.zone_radius
+        )
+        
+        for row, col, distance in zip(rows.tolist(), cols.tolist(), distances.tolist()):
+            incident_copy = incident_at(row)
+            incident_copy['distance_to_route_km'] = round(distance, 3)
+            nearby[col].append(incident_copy)
         
         # Sort by distance to route
-        nearby.sort(key=lambda x: x['distance_to_route_km'])
+        for segment_incidents in nearby:
+            segment_incidents.sort(key=lambda x: x['distance_to_route_km'])
         
         return nearby
     
-    def _point_to_segment_distance(self, px: float, py: float, 
-                                   x1: float, y1: float, 
-                                   x2: float, y2: float) -> float:
-        """Calculate minimum distance from point to line segment"""
-        # Convert to approximate cartesian coordinates
-        px_cart, py_cart = px, py
-        x1_cart, y1_cart = x1, y1
-        x2_cart, y2_cart = x2, y2
-        
-        # Vector from start to end
-        dx = x2_cart - x1_cart
-        dy = y2_cart - y1_cart
-        
-        if dx == 0 and dy == 0:
-            # Segment is a point
-            return self._calculate_distance(px, py, x1, y1)
-        
-        # Parameter t for projection
-        t = max(0, min(1, ((px_cart - x1_cart) * dx + (py_cart - y1_cart) * dy) / (dx * dx + dy * dy)))
-        
-        # Closest point on segment
-        closest_x = x1_cart + t * dx
-        closest_y = y1_cart + t * dy
-        
-        # Distance to closest point
-        return self._calculate_distance(px, py, closest_x, closest_y)
-    
     def _calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate distance in km using Haversine formula"""
         R = 6371  # Earth's radius in km
@@ -398,15 +750,9 @@ class RouteAnalysisService:
         
         return alternatives
     
-    def get_route_statistics(self, start_date: datetime, end_date: datetime) -> dict:
-        """Get route analysis statistics for a time period"""
-        # This would query the database for actual statistics
-        return {
-            "total_routes_analyzed": 0,
-            "average_safety_score": 0,
-            "high_risk_routes": 0,
-            "most_common_risk_factors": []
-        }
+    def get_route_statistics(self, db, start_date: datetime, end_date: datetime) -> dict:
+        """Get route analysis statistics for a time period (from the daily rollups)"""
+        return route_history.get_statistics(db, start_date.date(), end_date.date())
 
 # Global instance
 route_service = RouteAnalysisService()
\ No newline at end of file
@@ -0,0 +1,82 @@
+from typing import Optional, Tuple
+
+from models.database import AccidentReport
+from services.accident_index import accident_index, INDEXED_COLUMNS
+from services.member3_realtime import realtime_service, RealTimeAlertService
+from services.risk_raster import risk_raster
+from services.road_graph import road_graph
+from services.route_cache import route_cache
+
+
+class ReportSyncService:
+    """
+    Keeps every worker's in-process accident data in step with the database
+
+    The accident index, risk raster, road graph risk and route cache version
+    live in each worker process. The worker that handles a report change
+    applies it locally and publishes it on the realtime service's backplane;
+    every other worker applies the same change when the message arrives, so
+    no worker keeps serving analyses from before the change. Changes made
+    while a worker is disconnected from the backplane are not replayed; it
+    catches up when it next restarts.
+    """
+
+    def __init__(self, realtime: RealTimeAlertService):
+        self.realtime = realtime
+        self.published = 0
+        self.applied = 0
+        for op in ("report_created", "report_deleted", "report_changed"):
+            realtime.register_backplane_handler(op, self.apply_remote)
+
+    async def report_created(self, report: AccidentReport):
+        """A report was saved: index it here and on every other worker"""
+        record = [getattr(report, c) for c in INDEXED_COLUMNS]
+        self._apply({"op": "report_created", "report_id": report.id, "record": record})
+        await self._publish({"op": "report_created", "report_id": report.id, "record": record})
+
+    async def report_deleted(self, report_id: int, location: Tuple[float, float, str]):
+        """
+        A report was deleted everywhere
+
+        Args:
+            location: (latitude, longitude, severity) of the deleted report
+        """
+        message = {"op": "report_deleted", "report_id": report_id, "location": list(location)}
+        self._apply(message)
+        await self._publish(message)
+
+    async def report_changed(self, report_id: Optional[int] = None):
+        """A report changed in a way that affects analyses (e.g. verification)"""
+        message = {"op": "report_changed", "report_id": report_id}
+        self._apply(message)
+        await self._publish(message)
+
+    async def apply_remote(self, message: dict):
+        """Backplane handler for changes made on another worker"""
+        self._apply(message)
+
+    def get_stats(self) -> dict:
+        return {"published": self.published, "applied": self.applied}
+
+    def _apply(self, message: dict):
+        op = message["op"]
+        if op == "report_created":
+            record = tuple(message["record"])
+            latitude, longitude, severity = record[0], record[1], record[2]
+            accident_index.add_record(message["report_id"], record)
+            risk_raster.add(latitude, longitude, severity)
+            road_graph.add_accident(latitude, longitude, severity)
+        elif op == "report_deleted":
+            accident_index.remove(message["report_id"])
+            risk_raster.remove(*message["location"])
+            road_graph.remove_accident(*message["location"])
+        route_cache.bump_version()
+        self.applied += 1
+
+    async def _publish(self, message: dict):
+        await self.realtime.backplane.publish(message)
+        self.published += 1
+
+
+# Global instance
+report_sync = ReportSyncService(realtime_service)
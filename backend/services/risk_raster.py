@@ -0,0 +1,283 @@
+import fcntl
+import glob
+import json
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models.database import AccidentReport
+from utils.distance import get_bounding_box, haversine_distance, point_to_segments_distance
+
+# Same weights as RouteAnalysisService._analyze_segment; unknown severities count as Minor
+SEVERITY_WEIGHTS = {"Minor": 1, "Major": 2, "Fatal": 3}
+TILE_SIZE = 256  # Cells per tile side
+
+
+class RiskRaster:
+    """
+    Fixed-resolution grid of accident counts and severity weights
+
+    The world is cut into `cell_size_deg` cells, stored in 256x256 tiles
+    that are only allocated where accidents exist. Each tile is an int32
+    array of shape (2, 256, 256): layer 0 counts accidents, layer 1 sums
+    their severity weights.
+
+    With RISK_RASTER_DIR set, tiles are memory-mapped .npy files in a
+    risk_raster_<cell size> subdirectory there (nothing else in
+    RISK_RASTER_DIR is touched) and persist across restarts: a manifest
+    records the database version the tiles were saved at, and `load` reopens
+    them instead of rebuilding when the database still matches. The manifest
+    is removed on the first change and written again by `save` at shutdown,
+    so tiles left by a crash are rebuilt. One process owns the directory at
+    a time (flock); others fall back to in-memory tiles.
+
+    Scoring a segment touches only the cells in its corridor, so the cost
+    depends on route length rather than on how many accidents exist.
+    """
+
+    def __init__(self, cell_size_deg: float = None, directory: str = None):
+        self.cell_size = cell_size_deg or float(os.getenv("RISK_RASTER_CELL_DEG", 0.001))  # ~110 m
+        self.base_directory = directory if directory is not None else os.getenv("RISK_RASTER_DIR")
+        self.directory = (
+            os.path.join(self.base_directory, f"risk_raster_{self.cell_size:g}") if self.base_directory else None
+        )
+        self.tiles: Dict[Tuple[int, int], np.ndarray] = {}
+        self.incidents = 0
+        self.loaded = False
+        self.reopened = False  # Last load reused saved tiles
+        self._lock = None  # Open lock file while this process owns the directory
+        self._saved = False  # The manifest on disk describes the current tiles
+
+    def load(self, db: Session, batch_size: int = 50000):
+        """Reopen the saved tiles if they match the database, else rebuild"""
+        version = self.data_version(db)
+        self.reopened = self._acquire_directory() and self._reopen(version)
+        if self.reopened:
+            self.loaded = True
+            print(f"🧮 Risk raster reopened with {self.incidents} reports in {len(self.tiles)} tiles")
+            return
+
+        self.clear()
+        query = db.query(AccidentReport.latitude, AccidentReport.longitude, AccidentReport.severity)
+        for latitude, longitude, severity in query.yield_per(batch_size):
+            self.add(latitude, longitude, severity)
+        self._write_manifest(version)
+        self.loaded = True
+        print(f"🧮 Risk raster built with {self.incidents} reports in {len(self.tiles)} tiles")
+
+    def save(self, db: Session):
+        """Flush the tiles and record the database version they match"""
+        self._write_manifest(self.data_version(db))
+
+    def clear(self):
+        """Drop every tile, deleting only the files this raster wrote"""
+        self.tiles.clear()
+        self.incidents = 0
+        if self._lock is not None:
+            self._invalidate_manifest()
+            for path in glob.glob(os.path.join(self.directory, "tile_*.npy")):
+                os.remove(path)
+
+    def close(self):
+        """Release the tiles and the directory; saved files are kept for the next start"""
+        self.tiles.clear()
+        self.incidents = 0
+        self.loaded = False
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    @staticmethod
+    def data_version(db: Session) -> list:
+        """Cheap fingerprint of the reports the raster is built from"""
+        count, max_id, id_sum, lat_sum, lng_sum = db.query(
+            func.count(AccidentReport.id), func.max(AccidentReport.id), func.total(AccidentReport.id),
+            func.total(AccidentReport.latitude), func.total(AccidentReport.longitude)
+        ).one()
+        severities = db.query(AccidentReport.severity, func.count(AccidentReport.id)).group_by(
+            AccidentReport.severity
+        ).order_by(AccidentReport.severity).all()
+        return [count, max_id, id_sum, round(lat_sum, 4), round(lng_sum, 4),
+                [[severity, n] for severity, n in severities]]
+
+    def add(self, latitude: float, longitude: float, severity: str, count: int = 1):
+        """Record an accident (use count=-1 to remove one)"""
+        if latitude is None or longitude is None:
+            return
+        if self._saved:
+            self._invalidate_manifest()
+        row, col = self.cell_for(latitude, longitude)
+        tile = self._tile((row // TILE_SIZE, col // TILE_SIZE), create=True)
+        tile[0, row % TILE_SIZE, col % TILE_SIZE] += count
+        tile[1, row % TILE_SIZE, col % TILE_SIZE] += SEVERITY_WEIGHTS.get(severity, 1) * count
+        self.incidents += count
+
+    def remove(self, latitude: float, longitude: float, severity: str):
+        """Forget a deleted accident"""
+        self.add(latitude, longitude, severity, count=-1)
+
+    def cell_for(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (
+            math.floor((latitude + 90) / self.cell_size),
+            math.floor((longitude + 180) / self.cell_size)
+        )
+
+    def segment_totals(self, start_lat: float, start_lng: float,
+                       end_lat: float, end_lng: float,
+                       radius_km: float) -> Tuple[int, int]:
+        """
+        Accidents and severity weight within radius_km of a segment
+
+        A cell is included when its center lies within the radius, so
+        results match an exact distance check to within half a cell.
+
+        Returns:
+            (incident_count, severity_weight)
+        """
+        rows, cols = self._corridor_cells(start_lat, start_lng, end_lat, end_lng, radius_km)
+        if len(rows) == 0:
+            return 0, 0
+
+        center_lats = (rows + 0.5) * self.cell_size - 90
+        center_lngs = (cols + 0.5) * self.cell_size - 180
+        distances = point_to_segments_distance(
+            center_lats, center_lngs, [start_lat], [start_lng], [end_lat], [end_lng]
+        )[:, 0]
+        inside = distances <= radius_km
+        rows, cols = rows[inside], cols[inside]
+
+        count = weight = 0
+        tile_rows, tile_cols = rows // TILE_SIZE, cols // TILE_SIZE
+        for tile_key in set(zip(tile_rows.tolist(), tile_cols.tolist())):
+            tile = self.tiles.get(tile_key)
+            if tile is None:
+                continue
+            mask = (tile_rows == tile_key[0]) & (tile_cols == tile_key[1])
+            local_rows, local_cols = rows[mask] % TILE_SIZE, cols[mask] % TILE_SIZE
+            count += int(tile[0, local_rows, local_cols].sum())
+            weight += int(tile[1, local_rows, local_cols].sum())
+        return count, weight
+
+    def get_stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "incidents": self.incidents,
+            "tiles": len(self.tiles),
+            "cell_size_deg": self.cell_size,
+            "bytes": sum(t.nbytes for t in self.tiles.values()),
+            "memory_mapped": self._lock is not None,
+            "directory": self.directory,
+            "reopened": self.reopened
+        }
+
+    def _corridor_cells(self, start_lat: float, start_lng: float,
+                        end_lat: float, end_lng: float,
+                        radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Cells in padded boxes around ~1 km pieces of the segment, deduplicated"""
+        length = haversine_distance(start_lat, start_lng, end_lat, end_lng)
+        pieces = max(1, math.ceil(length))
+        keys: List[np.ndarray] = []
+        for k in range(pieces):
+            lat1 = start_lat + (end_lat - start_lat) * k / pieces
+            lng1 = start_lng + (end_lng - start_lng) * k / pieces
+            lat2 = start_lat + (end_lat - start_lat) * (k + 1) / pieces
+            lng2 = start_lng + (end_lng - start_lng) * (k + 1) / pieces
+
+            widest = max(lat1, lat2, key=abs)
+            south, west, _, _ = get_bounding_box(widest, 0.0, radius_km)
+            lat_pad, lng_pad = widest - south, -west
+            min_row, min_col = self.cell_for(min(lat1, lat2) - lat_pad, min(lng1, lng2) - lng_pad)
+            max_row, max_col = self.cell_for(max(lat1, lat2) + lat_pad, max(lng1, lng2) + lng_pad)
+
+            rows, cols = np.meshgrid(
+                np.arange(min_row, max_row + 1, dtype=np.int64),
+                np.arange(min_col, max_col + 1, dtype=np.int64),
+                indexing="ij"
+            )
+            keys.append((rows * (1 << 32) + cols).ravel())
+
+        unique = np.unique(np.concatenate(keys))
+        return unique >> 32, unique & 0xFFFFFFFF
+
+    def _tile(self, key: Tuple[int, int], create: bool = False) -> Optional[np.ndarray]:
+        tile = self.tiles.get(key)
+        if tile is None and create:
+            shape = (2, TILE_SIZE, TILE_SIZE)
+            if self._lock is not None:
+                path = os.path.join(self.directory, f"tile_{key[0]}_{key[1]}.npy")
+                tile = np.lib.format.open_memmap(path, mode="w+", dtype=np.int32, shape=shape)
+            else:
+                tile = np.zeros(shape, dtype=np.int32)
+            self.tiles[key] = tile
+        return tile
+
+    def _acquire_directory(self) -> bool:
+        """Take the tile directory for this process; False means in-memory tiles"""
+        if self._lock is not None:
+            return True
+        if not self.directory:
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        lock = open(os.path.join(self.directory, "lock"), "w")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            print(f"⚠️ {self.directory} is used by another process; keeping the risk raster in memory")
+            return False
+        self._lock = lock
+        return True
+
+    def _reopen(self, version: list) -> bool:
+        """Map the saved tiles if the manifest matches this raster and the database"""
+        try:
+            with open(os.path.join(self.directory, "manifest.json")) as f:
+                manifest = json.load(f)
+            if (manifest["cell_size_deg"], manifest["tile_size"], manifest["data_version"]) != (
+                self.cell_size, TILE_SIZE, version
+            ):
+                return False
+            tiles = {}
+            for row, col in manifest["tiles"]:
+                path = os.path.join(self.directory, f"tile_{row}_{col}.npy")
+                tiles[(row, col)] = np.load(path, mmap_mode="r+")
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        self.tiles = tiles
+        self.incidents = manifest["incidents"]
+        self._saved = True
+        return True
+
+    def _write_manifest(self, version: list):
+        if self._lock is None:
+            return
+        for tile in self.tiles.values():
+            tile.flush()
+        manifest = {
+            "cell_size_deg": self.cell_size,
+            "tile_size": TILE_SIZE,
+            "data_version": version,
+            "incidents": self.incidents,
+            "tiles": [list(key) for key in self.tiles]
+        }
+        path = os.path.join(self.directory, "manifest.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(path + ".tmp", path)
+        self._saved = True
+
+    def _invalidate_manifest(self):
+        """The tiles are about to change; a crash from here on must not reuse them"""
+        try:
+            os.remove(os.path.join(self.directory, "manifest.json"))
+        except FileNotFoundError:
+            pass
+        self._saved = False
+
+
+# Global instance
+risk_raster = RiskRaster()
@@ -0,0 +1,335 @@
+"""
+Offline road graph and safest-path search
+
+The graph is read from a local file, so no routing service or network access
+is needed. Two formats are accepted:
+
+* CSV edge list (e.g. exported from OpenStreetMap with osmnx or osm2po) with
+  a header containing at least
+      source,target,source_lat,source_lng,target_lat,target_lng
+  and optionally `length_km` (defaults to the straight-line length) and
+  `oneway` (1/true/yes; defaults to two-way).
+* .npz produced by RoadGraph.save, which loads much faster.
+
+Adjacency is stored in CSR form (indptr/indices arrays). Edge cost is
+length_km + safety_weight * risk, where risk is the severity-weighted number
+of accidents within `risk_radius_km` of the edge.
+"""
+import csv
+import heapq
+import math
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from services.risk_raster import SEVERITY_WEIGHTS
+from utils.distance import EARTH_RADIUS_KM, point_to_segments_distance
+
+TRUE_VALUES = {"1", "true", "yes", "y"}
+
+
+class RoadGraph:
+    """Directed road graph in CSR form with per-edge accident risk"""
+
+    def __init__(self, risk_radius_km: float = 0.1, cell_size_deg: float = 0.01):
+        self.risk_radius_km = risk_radius_km
+        self.cell_size = cell_size_deg
+        self.node_lat = np.empty(0)
+        self.node_lng = np.empty(0)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.empty(0, dtype=np.int32)
+        self.edge_source = np.empty(0, dtype=np.int32)
+        self.length_km = np.empty(0)
+        self.risk = np.empty(0)
+        self.edge_cells: Dict[Tuple[int, int], np.ndarray] = {}
+        self.source_path = None
+        # Plain-list copies for the search loop, which is faster than indexing arrays
+        self._adjacency: List[List[Tuple[int, int]]] = []
+
+    @property
+    def loaded(self) -> bool:
+        return self.edge_count > 0
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_lat)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices)
+
+    def load(self, path: str):
+        """Load a graph from a CSV edge list or a saved .npz"""
+        if path.endswith(".npz"):
+            data = np.load(path)
+            self._build(data["node_lat"], data["node_lng"], data["edge_source"],
+                        data["edge_target"], data["length_km"])
+        else:
+            self._load_csv(path)
+        self.source_path = path
+        print(f"🛣️ Road graph loaded: {self.node_count} nodes, {self.edge_count} edges from {path}")
+
+    def save(self, path: str):
+        """Save the graph (without risk) as .npz for fast loading"""
+        np.savez(path, node_lat=self.node_lat, node_lng=self.node_lng,
+                 edge_source=self.edge_source, edge_target=self.indices,
+                 length_km=self.length_km)
+
+    def set_accidents(self, accidents: Iterable[tuple]):
+        """
+        Recompute every edge's risk
+
+        Args:
+            accidents: Iterable of tuples starting with (latitude, longitude, severity)
+        """
+        self.risk = np.zeros(self.edge_count)
+        rows = [a for a in accidents if a[0] is not None and a[1] is not None]
+        if not rows:
+            return
+        self._add_risk(np.array([a[0] for a in rows], dtype=float),
+                       np.array([a[1] for a in rows], dtype=float),
+                       np.array([SEVERITY_WEIGHTS.get(a[2], 1) for a in rows], dtype=float))
+
+    def add_accident(self, latitude: float, longitude: float, severity: str, count: int = 1):
+        """Add one accident's risk to nearby edges (count=-1 removes it)"""
+        if latitude is None or longitude is None or self.edge_count == 0:
+            return
+        self._add_risk(np.array([latitude]), np.array([longitude]),
+                       np.array([SEVERITY_WEIGHTS.get(severity, 1) * count], dtype=float))
+
+    def remove_accident(self, latitude: float, longitude: float, severity: str):
+        self.add_accident(latitude, longitude, severity, count=-1)
+
+    def nearest_node(self, latitude: float, longitude: float) -> int:
+        """Closest graph node to a point"""
+        scale = math.cos(math.radians(latitude))
+        d2 = (self.node_lat - latitude) ** 2 + ((self.node_lng - longitude) * scale) ** 2
+        return int(np.argmin(d2))
+
+    def find_routes(self, origin: dict, destination: dict, safety_weight: float = 1.0,
+                    alternatives: int = 3, penalty: float = 0.5,
+                    via: Optional[List[dict]] = None) -> List[dict]:
+        """
+        Find up to `alternatives` good routes between two points
+
+        The best route is found with A*, one leg per pair of consecutive
+        stops when `via` points are given. Further alternatives come from the
+        penalty method: edges of routes already found cost (1 + penalty)
+        times more, and the search is repeated until enough distinct routes
+        are found.
+
+        Runs in pure Python and can take hundreds of milliseconds on a city
+        graph, so async callers should run it in a thread.
+
+        Args:
+            origin, destination: {'latitude': float, 'longitude': float}
+            safety_weight: km of detour accepted per unit of severity-weighted
+                accident risk avoided; 0 gives the shortest path
+            via: Points the route must pass through, in order
+
+        Returns:
+            Routes sorted by cost, each with node coordinates, distance and risk
+        """
+        stops = [self.nearest_node(p['latitude'], p['longitude']) for p in [origin, *(via or []), destination]]
+        legs = [(a, b, self._heuristic(b)) for a, b in zip(stops[:-1], stops[1:]) if a != b]
+        source = stops[0]
+        base_cost = (self.length_km + max(safety_weight, 0.0) * np.maximum(self.risk, 0.0)).tolist()
+
+        routes = []
+        seen = set()
+        penalties: Dict[int, float] = {}
+        for _ in range(alternatives * 2):
+            edges = []
+            for leg_source, leg_target, heuristic in legs:
+                leg = self._astar(leg_source, leg_target, base_cost, heuristic, penalties)
+                if leg is None:
+                    edges = None
+                    break
+                edges.extend(leg)
+            if edges is None:
+                break
+            key = tuple(edges)
+            if key not in seen:
+                seen.add(key)
+                routes.append(self._describe(source, edges, base_cost))
+                if len(routes) == alternatives:
+                    break
+            for edge in edges:
+                penalties[edge] = penalties.get(edge, 1.0) * (1 + penalty)
+
+        routes.sort(key=lambda r: r['cost'])
+        return routes
+
+    def get_stats(self) -> dict:
+        return {
+            "source": self.source_path,
+            "nodes": self.node_count,
+            "edges": self.edge_count,
+            "risky_edges": int((self.risk > 0).sum()),
+            "risk_radius_km": self.risk_radius_km
+        }
+
+    def _load_csv(self, path: str):
+        node_ids: Dict[str, int] = {}
+        lats: List[float] = []
+        lngs: List[float] = []
+        sources: List[int] = []
+        targets: List[int] = []
+        lengths: List[float] = []
+
+        def node(key: str, lat: str, lng: str) -> int:
+            index = node_ids.get(key)
+            if index is None:
+                index = node_ids[key] = len(lats)
+                lats.append(float(lat))
+                lngs.append(float(lng))
+            return index
+
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                u = node(row["source"], row["source_lat"], row["source_lng"])
+                v = node(row["target"], row["target_lat"], row["target_lng"])
+                length = float(row["length_km"]) if row.get("length_km") else None
+                oneway = (row.get("oneway") or "").strip().lower() in TRUE_VALUES
+                for a, b in ((u, v),) if oneway else ((u, v), (v, u)):
+                    sources.append(a)
+                    targets.append(b)
+                    lengths.append(length if length is not None else -1.0)
+
+        node_lat, node_lng = np.array(lats), np.array(lngs)
+        sources, targets = np.array(sources, dtype=np.int32), np.array(targets, dtype=np.int32)
+        lengths = np.array(lengths)
+        missing = lengths < 0
+        if missing.any():
+            lengths[missing] = _haversine_km(node_lat[sources[missing]], node_lng[sources[missing]],
+                                             node_lat[targets[missing]], node_lng[targets[missing]])
+        self._build(node_lat, node_lng, sources, targets, lengths)
+
+    def _build(self, node_lat, node_lng, sources, targets, lengths):
+        order = np.argsort(sources, kind="stable")
+        self.node_lat = np.asarray(node_lat, dtype=float)
+        self.node_lng = np.asarray(node_lng, dtype=float)
+        self.edge_source = np.asarray(sources, dtype=np.int32)[order]
+        self.indices = np.asarray(targets, dtype=np.int32)[order]
+        self.length_km = np.asarray(lengths, dtype=float)[order]
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(self.edge_source, minlength=self.node_count))))
+        self.risk = np.zeros(self.edge_count)
+
+        targets_list = self.indices.tolist()
+        indptr = self.indptr.tolist()
+        self._adjacency = [
+            [(targets_list[e], e) for e in range(indptr[u], indptr[u + 1])]
+            for u in range(self.node_count)
+        ]
+        self._index_edges()
+
+    def _index_edges(self):
+        """Register each edge in every grid cell its padded bounding box touches"""
+        pad = self.risk_radius_km / 111.0
+        cells = defaultdict(list)
+        src_lat, src_lng = self.node_lat[self.edge_source], self.node_lng[self.edge_source]
+        dst_lat, dst_lng = self.node_lat[self.indices], self.node_lng[self.indices]
+        scale = np.maximum(np.cos(np.radians(np.maximum(np.abs(src_lat), np.abs(dst_lat)))), 0.01)
+        min_row = np.floor((np.minimum(src_lat, dst_lat) - pad) / self.cell_size).astype(int)
+        max_row = np.floor((np.maximum(src_lat, dst_lat) + pad) / self.cell_size).astype(int)
+        min_col = np.floor((np.minimum(src_lng, dst_lng) - pad / scale) / self.cell_size).astype(int)
+        max_col = np.floor((np.maximum(src_lng, dst_lng) + pad / scale) / self.cell_size).astype(int)
+
+        for edge, (r0, r1, c0, c1) in enumerate(zip(min_row.tolist(), max_row.tolist(),
+                                                   min_col.tolist(), max_col.tolist())):
+            for row in range(r0, r1 + 1):
+                for col in range(c0, c1 + 1):
+                    cells[(row, col)].append(edge)
+        self.edge_cells = {cell: np.array(edges, dtype=np.int64) for cell, edges in cells.items()}
+
+    def _add_risk(self, lats: np.ndarray, lngs: np.ndarray, weights: np.ndarray):
+        """Add each accident's weight to every edge within risk_radius_km"""
+        if len(lats) == 0 or self.edge_count == 0:
+            return
+        rows = np.floor(lats / self.cell_size).astype(np.int64)
+        cols = np.floor(lngs / self.cell_size).astype(np.int64)
+        cells, inverse = np.unique(np.stack([rows, cols], axis=1), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(len(cells) + 1))
+
+        for k, (row, col) in enumerate(cells.tolist()):
+            edges = self.edge_cells.get((row, col))
+            if edges is None:
+                continue
+            members = order[bounds[k]:bounds[k + 1]]
+            sources, targets = self.edge_source[edges], self.indices[edges]
+            distances = point_to_segments_distance(
+                lats[members], lngs[members],
+                self.node_lat[sources], self.node_lng[sources],
+                self.node_lat[targets], self.node_lng[targets]
+            )
+            hit_rows, hit_cols = np.nonzero(distances <= self.risk_radius_km)
+            np.add.at(self.risk, edges[hit_cols], weights[members[hit_rows]])
+
+    def _heuristic(self, target: int) -> List[float]:
+        """Straight-line km to the target: a lower bound on remaining cost"""
+        return (_haversine_km(self.node_lat, self.node_lng,
+                              self.node_lat[target], self.node_lng[target]) * 0.999).tolist()
+
+    def _astar(self, source: int, target: int, cost: List[float], heuristic: List[float],
+               penalties: Dict[int, float]) -> Optional[List[int]]:
+        """A* search returning the edge ids of the cheapest path"""
+        adjacency = self._adjacency
+        best = {source: 0.0}
+        parent_edge: Dict[int, int] = {}
+        closed = set()
+        heap = [(heuristic[source], 0.0, source)]
+
+        while heap:
+            _, g, u = heapq.heappop(heap)
+            if u == target:
+                break
+            if u in closed:
+                continue
+            closed.add(u)
+            for v, edge in adjacency[u]:
+                step = cost[edge]
+                if penalties:
+                    step *= penalties.get(edge, 1.0)
+                candidate = g + step
+                if candidate < best.get(v, math.inf):
+                    best[v] = candidate
+                    parent_edge[v] = edge
+                    heapq.heappush(heap, (candidate + heuristic[v], candidate, v))
+        else:
+            return None
+
+        edges = []
+        node = target
+        while node != source:
+            edge = parent_edge[node]
+            edges.append(edge)
+            node = int(self.edge_source[edge])
+        edges.reverse()
+        return edges
+
+    def _describe(self, source: int, edges: List[int], cost: List[float]) -> dict:
+        nodes = [source] + [int(self.indices[e]) for e in edges]
+        return {
+            "path": [
+                {"latitude": float(self.node_lat[n]), "longitude": float(self.node_lng[n])}
+                for n in nodes
+            ],
+            "distance_km": round(float(self.length_km[edges].sum()) if edges else 0.0, 3),
+            "risk": round(float(np.maximum(self.risk[edges], 0).sum()) if edges else 0.0, 2),
+            "cost": round(sum(cost[e] for e in edges), 3)
+        }
+
+
+def _haversine_km(lat1, lng1, lat2, lng2) -> np.ndarray:
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(x, dtype=float)) for x in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+# Global instance, loaded at startup when ROAD_GRAPH_PATH exists
+ROAD_GRAPH_PATH = os.getenv("ROAD_GRAPH_PATH", "data/road_graph.npz")
+road_graph = RoadGraph(risk_radius_km=float(os.getenv("ROAD_GRAPH_RISK_RADIUS_KM", 0.1)))
@@ -0,0 +1,104 @@
+import asyncio
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict
+
+
+class RouteAnalysisCache:
+    """
+    LRU cache of route analyses with single-flight computation
+
+    Keys combine the route rounded to ~1 m, the accident-data version and
+    the current UTC hour (recommendations mention night driving). Bumping
+    the version on any report change drops every cached analysis, so stale
+    results are never served; with several workers, ReportSyncService bumps
+    it on every worker through the backplane. Identical requests arriving while one is
+    being computed wait for that computation instead of starting their own.
+    """
+
+    def __init__(self, max_entries: int = None, precision: int = 5):
+        self.max_entries = max_entries or int(os.getenv("ROUTE_CACHE_SIZE", 1024))
+        self.precision = precision
+        self.data_version = 0
+        self.entries: "OrderedDict[tuple, dict]" = OrderedDict()
+        self.in_flight: Dict[tuple, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def key_for(self, route_data: dict) -> tuple:
+        """Normalized cache key for a route request"""
+        points = [route_data['origin'], *(route_data.get('waypoints') or []), route_data['destination']]
+        return (
+            tuple((round(p['latitude'], self.precision), round(p['longitude'], self.precision)) for p in points),
+            route_data.get('distance_km') or 0,
+            route_data.get('duration_minutes') or 0,
+            datetime.utcnow().hour,
+            self.data_version
+        )
+
+    def bump_version(self):
+        """Accident data changed: invalidate every cached analysis"""
+        self.data_version += 1
+        self.invalidations += 1
+        self.entries.clear()
+
+    async def get_or_compute(self, key: tuple, compute: Callable[[], Awaitable[dict]]) -> dict:
+        """
+        Return the cached analysis for key, computing it at most once
+
+        The computation runs in its own task so a disconnecting client does
+        not cancel it for others waiting on the same key. It may outlive the
+        request that started it, so compute must not use request-scoped
+        resources such as a session opened for the request.
+        """
+        cached = self.entries.get(key)
+        if cached is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+
+        self.misses += 1
+        task = asyncio.create_task(compute())
+        self.in_flight[key] = task
+        task.add_done_callback(lambda t: self._store(key, t))
+        return await asyncio.shield(task)
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "data_version": self.data_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            "in_flight": len(self.in_flight)
+        }
+
+    def _store(self, key: tuple, task: asyncio.Task):
+        self.in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        if key[-1] != self.data_version:
+            return  # Data changed while computing
+        self.entries[key] = task.result()
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+# Global instance
+route_cache = RouteAnalysisCache()
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import os
+import re
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models.database import db_executor, RouteAnalysis, RouteStatsDaily, RouteRiskFactorDaily
+from utils.polyline import encode_polyline
+
+HIGH_RISK_SAFETY_SCORE = 60  # Routes below this are "High Risk" or worse
+
+
+class RouteHistoryWriter:
+    """
+    Persists route analyses in batches and maintains daily rollups
+
+    Requests only enqueue a small row; a background task drains the queue
+    and writes each batch in one transaction on the database writer thread,
+    adding the batch totals to route_stats_daily / route_risk_factors_daily
+    with upserts. Statistics then read at most one rollup row per day instead of
+    scanning route_analyses. When the queue is full, rows are dropped
+    rather than slowing down requests.
+    """
+
+    def __init__(self, batch_size: int = None, flush_seconds: float = None, max_queue: int = None):
+        self.batch_size = batch_size or int(os.getenv("ROUTE_HISTORY_BATCH_SIZE", 500))
+        self.flush_seconds = flush_seconds or float(os.getenv("ROUTE_HISTORY_FLUSH_SECONDS", 1.0))
+        self.max_queue = max_queue or int(os.getenv("ROUTE_HISTORY_MAX_QUEUE", 10000))
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self):
+        """Start the background writer"""
+        if self._task is not None and not self._task.done():
+            return
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._writer_loop())
+
+    async def stop(self):
+        """Write whatever is queued, then stop"""
+        if self._task is None:
+            return
+        await self.queue.put(None)  # Sentinel: flush and exit
+        await self._task
+        self._task = None
+        self.queue = None
+
+    def record(self, route_data: dict, analysis: dict):
+        """
+        Queue an analysis for persistence without waiting on the database
+
+        Args:
+            route_data: The analyzed route (origin, waypoints, destination)
+            analysis: Result of RouteAnalysisService.analyze_route
+        """
+        if self.queue is None:
+            return
+        try:
+            self.queue.put_nowait(self.to_row(route_data, analysis))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def to_row(self, route_data: dict, analysis: dict) -> dict:
+        """route_analyses row for an analysis"""
+        route_points = [route_data['origin'], *(route_data.get('waypoints') or []), route_data['destination']]
+        high_risk = [s for s in analysis['segment_analysis'] if s['is_high_risk']]
+        return {
+            "start_lat": route_points[0]['latitude'],
+            "start_lng": route_points[0]['longitude'],
+            "end_lat": route_points[-1]['latitude'],
+            "end_lng": route_points[-1]['longitude'],
+            "route_polyline": encode_polyline(route_points),
+            "safety_score": round(max(0, 100 - analysis['statistics']['average_segment_risk']), 2),
+            "total_risk_points": sum(s['incident_count'] for s in analysis['segment_analysis']),
+            "high_risk_zones": json.dumps([
+                {"location": s['start'], "risk_score": s['risk_score'], "reason": s['risk_factors']}
+                for s in high_risk
+            ]),
+            "analyzed_at": datetime.utcnow()
+        }
+
+    def get_statistics(self, db: Session, start_date: date, end_date: date) -> dict:
+        """Totals over a date range, read from the daily rollups"""
+        days = db.query(RouteStatsDaily).filter(RouteStatsDaily.day.between(start_date, end_date)).all()
+        total = sum(d.routes_analyzed for d in days)
+        factors = Counter()
+        for factor, count in db.query(RouteRiskFactorDaily.factor, RouteRiskFactorDaily.route_count).filter(
+            RouteRiskFactorDaily.day.between(start_date, end_date)
+        ):
+            factors[factor] += count
+        return {
+            "total_routes_analyzed": total,
+            "average_safety_score": round(sum(d.safety_score_sum for d in days) / total, 2) if total else 0,
+            "high_risk_routes": sum(d.high_risk_routes for d in days),
+            "high_risk_zones": sum(d.high_risk_zones for d in days),
+            "most_common_risk_factors": [
+                {"factor": factor, "routes": count} for factor, count in factors.most_common(5)
+            ]
+        }
+
+    def get_stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize() if self.queue else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches
+        }
+
+    async def _writer_loop(self):
+        """Collect up to batch_size rows or flush_seconds worth, then write them"""
+        stopping = False
+        while not stopping:
+            row = await self.queue.get()
+            if row is None:
+                return
+            batch = [row]
+            try:
+                async with asyncio.timeout(self.flush_seconds):
+                    while len(batch) < self.batch_size:
+                        row = await self.queue.get()
+                        if row is None:
+                            stopping = True
+                            break
+                        batch.append(row)
+            except TimeoutError:
+                pass
+            try:
+                await db_executor.write(self._write_batch, batch)
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"Error writing route analyses: {e}")
+                continue
+            self.written += len(batch)
+            self.batches += 1
+
+    def _write_batch(self, db: Session, rows: List[dict]):
+        """Insert a batch and add its totals to the daily rollups in one transaction"""
+        totals = defaultdict(lambda: {"routes_analyzed": 0, "safety_score_sum": 0.0,
+                                      "high_risk_routes": 0, "high_risk_zones": 0})
+        factors = Counter()
+        for row in rows:
+            day = row['analyzed_at'].date()
+            zones = json.loads(row['high_risk_zones'])
+            t = totals[day]
+            t["routes_analyzed"] += 1
+            t["safety_score_sum"] += row['safety_score']
+            t["high_risk_routes"] += row['safety_score'] < HIGH_RISK_SAFETY_SCORE
+            t["high_risk_zones"] += len(zones)
+            for factor in {f for zone in zones for f in _normalize_factors(zone['reason'])}:
+                factors[(day, factor)] += 1
+
+        db.execute(insert(RouteAnalysis), rows)
+        for day, t in totals.items():
+            stmt = sqlite_insert(RouteStatsDaily).values(day=day, **t)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=["day"],
+                set_={k: getattr(RouteStatsDaily, k) + stmt.excluded[k] for k in t}
+            ))
+        for (day, factor), count in factors.items():
+            stmt = sqlite_insert(RouteRiskFactorDaily).values(day=day, factor=factor, route_count=count)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=["day", "factor"],
+                set_={"route_count": RouteRiskFactorDaily.route_count + stmt.excluded.route_count}
+            ))
+        db.commit()
+
+
+def _normalize_factors(reasons: List[str]) -> List[str]:
+    """Turn segment risk factors into countable categories"""
+    factors = []
+    for reason in reasons:
+        if reason.startswith("Common conditions: "):
+            factors.extend(reason[len("Common conditions: "):].split(", "))
+        else:
+            factors.append(re.sub(r"\s*\(.*\)$", "", reason))
+    return factors
+
+
+# Global instance
+route_history = RouteHistoryWriter()
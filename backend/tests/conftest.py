@@ -0,0 +1,28 @@
+import json
+
+import pytest
+
+
+class FakeWebSocket:
+    """Just enough of starlette's WebSocket for WebSocketManager"""
+
+    def __init__(self):
+        self.scope = {}
+        self.sent = []
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        pass
+
+    def events(self):
+        return [m["event"] for m in self.sent]
+
+
+@pytest.fixture
+def make_websocket():
+    return FakeWebSocket
@@ -0,0 +1,70 @@
+import asyncio
+
+from services.member3_realtime import RealTimeAlertService
+
+
+def report(lat, lng, severity="medium", alert_type="accident"):
+    return {"type": alert_type, "severity": severity, "latitude": lat, "longitude": lng,
+            "message": f"{severity} report", "radius_km": 1}
+
+
+def test_repeat_reports_merge_into_one_alert():
+    async def scenario():
+        service = RealTimeAlertService(update_flush_seconds=0.01)
+        first = await service.create_alert(report(12.97, 77.59))
+        second = await service.create_alert(report(12.9701, 77.5901, severity="critical"))
+        other_type = await service.create_alert(report(12.97, 77.59, alert_type="weather"))
+        await service.stop_expiry_scheduler()
+        return service, first, second, other_type
+
+    service, first, second, other_type = asyncio.run(scenario())
+
+    assert second["id"] == first["id"]
+    assert second["report_count"] == 2
+    assert second["severity"] == "critical"
+    assert other_type["id"] != first["id"]
+    assert len(service.alert_store) == 2
+    assert service.merged_reports == 1
+
+
+def test_lower_severity_repeat_keeps_the_alert_severity():
+    async def scenario():
+        service = RealTimeAlertService(update_flush_seconds=0.01)
+        await service.create_alert(report(12.97, 77.59, severity="high"))
+        merged = await service.create_alert(report(12.97, 77.59, severity="low"))
+        await service.stop_expiry_scheduler()
+        return merged
+
+    merged = asyncio.run(scenario())
+    assert merged["severity"] == "high"
+    assert merged["report_count"] == 2
+
+
+def test_alert_updates_are_batched_per_recipient(make_websocket):
+    async def scenario():
+        service = RealTimeAlertService(update_flush_seconds=0.01)
+        manager = service.websocket_manager
+        near_a, near_b = make_websocket(), make_websocket()
+        for websocket, lat in ((near_a, 12.97), (near_b, 13.10)):
+            await manager.connect(websocket)
+            manager.update_user_location(websocket, lat, 77.59)
+
+        alert_a = await service.create_alert(report(12.97, 77.59))
+        alert_b = await service.create_alert(report(13.10, 77.59))
+        for _ in range(2):
+            await service.create_alert(report(12.97, 77.59))
+        await service.create_alert(report(13.10, 77.59))
+        await asyncio.sleep(0.05)
+
+        await service.stop_expiry_scheduler()
+        for websocket in (near_a, near_b):
+            manager.disconnect(websocket)
+        return alert_a, alert_b, near_a, near_b
+
+    alert_a, alert_b, near_a, near_b = asyncio.run(scenario())
+
+    for websocket, alert, count in ((near_a, alert_a, 3), (near_b, alert_b, 2)):
+        frames = [m for m in websocket.sent if m["event"] == "alert_updates"]
+        assert len(frames) == 1
+        assert [u["id"] for u in frames[0]["updates"]] == [alert["id"]]
+        assert frames[0]["updates"][0]["report_count"] == count
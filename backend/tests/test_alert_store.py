@@ -0,0 +1,64 @@
+from services.member3_realtime import AlertStore
+
+
+def make_alert(alert_id, expires_at, lat=12.97, lng=77.59, radius_km=10):
+    return {
+        "id": alert_id,
+        "type": "accident",
+        "severity": "high",
+        "location": {"latitude": lat, "longitude": lng},
+        "message": "test",
+        "created_at": 0.0,
+        "expires_at": expires_at,
+        "radius_km": radius_km,
+        "report_count": 1,
+        "last_reported_at": 0.0
+    }
+
+
+def test_evicts_only_expired_alerts_in_order():
+    store = AlertStore()
+    for alert_id, expires_at in [(1, 30.0), (2, 10.0), (3, 20.0)]:
+        store.add(make_alert(alert_id, expires_at))
+
+    assert store.next_expiry() == 10.0
+    assert [a["id"] for a in store.evict_expired(now=20.0)] == [2, 3]
+    assert 1 in store and 2 not in store and len(store) == 1
+    assert store.next_expiry() == 30.0
+
+
+def test_extended_expiry_skips_the_stale_heap_entry():
+    store = AlertStore()
+    store.add(make_alert(1, 10.0))
+    store.extend_expiry(1, 50.0)
+    store.extend_expiry(1, 5.0)  # Never moves an expiry earlier
+
+    assert store.evict_expired(now=20.0) == []
+    assert store.next_expiry() == 50.0
+    assert [a["id"] for a in store.evict_expired(now=50.0)] == [1]
+    assert store.next_expiry() is None
+
+
+def test_removed_alert_does_not_expire_later():
+    store = AlertStore()
+    store.add(make_alert(1, 10.0))
+    assert store.remove(1)["id"] == 1
+    assert store.remove(1) is None
+    assert store.evict_expired(now=100.0) == []
+    assert store.nearby(12.97, 77.59) == []
+
+
+def test_nearby_uses_each_alert_radius_unless_one_is_given():
+    store = AlertStore()
+    store.add(make_alert(1, 100.0, lat=12.97, lng=77.59, radius_km=1))
+    store.add(make_alert(2, 100.0, lat=13.02, lng=77.59, radius_km=10))  # ~5.6 km north
+
+    assert sorted(a["id"] for a, _ in store.nearby(12.97, 77.59)) == [1, 2]
+    assert [a["id"] for a, _ in store.nearby(13.02, 77.59)] == [2]
+    assert [a["id"] for a, _ in store.nearby(12.97, 77.59, radius_km=2)] == [1]
+
+
+def test_serialize_turns_timestamps_into_iso_strings():
+    public = AlertStore.serialize(make_alert(1, 3600.0))
+    assert public["created_at"] == "1970-01-01T00:00:00"
+    assert public["expires_at"] == "1970-01-01T01:00:00"
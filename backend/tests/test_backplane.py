@@ -0,0 +1,154 @@
+import asyncio
+
+from services.accident_index import accident_index
+from services.broadcast_backplane import UnixSocketBackplane
+from services.member3_realtime import RealTimeAlertService
+from services.report_sync import ReportSyncService
+from services.risk_raster import risk_raster
+from services.route_cache import route_cache
+
+
+def report(severity="medium"):
+    return {"type": "accident", "severity": severity, "latitude": 12.97, "longitude": 77.59,
+            "message": "report", "radius_km": 1}
+
+
+async def start_workers(socket_path, count):
+    workers = []
+    for _ in range(count):
+        service = RealTimeAlertService(update_flush_seconds=0.01)
+        service.backplane = UnixSocketBackplane(str(socket_path), reconnect_delay=0.05)
+        await service.start_backplane()
+        workers.append(service)
+    return workers
+
+
+async def stop_workers(workers):
+    for service in reversed(workers):
+        await service.stop_expiry_scheduler()
+        await service.stop_backplane()
+
+
+def test_workers_get_distinct_slots_and_alert_ids(tmp_path):
+    async def scenario():
+        workers = await start_workers(tmp_path / "bp.sock", 3)
+        alerts = [await service.create_alert({**report(), "latitude": 10 + i}) for i, service in enumerate(workers)]
+        await asyncio.sleep(0.2)
+        slots = [service.backplane.worker_slot for service in workers]
+        stored = [sorted(a["id"] for a in service.alert_store.values()) for service in workers]
+        await stop_workers(workers)
+        return slots, alerts, stored
+
+    slots, alerts, stored = asyncio.run(scenario())
+
+    assert sorted(slots) == [1, 2, 3]
+    ids = sorted(a["id"] for a in alerts)
+    assert len(set(ids)) == 3
+    assert all(s == ids for s in stored)  # Every worker holds every alert
+
+
+def test_concurrent_merges_on_different_workers_add_up(tmp_path):
+    async def scenario():
+        workers = await start_workers(tmp_path / "bp.sock", 3)
+        created = await workers[0].create_alert(report())
+        await asyncio.sleep(0.1)
+        await asyncio.gather(
+            workers[1].create_alert(report()),
+            workers[2].create_alert(report(severity="critical"))
+        )
+        await asyncio.sleep(0.2)
+        states = [service.alert_store.get(created["id"]) for service in workers]
+        counts = [s["report_count"] for s in states]
+        severities = [s["severity"] for s in states]
+        await stop_workers(workers)
+        return counts, severities
+
+    counts, severities = asyncio.run(scenario())
+    assert counts == [3, 3, 3]
+    assert severities == ["critical"] * 3
+
+
+def test_reconnecting_worker_keeps_its_slot_and_restarted_worker_gets_a_new_one(tmp_path):
+    async def scenario():
+        host, survivor, doomed = await start_workers(tmp_path / "bp.sock", 3)
+        doomed_slot = doomed.backplane.worker_slot
+        doomed_alert = await doomed.create_alert({**report(), "latitude": 20})
+
+        # Drop the survivor's connection; it registers again with its slot
+        survivor_slot = survivor.backplane.worker_slot
+        survivor.backplane._writer.close()
+        await asyncio.sleep(0.3)
+        reconnected_slot = survivor.backplane.worker_slot
+
+        # The doomed worker dies; a fresh one must not take its slot
+        await doomed.stop_backplane()
+        await asyncio.sleep(0.1)
+        (restarted,) = await start_workers(tmp_path / "bp.sock", 1)
+        new_alert = await restarted.create_alert({**report(), "latitude": 30})
+        await asyncio.sleep(0.2)
+        result = {
+            "survivor": (survivor_slot, reconnected_slot),
+            "restarted_slot": restarted.backplane.worker_slot,
+            "doomed_slot": doomed_slot,
+            "ids": (doomed_alert["id"], new_alert["id"]),
+            "stored": sorted(a["id"] for a in host.alert_store.values())
+        }
+        await doomed.stop_expiry_scheduler()
+        await stop_workers([host, survivor, restarted])
+        return result
+
+    result = asyncio.run(scenario())
+    assert result["survivor"][0] == result["survivor"][1]
+    assert result["restarted_slot"] not in (1, 2, 3)
+    assert result["ids"][0] != result["ids"][1]
+    assert result["stored"] == sorted(result["ids"])
+
+
+def test_new_broker_skips_slots_still_in_alert_ids(tmp_path):
+    async def scenario():
+        host, survivor, doomed = await start_workers(tmp_path / "bp.sock", 3)
+        await doomed.create_alert(report())
+        await asyncio.sleep(0.1)
+        await doomed.stop_backplane()
+        await host.stop_backplane()  # The survivor takes over the broker
+        await asyncio.sleep(0.5)
+        (restarted,) = await start_workers(tmp_path / "bp.sock", 1)
+        result = (survivor.backplane.is_broker, doomed.backplane.worker_slot, restarted.backplane.worker_slot)
+        for service in (host, doomed):
+            await service.stop_expiry_scheduler()
+        await stop_workers([survivor, restarted])
+        return result
+
+    survivor_is_broker, doomed_slot, restarted_slot = asyncio.run(scenario())
+    assert survivor_is_broker
+    assert restarted_slot > doomed_slot
+
+
+
+def test_report_changes_reach_every_worker(tmp_path):
+    record = [12.97, 77.59, "Fatal", "Rain", "Wet", 60.0, "Night"]
+    report_id = 10 ** 9
+
+    async def scenario():
+        origin, other = await start_workers(tmp_path / "bp.sock", 2)
+        sync = ReportSyncService(other)
+        version = route_cache.data_version
+        # What report_sync publishes on the worker that saved the report
+        await origin.backplane.publish({"op": "report_created", "report_id": report_id, "record": record})
+        await asyncio.sleep(0.1)
+        created = (accident_index.records.get(report_id),
+                   risk_raster.segment_totals(12.969, 77.589, 12.971, 77.591, 0.2),
+                   route_cache.data_version - version)
+
+        await origin.backplane.publish({"op": "report_deleted", "report_id": report_id, "location": record[:3]})
+        await asyncio.sleep(0.1)
+        deleted = (report_id in accident_index.records,
+                   risk_raster.segment_totals(12.969, 77.589, 12.971, 77.591, 0.2),
+                   route_cache.data_version - version)
+        await stop_workers([origin, other])
+        return created, deleted, sync.applied
+
+    created, deleted, applied = asyncio.run(scenario())
+    assert created == (tuple(record), (1, 3), 1)
+    assert deleted == (False, (0, 0), 2)
+    assert applied == 2
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from utils.distance import (EARTH_RADIUS_KM, haversine_distance, point_to_segments_distance, points_near_segments,
+                            split_path)
+
+
+def brute_force_distance(lat, lng, a, b, samples=200001):
+    """Haversine to the closest of many points along the segment (~0.2 m apart)"""
+    t = np.linspace(0, 1, samples)
+    lats = np.radians(a[0] + (b[0] - a[0]) * t)
+    lngs = np.radians(a[1] + (b[1] - a[1]) * t)
+    lat, lng = np.radians(lat), np.radians(lng)
+    h = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    return float((2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(h))).min())
+
+
+def test_zero_length_segment_is_point_distance():
+    distance = point_to_segments_distance([12.97], [77.59], [13.0], [77.6], [13.0], [77.6])[0, 0]
+    assert distance == pytest.approx(haversine_distance(12.97, 77.59, 13.0, 77.6), rel=2e-3)
+
+
+@pytest.mark.parametrize("base_lat", [0.0, 12.97, 45.0, 69.0])
+def test_within_tolerance_of_haversine(base_lat):
+    rng = np.random.default_rng(int(base_lat))
+    a = (base_lat, 10.0)
+    b = (base_lat + 0.25, 10.3)  # ~40 km at the equator
+    for _ in range(20):
+        t = rng.uniform(-0.1, 1.1)
+        lat = a[0] + (b[0] - a[0]) * t + rng.uniform(-0.04, 0.04)
+        lng = a[1] + (b[1] - a[1]) * t + rng.uniform(-0.04, 0.04)
+        expected = brute_force_distance(lat, lng, a, b)
+        actual = point_to_segments_distance([lat], [lng], [a[0]], [a[1]], [b[0]], [b[1]])[0, 0]
+        assert actual == pytest.approx(expected, rel=2e-3, abs=0.01)
+
+
+def test_segments_across_the_antimeridian():
+    distance = point_to_segments_distance([0.01], [180.0], [0.0], [179.9], [0.0], [-179.9])[0, 0]
+    assert distance == pytest.approx(1.112, abs=0.01)
+
+
+def test_returns_points_by_segments_matrix():
+    distances = point_to_segments_distance(
+        [0.0, 0.0, 1.0], [0.0, 1.0, 0.0],
+        [0.0, 0.0], [0.0, 1.0], [0.0, 1.0], [1.0, 1.0]
+    )
+    assert distances.shape == (3, 2)
+    assert distances[0, 0] == pytest.approx(0.0, abs=1e-9)
+    assert distances[1, 1] == pytest.approx(0.0, abs=1e-9)
+    assert distances[2, 0] == pytest.approx(haversine_distance(1.0, 0.0, 0.0, 0.0), rel=2e-3)
+
+
+def test_points_near_segments_is_independent_of_chunk_size():
+    rng = np.random.default_rng(3)
+    lats, lngs = rng.uniform(12.9, 13.0, 500), rng.uniform(77.5, 77.6, 500)
+    segments = ([12.9, 12.95], [77.5, 77.55], [12.95, 13.0], [77.55, 77.6])
+
+    full = points_near_segments(lats, lngs, *segments, radius_km=0.5)
+    chunked = points_near_segments(lats, lngs, *segments, radius_km=0.5, chunk_size=7)
+    for a, b in zip(full, chunked):
+        np.testing.assert_allclose(a, b)
+
+    rows, cols, distances = full
+    expected = point_to_segments_distance(lats, lngs, *segments)
+    assert np.all(distances <= 0.5)
+    assert len(rows) == int((expected <= 0.5).sum())
+    np.testing.assert_allclose(distances, expected[rows, cols])
+
+
+def test_points_near_segments_with_no_points():
+    rows, cols, distances = points_near_segments([], [], [0.0], [0.0], [1.0], [1.0], radius_km=1)
+    assert len(rows) == len(cols) == len(distances) == 0
+
+
+def test_split_path_bins_cover_the_whole_path():
+    lats, lons = [12.90, 12.93, 12.93, 12.98], [77.50, 77.55, 77.55, 77.60]  # Repeated vertex
+    total = sum(haversine_distance(lats[i], lons[i], lats[i + 1], lons[i + 1]) for i in range(3))
+    start_lats, start_lons, end_lats, end_lons, piece_bins, bin_lengths = split_path(lats, lons, 1.0)
+
+    assert bin_lengths.sum() == pytest.approx(total, rel=2e-3)
+    assert np.all(bin_lengths[:-1] == 1.0) and 0 < bin_lengths[-1] <= 1.0
+    assert np.all(np.diff(piece_bins) >= 0) and piece_bins[-1] == len(bin_lengths) - 1
+    # Pieces join up end to start
+    assert np.allclose(end_lats[:-1], start_lats[1:]) and np.allclose(end_lons[:-1], start_lons[1:])
+    pieces = [haversine_distance(*p) for p in zip(start_lats, start_lons, end_lats, end_lons)]
+    per_bin = np.bincount(piece_bins, weights=pieces)
+    assert per_bin == pytest.approx(bin_lengths, rel=2e-3)
+
+
+def test_split_path_shorter_than_one_bin():
+    *_, piece_bins, bin_lengths = split_path([12.97, 12.972], [77.59, 77.59], 1.0)
+    assert len(bin_lengths) == 1 and bin_lengths[0] == pytest.approx(0.222, abs=1e-3)
+    assert set(piece_bins) == {0}
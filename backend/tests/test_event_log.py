@@ -0,0 +1,77 @@
+import asyncio
+
+from services.member3_realtime import EventLog, OutboundFrame, RealTimeAlertService, WebSocketManager
+
+
+def log_with(seqs, max_events=10):
+    log = EventLog(max_events)
+    for _ in seqs:
+        seq = log.next_seq()
+        log.append(seq, OutboundFrame({"event": "e", "seq": seq}))
+    return log
+
+
+def test_since_returns_missed_entries():
+    log = log_with(range(5))
+    assert [entry[0] for entry in log.since(2)] == [3, 4, 5]
+    assert log.since(5) == []
+
+
+def test_since_needs_snapshot_when_log_rolled_past_or_seq_unknown():
+    log = log_with(range(5), max_events=3)  # Holds 3, 4, 5
+    assert [entry[0] for entry in log.since(2)] == [3, 4, 5]
+    assert log.since(1) is None
+    assert log.since(6) is None
+
+
+def test_replay_skips_events_already_delivered_live(make_websocket):
+    async def scenario():
+        manager = WebSocketManager()
+        await manager.broadcast({"event": "before_1"})
+        await manager.broadcast({"event": "before_2"})
+
+        websocket = make_websocket()
+        await manager.connect(websocket)
+        await manager.broadcast({"event": "after_connect"})
+        replayed = manager.replay(websocket, resume_from=0)
+        await asyncio.sleep(0.01)
+        manager.disconnect(websocket)
+        return replayed, websocket
+
+    replayed, websocket = asyncio.run(scenario())
+
+    assert replayed == 2
+    assert websocket.events() == ["connected", "after_connect", "before_1", "before_2"]
+    assert sorted(m["seq"] for m in websocket.sent[1:]) == [1, 2, 3]
+
+
+def test_replay_applies_event_filters(make_websocket):
+    async def scenario():
+        manager = WebSocketManager()
+        await manager.broadcast({"event": "new_alert"})
+        await manager.broadcast({"event": "system_update"})
+        websocket = make_websocket()
+        await manager.connect(websocket)
+        manager.subscribe(websocket, events=["new_alert"])
+        replayed = manager.replay(websocket, resume_from=0)
+        await asyncio.sleep(0.01)
+        manager.disconnect(websocket)
+        return replayed, websocket
+
+    replayed, websocket = asyncio.run(scenario())
+    assert replayed == 1
+    assert websocket.events() == ["connected", "new_alert"]
+
+
+def test_resume_from_another_process_gets_a_snapshot(make_websocket):
+    async def scenario():
+        service = RealTimeAlertService()
+        websocket = make_websocket()
+        await service.websocket_manager.connect(websocket)
+        await service.resume_client(websocket, resume_from=0, log_id="from-a-previous-run")
+        await asyncio.sleep(0.01)
+        service.websocket_manager.disconnect(websocket)
+        return websocket
+
+    websocket = asyncio.run(scenario())
+    assert websocket.events() == ["connected", "snapshot"]
@@ -0,0 +1,108 @@
+import asyncio
+import math
+
+import pytest
+
+from services.member3_realtime import WebSocketManager
+from utils.spatial_index import RegionIndex
+
+BANGALORE_BOX = {"bbox": [12.9, 77.5, 13.0, 77.7]}
+
+
+def test_region_index_point_and_box_queries():
+    index = RegionIndex(cell_size_deg=0.05)
+    index.insert("a", 12.9, 77.5, 13.0, 77.7)
+    index.insert("b", 13.5, 78.0, 13.6, 78.1)
+
+    assert index.query_point(12.95, 77.6) == ["a"]
+    assert index.query_point(13.2, 77.6) == []
+    assert index.query_bbox(12.99, 77.69, 13.55, 78.05) == {"a", "b"}
+    assert index.query_bbox(14.0, 79.0, 14.1, 79.1) == set()
+
+    index.insert("a", 20.0, 70.0, 20.1, 70.1)  # Replaces the old box
+    assert index.query_point(12.95, 77.6) == []
+    index.remove("a")
+    index.remove("a")
+    assert len(index) == 1 and index.query_point(20.05, 70.05) == []
+
+
+def test_region_index_keeps_huge_boxes_out_of_the_grid():
+    index = RegionIndex(cell_size_deg=0.05, max_cells=10)
+    index.insert("country", 8.0, 68.0, 37.0, 97.0)
+
+    assert not index.cells
+    assert index.query_point(12.97, 77.59) == ["country"]
+    assert index.query_bbox(12.9, 77.5, 13.0, 77.7) == {"country"}
+
+
+@pytest.mark.parametrize("area, error", [
+    ({"bbox": [12.9, 77.5, 13.0]}, ValueError),
+    ({"bbox": [13.0, 77.5, 12.9, 77.7]}, ValueError),
+    ({"bbox": [math.nan, 77.5, 13.0, 77.7]}, ValueError),
+    ({"bbox": [12.9, -math.inf, 13.0, 77.7]}, ValueError),
+    ({"bbox": [12.9, 77.5, 91.0, 77.7]}, ValueError),
+    ({"bbox": [12.9, 77.5, 13.0, 181.0]}, ValueError),
+    ({"polygon": [[12.9, 77.5], [13.0, 77.6]]}, ValueError),
+    ({"polygon": [[12.9, 77.5], [13.0, 77.6], [12.9]]}, ValueError),
+    ({"polygon": [[12.9, 77.5], [13.0, 77.6], [math.inf, 77.7]]}, ValueError),
+    ({"bbox": ["north", 77.5, 13.0, 77.7]}, ValueError),
+    ({"circle": [12.9, 77.5, 1]}, ValueError),
+    ("12.9,77.5,13.0,77.7", TypeError),
+])
+def test_subscribe_rejects_malformed_areas(make_websocket, area, error):
+    async def scenario():
+        manager = WebSocketManager()
+        websocket = make_websocket()
+        await manager.connect(websocket)
+        manager.subscribe(websocket, areas=[BANGALORE_BOX])
+        with pytest.raises(error):
+            manager.subscribe(websocket, areas=[area])
+        # The previous subscription is still in place
+        assert manager.subscriptions[websocket]["areas"][0]["bbox"] == (12.9, 77.5, 13.0, 77.7)
+        assert len(manager.subscription_index) == 1
+        manager.disconnect(websocket)
+        assert len(manager.subscription_index) == 0
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("events", ["new_alert", [1, 2], [None]])
+def test_subscribe_rejects_non_string_events(make_websocket, events):
+    async def scenario():
+        manager = WebSocketManager()
+        websocket = make_websocket()
+        await manager.connect(websocket)
+        with pytest.raises(TypeError):
+            manager.subscribe(websocket, events=events)
+        assert websocket not in manager.subscriptions
+        manager.disconnect(websocket)
+
+    asyncio.run(scenario())
+
+
+def test_geofenced_delivery(make_websocket):
+    async def scenario():
+        manager = WebSocketManager()
+        fenced, polygon, everyone = make_websocket(), make_websocket(), make_websocket()
+        for websocket in (fenced, polygon, everyone):
+            await manager.connect(websocket)
+        assert manager.subscribe(fenced, areas=[BANGALORE_BOX], events=["b", "a", "a"]) == {
+            "areas": 1, "events": ["a", "b"]
+        }
+        manager.subscribe(polygon, areas=[{"polygon": [[12.9, 77.5], [13.0, 77.5], [12.9, 77.6]]}])
+
+        await manager.broadcast({"event": "a"}, location=(12.95, 77.6))  # Inside the box only
+        await manager.broadcast({"event": "a"}, location=(12.92, 77.52))  # Inside both
+        await manager.broadcast({"event": "a"}, location=(14.0, 79.0))  # Outside both
+        await manager.broadcast({"event": "c"}, location=(12.95, 77.6))  # Filtered out for fenced
+        # Circle centered ~3 km north of the box, reaching into it
+        await manager.broadcast_to_area({"event": "b"}, 13.027, 77.6, radius_km=5)
+        await asyncio.sleep(0.01)
+        for websocket in (fenced, polygon, everyone):
+            manager.disconnect(websocket)
+        return [[m.get("seq") for m in ws.sent[1:]] for ws in (fenced, polygon, everyone)]
+
+    fenced, polygon, everyone = asyncio.run(scenario())
+    assert fenced == [1, 2, 5]
+    assert polygon == [2]
+    assert everyone == [1, 2, 3, 4]  # Not located, so no area broadcasts
@@ -0,0 +1,76 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.member2_nearmiss import NearMissDetectionService
+
+HARD_BRAKE = {"speed": 90, "acceleration": -9, "brake_force": 1.0, "time_gap": 0.3, "steering_angle": 40}
+
+
+def add_event(service, lat, lng):
+    result = service.detect_near_miss({"latitude": lat, "longitude": lng, **HARD_BRAKE})
+    assert result["is_near_miss"]
+    return result
+
+
+def cluster_sizes(result):
+    return sorted(h["event_count"] for h in result["hotspots"])
+
+
+def test_finds_dense_clusters_and_noise():
+    service = NearMissDetectionService()
+    for i in range(5):
+        add_event(service, 12.97 + i * 0.0005, 77.59)
+    for i in range(4):
+        add_event(service, 13.10 + i * 0.0005, 77.70)
+    add_event(service, 12.50, 77.00)
+
+    result = service.find_hotspots()
+
+    assert cluster_sizes(result) == [4, 5]
+    assert result["noise_events"] == 1
+    assert result["total_events"] == 10
+
+
+def test_incremental_update_matches_full_recompute():
+    random.seed(7)
+    service = NearMissDetectionService()
+    for _ in range(200):
+        add_event(service, 12.97 + random.uniform(-0.05, 0.05), 77.59 + random.uniform(-0.05, 0.05))
+    service.find_hotspots()
+
+    for _ in range(20):
+        add_event(service, 12.97 + random.uniform(-0.05, 0.05), 77.59 + random.uniform(-0.05, 0.05))
+    incremental = service.find_hotspots()
+
+    service._hotspot_cache.clear()
+    assert cluster_sizes(incremental) == cluster_sizes(service.find_hotspots())
+
+
+def test_expired_events_leave_their_cluster():
+    service = NearMissDetectionService()
+    events = [add_event(service, 12.97 + i * 0.0005, 77.59) for i in range(4)]
+    assert cluster_sizes(service.find_hotspots()) == [4]
+
+    old = (datetime.utcnow() - timedelta(hours=2)).isoformat()
+    for event in events[:2]:
+        event["timestamp"] = old
+    result = service.find_hotspots()
+
+    assert result["total_events"] == 2
+    assert result["hotspot_count"] == 0
+
+
+def test_parameters_are_quantized_and_out_of_range_values_rejected():
+    service = NearMissDetectionService()
+    assert service._hotspot_parameters(0.5001, 3) == (0.5, 3)
+    assert service.find_hotspots(eps_km=0.26)["parameters"] == {"eps_km": 0.25, "min_events": 3}
+    for eps_km, min_events in ((1e9, 3), (1e-9, 3), (0, 3), (0.5, 0), (0.5, 10_000)):
+        with pytest.raises(ValueError):
+            service._hotspot_parameters(eps_km, min_events)
+
+    add_event(service, 12.97, 77.59)
+    for eps in (0.1 * i for i in range(1, 50)):
+        service.find_hotspots(eps_km=eps)
+    assert len(service._hotspot_cache) <= service.hotspot_cache_size
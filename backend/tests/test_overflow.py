@@ -0,0 +1,67 @@
+import asyncio
+
+from services.member3_realtime import OutboundFrame, WebSocketManager
+
+
+def blocked_websocket(make_websocket):
+    """A websocket whose sends wait until release is set"""
+    websocket = make_websocket()
+    websocket.release = asyncio.Event()
+    send_text = websocket.send_text
+
+    async def blocked_send(text):
+        await websocket.release.wait()
+        await send_text(text)
+
+    websocket.send_text = blocked_send
+    return websocket
+
+
+def run_through_full_queue(make_websocket, messages):
+    async def scenario():
+        manager = WebSocketManager(max_queue_size=2, overflow_policy="coalesce")
+        websocket = blocked_websocket(make_websocket)
+        await manager.connect(websocket)
+        await asyncio.sleep(0.01)  # The writer takes the welcome message and blocks on it
+        for message in messages:
+            await manager.broadcast(message)
+        websocket.release.set()
+        await asyncio.sleep(0.01)
+        manager.disconnect(websocket)
+        return manager.stats, websocket
+
+    return asyncio.run(scenario())
+
+
+def test_frames_about_one_subject_are_coalesced(make_websocket):
+    stats, websocket = run_through_full_queue(make_websocket, [
+        {"event": "alert_update", "alert_id": 7, "version": 1},
+        {"event": "alert_update", "alert_id": 8, "version": 1},
+        {"event": "alert_update", "alert_id": 7, "version": 2},
+    ])
+    updates = [(m["alert_id"], m["version"]) for m in websocket.sent if m["event"] == "alert_update"]
+    assert updates == [(7, 2), (8, 1)]
+    assert (stats.coalesced, stats.dropped) == (1, 0)
+
+
+def test_batch_frames_are_never_coalesced(make_websocket):
+    stats, websocket = run_through_full_queue(make_websocket, [
+        {"event": "alert_expired", "alert_ids": [1, 2], "count": 2},
+        {"event": "alert_expired", "alert_ids": [3], "count": 1},
+    ])
+    assert [m["alert_ids"] for m in websocket.sent if m["event"] == "alert_expired"] == [[1, 2], [3]]
+    assert stats.coalesced == 0
+
+
+def test_batch_frames_overflowing_the_queue_are_counted_as_dropped(make_websocket):
+    stats, websocket = run_through_full_queue(make_websocket, [
+        {"event": "alert_expired", "alert_ids": [i], "count": 1} for i in range(3)
+    ])
+    assert [m["alert_ids"] for m in websocket.sent if m["event"] == "alert_expired"] == [[1], [2]]
+    assert (stats.coalesced, stats.dropped) == (0, 1)
+
+
+def test_coalesce_keys():
+    assert OutboundFrame({"event": "alert_expired", "alert_ids": [1]}).key is None
+    assert OutboundFrame({"event": "system_update", "type": "x", "data": {}}).key is None
+    assert OutboundFrame({"event": "new_alert", "data": {"id": 4}}).key == ("new_alert", 4)
@@ -0,0 +1,54 @@
+import random
+
+import numpy as np
+import pytest
+
+from utils.polyline import decode_coordinates, decode_polyline, encode_coordinates, encode_polyline
+
+# Example from the Google encoded polyline documentation
+GOOGLE_EXAMPLE = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+GOOGLE_POINTS = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+
+
+def test_google_example():
+    points = [{"latitude": lat, "longitude": lng} for lat, lng in GOOGLE_POINTS]
+    assert encode_polyline(points) == GOOGLE_EXAMPLE
+    assert decode_polyline(GOOGLE_EXAMPLE) == pytest.approx(points)
+
+
+@pytest.mark.parametrize("precision", [5, 6])
+def test_round_trip(precision):
+    random.seed(precision)
+    lats = [random.uniform(-90, 90) for _ in range(500)]
+    lngs = [random.uniform(-180, 180) for _ in range(500)]
+    decoded_lats, decoded_lngs = decode_coordinates(encode_coordinates(lats, lngs, precision), precision)
+    tolerance = 0.5 / 10 ** precision + 1e-12
+    assert np.abs(decoded_lats - lats).max() <= tolerance
+    assert np.abs(decoded_lngs - lngs).max() <= tolerance
+
+    points = [{"latitude": lat, "longitude": lng} for lat, lng in zip(decoded_lats.tolist(), decoded_lngs.tolist())]
+    assert encode_polyline(decode_polyline(encode_polyline(points, precision), precision), precision) == \
+        encode_polyline(points, precision)
+
+
+def test_rounds_half_away_from_zero():
+    assert decode_polyline(encode_polyline([{"latitude": 0.000005, "longitude": -0.000005}])) == \
+        [{"latitude": 0.00001, "longitude": -0.00001}]
+
+
+def test_empty():
+    assert encode_polyline([]) == ""
+    assert decode_polyline("") == []
+
+
+@pytest.mark.parametrize("encoded", [
+    "_p~iF~ps|",      # Ends mid-value
+    "_p~iF",          # Latitude without longitude
+    "_p~iF~ps|U ",    # Character below '?'
+    "_p~iF~ps|U\x7f",  # Character above '~'
+    "_p~iF~ps|Ué",    # Not ASCII
+    "~" * 12 + "?",   # More bits than a coordinate can have
+])
+def test_invalid_input_raises(encoded):
+    with pytest.raises(ValueError):
+        decode_polyline(encoded)
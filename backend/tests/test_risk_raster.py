@@ -0,0 +1,103 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.database import AccidentReport, Base
+from services.risk_raster import RiskRaster
+
+CORRIDOR = (12.965, 77.585, 12.975, 77.595, 0.5)
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'reports.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        AccidentReport(latitude=12.970, longitude=77.590, severity="Fatal"),
+        AccidentReport(latitude=12.9705, longitude=77.5905, severity="Minor"),
+        AccidentReport(latitude=40.0, longitude=10.0, severity="Major"),
+    ])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_segment_totals_count_accidents_in_the_corridor():
+    raster = RiskRaster(cell_size_deg=0.001, directory="")
+    raster.add(12.970, 77.590, "Fatal")
+    raster.add(12.9705, 77.5905, "Minor")
+    raster.add(13.5, 78.0, "Major")  # Far away
+
+    assert raster.segment_totals(*CORRIDOR) == (2, 4)
+    raster.remove(12.970, 77.590, "Fatal")
+    assert raster.segment_totals(*CORRIDOR) == (1, 1)
+
+
+def test_saved_tiles_are_reopened_while_the_database_matches(tmp_path, db):
+    raster = RiskRaster(directory=str(tmp_path / "rasters"))
+    raster.load(db)
+    assert not raster.reopened and raster.get_stats()["memory_mapped"]
+    raster.add(12.9702, 77.5902, "Major")
+    db.add(AccidentReport(latitude=12.9702, longitude=77.5902, severity="Major"))
+    db.commit()
+    raster.save(db)
+    raster.close()
+
+    reopened = RiskRaster(directory=str(tmp_path / "rasters"))
+    reopened.load(db)
+    assert reopened.reopened
+    assert reopened.segment_totals(*CORRIDOR) == (3, 6)
+    assert reopened.incidents == 4
+    reopened.close()
+
+
+def test_tiles_are_rebuilt_when_the_database_changed_or_after_a_crash(tmp_path, db):
+    directory = str(tmp_path / "rasters")
+    raster = RiskRaster(directory=directory)
+    raster.load(db)
+    raster.close()
+
+    db.add(AccidentReport(latitude=12.9702, longitude=77.5902, severity="Major"))
+    db.commit()
+    changed = RiskRaster(directory=directory)
+    changed.load(db)
+    assert not changed.reopened
+    assert changed.segment_totals(*CORRIDOR) == (3, 6)
+
+    # Changed after loading and never saved, as if the process died
+    changed.add(12.9701, 77.5901, "Minor")
+    changed.close()
+    crashed = RiskRaster(directory=directory)
+    crashed.load(db)
+    assert not crashed.reopened
+    assert crashed.segment_totals(*CORRIDOR) == (3, 6)
+    crashed.close()
+
+
+def test_tiles_stay_in_their_own_subdirectory(tmp_path, db):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    (shared / "keep.txt").write_text("operator data")
+    raster = RiskRaster(directory=str(shared))
+    raster.load(db)
+    raster.close()
+
+    assert sorted(os.listdir(shared)) == ["keep.txt", os.path.basename(raster.directory)]
+    files = sorted(os.listdir(raster.directory))
+    assert files[:2] == ["lock", "manifest.json"]
+    assert len(files) == 4 and all(f.startswith("tile_") for f in files[2:])  # One tile per city
+
+
+def test_second_process_on_the_same_directory_uses_memory(tmp_path, db):
+    owner = RiskRaster(directory=str(tmp_path))
+    owner.load(db)
+    other = RiskRaster(directory=str(tmp_path))
+    other.load(db)  # flock is per open file, so this stands in for another process
+    assert not other.get_stats()["memory_mapped"]
+    assert other.segment_totals(*CORRIDOR) == owner.segment_totals(*CORRIDOR) == (2, 4)
+    other.close()
+    owner.close()
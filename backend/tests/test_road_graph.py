@@ -0,0 +1,77 @@
+import pytest
+
+from services.road_graph import RoadGraph
+
+# Ladder of ~1.1 km edges near the equator:
+#   D - E - F
+#   |   |   |
+#   A - B - C      plus a one-way street C -> G
+NODES = {"A": (0.0, 0.0), "B": (0.0, 0.01), "C": (0.0, 0.02),
+         "D": (0.01, 0.0), "E": (0.01, 0.01), "F": (0.01, 0.02), "G": (0.0, 0.03)}
+EDGES = [("A", "B"), ("B", "C"), ("A", "D"), ("D", "E"), ("E", "F"), ("F", "C"), ("B", "E"), ("C", "G", "yes")]
+
+
+def point(name):
+    lat, lng = NODES[name]
+    return {"latitude": lat, "longitude": lng}
+
+
+def path_names(route):
+    by_position = {v: k for k, v in NODES.items()}
+    return "".join(by_position[(p["latitude"], p["longitude"])] for p in route["path"])
+
+
+@pytest.fixture
+def graph(tmp_path):
+    path = tmp_path / "edges.csv"
+    lines = ["source,target,source_lat,source_lng,target_lat,target_lng,oneway"]
+    for edge in EDGES:
+        (u, v), oneway = edge[:2], edge[2] if len(edge) > 2 else ""
+        lines.append(f"{u},{v},{NODES[u][0]},{NODES[u][1]},{NODES[v][0]},{NODES[v][1]},{oneway}")
+    path.write_text("\n".join(lines) + "\n")
+    graph = RoadGraph(risk_radius_km=0.1)
+    graph.load(str(path))
+    return graph
+
+
+def test_shortest_path_without_safety_weight(graph):
+    routes = graph.find_routes(point("A"), point("C"), safety_weight=0, alternatives=1)
+    assert path_names(routes[0]) == "ABC"
+    assert routes[0]["distance_km"] == pytest.approx(2.224, abs=0.01)
+
+
+def test_risky_intersection_is_avoided(graph):
+    graph.set_accidents([(0.0, 0.01, "Fatal")] * 5)  # At B
+    assert path_names(graph.find_routes(point("A"), point("C"), safety_weight=0, alternatives=1)[0]) == "ABC"
+
+    safest = graph.find_routes(point("A"), point("C"), safety_weight=1.0, alternatives=1)[0]
+    assert path_names(safest) == "ADEFC"
+    assert safest["risk"] == 0
+
+
+def test_alternatives_are_distinct_and_sorted_by_cost(graph):
+    routes = graph.find_routes(point("A"), point("C"), safety_weight=0, alternatives=3)
+    names = [path_names(r) for r in routes]
+    assert 2 <= len(routes) <= 3 and len(set(names)) == len(routes)
+    assert names[0] == "ABC"
+    assert [r["cost"] for r in routes] == sorted(r["cost"] for r in routes)
+
+
+def test_routes_pass_through_via_points_in_order(graph):
+    route = graph.find_routes(point("A"), point("C"), safety_weight=0, alternatives=1, via=[point("E")])[0]
+    assert path_names(route) in ("ABEFC", "ADEFC")
+    route = graph.find_routes(point("A"), point("A"), safety_weight=0, alternatives=1, via=[point("C")])[0]
+    assert path_names(route) == "ABCBA"
+
+
+def test_one_way_streets_are_respected(graph):
+    assert path_names(graph.find_routes(point("A"), point("G"), safety_weight=0, alternatives=1)[0]) == "ABCG"
+    assert graph.find_routes(point("G"), point("A"), safety_weight=0) == []
+
+
+def test_saved_graph_loads_to_the_same_routes(graph, tmp_path):
+    graph.save(str(tmp_path / "graph.npz"))
+    loaded = RoadGraph()
+    loaded.load(str(tmp_path / "graph.npz"))
+    assert loaded.edge_count == graph.edge_count
+    assert path_names(loaded.find_routes(point("D"), point("C"), safety_weight=0, alternatives=1)[0]) in ("DEFC", "DABC", "DEBC")
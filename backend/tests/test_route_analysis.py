@@ -0,0 +1,135 @@
+import asyncio
+import random
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from services.accident_index import AccidentIndex
+from services.member4_route import RouteAnalysisService
+
+ROUTE = {
+    "origin": {"latitude": 12.90, "longitude": 77.50},
+    "waypoints": [{"latitude": 12.93, "longitude": 77.55}, {"latitude": 12.95, "longitude": 77.58}],
+    "destination": {"latitude": 12.98, "longitude": 77.60}
+}
+
+
+def random_index(count=3000, seed=1):
+    random.seed(seed)
+    index = AccidentIndex()
+    for i in range(count):
+        index._insert(i, (
+            12.90 + random.uniform(-0.02, 0.10), 77.50 + random.uniform(-0.02, 0.12),
+            random.choice(["Minor", "Major", "Fatal"]), random.choice(["Clear", "Rain"]),
+            random.choice(["Dry", "Wet"]), 50.0, "Night"
+        ))
+    return index
+
+
+def analyze(service, **kwargs):
+    analysis = asyncio.run(service.analyze_route(dict(ROUTE), **kwargs))
+    analysis.pop("recommendations")  # Depend on the current hour
+    return analysis
+
+
+def test_index_queries_match_a_list_of_nearby_accidents():
+    service = RouteAnalysisService()
+    index = random_index()
+    nearby = index.query_boxes(service.get_query_boxes(ROUTE))
+
+    from_index = analyze(service, index=index)
+    assert from_index == analyze(service, historical_data=nearby)
+    assert from_index["statistics"]["total_segments"] == 3
+    assert sum(s["incident_count"] for s in from_index["segment_analysis"]) > 0
+
+
+def test_segment_incidents_are_within_the_zone_radius_and_sorted():
+    service = RouteAnalysisService()
+    analysis = analyze(service, index=random_index())
+    for segment in analysis["segment_analysis"]:
+        distances = [i["distance_to_route_km"] for i in segment["incidents"]]
+        assert distances == sorted(distances)
+        assert all(d <= service.zone_radius for d in distances)
+
+
+def test_columns_select_the_returned_accident_fields():
+    service = RouteAnalysisService()
+    analysis = analyze(service, index=random_index(), columns=["latitude", "longitude", "severity"])
+    incident = analysis["segment_analysis"][0]["incidents"][0]
+    assert set(incident) == {"latitude", "longitude", "severity", "distance_to_route_km"}
+
+
+def test_no_accidents_means_low_risk():
+    analysis = analyze(RouteAnalysisService(), index=AccidentIndex())
+    assert analysis["safety_analysis"]["safety_level"] == "Low Risk"
+    assert analysis["hotspots"] == []
+
+
+def test_hotspots_are_one_per_cell_with_two_or_more_accidents():
+    service = RouteAnalysisService()
+    # Two route points in one 0.01° cell, one in another
+    points = [{"latitude": 12.9012, "longitude": 77.5012}, {"latitude": 12.9018, "longitude": 77.5018},
+              {"latitude": 12.9512, "longitude": 77.5512}]
+    accidents = [
+        {"latitude": 12.9013, "longitude": 77.5013, "severity": "Fatal", "weather": "Rain", "road_condition": "Wet"},
+        {"latitude": 12.9017, "longitude": 77.5017, "severity": "Minor", "weather": "Rain", "road_condition": "Dry"},
+        {"latitude": 12.9015, "longitude": 77.5015, "severity": "Minor", "weather": "Clear", "road_condition": "Wet"},
+        {"latitude": 12.9513, "longitude": 77.5513, "severity": "Major", "weather": "Clear", "road_condition": "Dry"},
+    ]
+    index = AccidentIndex()
+    for i, a in enumerate(accidents):
+        index._insert(i, (a["latitude"], a["longitude"], a["severity"], a["weather"], a["road_condition"], 50.0, "Day"))
+
+    hotspots = service._create_hotspots(points, accidents)
+    assert hotspots == service._create_hotspots(points, [], index=index)
+    assert len(hotspots) == 1  # The second cell has a single accident
+    hotspot = hotspots[0]
+    assert (hotspot["latitude"], hotspot["longitude"]) == (12.9012, 77.5012)
+    assert (hotspot["accident_count"], hotspot["fatal_count"], hotspot["minor_count"]) == (3, 1, 2)
+    assert hotspot["risk_level"] == "High"
+    assert (hotspot["common_weather"], hotspot["common_road_condition"]) == ("Rain", "Wet")
+
+
+def test_departure_sweep_uses_the_real_interval_lengths():
+    service = RouteAnalysisService()
+    # ~0.45 km: a single interval shorter than the 1 km spacing
+    route = {"origin": {"latitude": 12.970, "longitude": 77.590},
+             "destination": {"latitude": 12.974, "longitude": 77.590}}
+    accidents = [{"latitude": 12.972, "longitude": 77.5901, "severity": "Minor", "time_of_day": "Night"}]
+    sweep = service.departure_sweep(route, accidents, start=datetime(2026, 3, 1, 0, 0))
+
+    risk, _, lengths = service._interval_risk(route, accidents, 1.0)
+    assert len(lengths) == 1 and lengths[0] == pytest.approx(0.445, abs=1e-3)
+    assert sweep["trip_minutes"] == pytest.approx(lengths[0] / service.average_speed_kmh * 60, abs=0.05)
+    assert len(sweep["curve"]) == 24
+    # Each slot is the one interval's risk times its hour's factor (rounded in the output)
+    factor = np.array(sweep["hourly_factor"])
+    expected = np.minimum(risk[0] * factor, 100)
+    assert risk[0] < 100 and len(set(expected)) > 1
+    assert [p["risk_score"] for p in sweep["curve"]] == pytest.approx(expected.tolist(), abs=0.5)
+
+
+def test_hotspots_in_neighbouring_cells_are_not_duplicated():
+    service = RouteAnalysisService()
+    # Two points 0.002° apart on either side of a cell boundary, then one far enough away
+    points = [{"latitude": 12.9099, "longitude": 77.5050}, {"latitude": 12.9119, "longitude": 77.5050},
+              {"latitude": 12.9300, "longitude": 77.5050}]
+    accidents = [{"latitude": lat, "longitude": 77.5050, "severity": "Minor"}
+                 for lat in (12.9105, 12.9110, 12.9300, 12.9301)]
+
+    hotspots = service._create_hotspots(points, accidents)
+    assert [(h["latitude"], h["accident_count"]) for h in hotspots] == [(12.9099, 2), (12.93, 2)]
+
+
+def test_departure_sweep_scores_a_zero_length_route_like_its_risk_profile():
+    service = RouteAnalysisService()
+    point = {"latitude": 12.97, "longitude": 77.59}
+    route = {"origin": point, "destination": dict(point)}
+    accidents = [{"latitude": 12.9701, "longitude": 77.5901, "severity": "Fatal", "time_of_day": "Night"}] * 2
+
+    profile = service.risk_profile(route, accidents)
+    sweep = service.departure_sweep(route, accidents, start=datetime(2026, 3, 1, 0, 0))
+    assert profile["risk"] == [100.0]
+    assert all(p["risk_score"] > 0 for p in sweep["curve"])
+    assert max(p["risk_score"] for p in sweep["curve"]) == 100.0
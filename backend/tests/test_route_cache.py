@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from services.route_cache import RouteAnalysisCache
+
+ROUTE = {"origin": {"latitude": 12.971601, "longitude": 77.594601},
+         "destination": {"latitude": 12.98, "longitude": 77.6}, "waypoints": []}
+
+
+def counting_compute(calls, result="analysis", delay=0.01):
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return {"result": result}
+    return compute
+
+
+def test_nearby_points_share_a_key_until_the_version_changes():
+    cache = RouteAnalysisCache(precision=5)
+    moved = {**ROUTE, "origin": {"latitude": 12.9716012, "longitude": 77.5946008}}
+    assert cache.key_for(ROUTE) == cache.key_for(moved)
+
+    key = cache.key_for(ROUTE)
+    cache.bump_version()
+    assert cache.key_for(ROUTE) != key
+
+
+def test_concurrent_requests_compute_once():
+    async def scenario():
+        cache = RouteAnalysisCache()
+        calls = []
+        key = cache.key_for(ROUTE)
+        results = await asyncio.gather(*(cache.get_or_compute(key, counting_compute(calls)) for _ in range(10)))
+        again = await cache.get_or_compute(key, counting_compute(calls))
+        return cache, calls, results, again
+
+    cache, calls, results, again = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results) and again is results[0]
+    stats = cache.get_stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 9, 1)
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_computation():
+    async def scenario():
+        cache = RouteAnalysisCache()
+        calls = []
+        key = cache.key_for(ROUTE)
+        first = asyncio.create_task(cache.get_or_compute(key, counting_compute(calls, delay=0.05)))
+        second = asyncio.create_task(cache.get_or_compute(key, counting_compute(calls)))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return calls, await second
+
+    calls, result = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert result == {"result": "analysis"}
+
+
+def test_invalidation_drops_entries_and_results_computed_before_it():
+    async def scenario():
+        cache = RouteAnalysisCache()
+        calls = []
+        key = cache.key_for(ROUTE)
+        await cache.get_or_compute(key, counting_compute(calls))
+        cache.bump_version()
+        assert not cache.entries
+
+        # Data changes while a computation is running: its result is not kept
+        stale_key = cache.key_for(ROUTE)
+        pending = asyncio.create_task(cache.get_or_compute(stale_key, counting_compute(calls, "stale")))
+        await asyncio.sleep(0)
+        cache.bump_version()
+        assert await pending == {"result": "stale"}
+        fresh = await cache.get_or_compute(cache.key_for(ROUTE), counting_compute(calls, "fresh"))
+        return cache, calls, fresh
+
+    cache, calls, fresh = asyncio.run(scenario())
+    assert len(calls) == 3
+    assert fresh == {"result": "fresh"}
+    assert cache.get_stats()["invalidations"] == 2
+
+
+def test_failures_are_not_cached():
+    async def scenario():
+        cache = RouteAnalysisCache()
+        key = cache.key_for(ROUTE)
+
+        async def failing():
+            raise RuntimeError("database unavailable")
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute(key, failing)
+        return cache, await cache.get_or_compute(key, counting_compute([]))
+
+    cache, result = asyncio.run(scenario())
+    assert result == {"result": "analysis"}
+    assert cache.get_stats()["misses"] == 2
+
+
+def test_least_recently_used_entries_are_evicted():
+    async def scenario():
+        cache = RouteAnalysisCache(max_entries=2)
+        for key in ("a", "b"):
+            await cache.get_or_compute((key, cache.data_version), counting_compute([], key))
+        await cache.get_or_compute(("a", cache.data_version), counting_compute([]))  # Touch a
+        await cache.get_or_compute(("c", cache.data_version), counting_compute([], "c"))
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert [k[0] for k in cache.entries] == ["a", "c"]
+    assert cache.get_stats()["evictions"] == 1
@@ -0,0 +1,84 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Base, RouteAnalysis
+from services.route_history import RouteHistoryWriter, _normalize_factors
+
+ROUTE = {
+    "origin": {"latitude": 12.90, "longitude": 77.50},
+    "waypoints": [],
+    "destination": {"latitude": 12.98, "longitude": 77.60}
+}
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def analysis(average_risk, *segment_factors):
+    """An analysis with one high-risk segment per list of factors"""
+    segments = [
+        {"start": {"latitude": 12.9, "longitude": 77.5}, "is_high_risk": True, "incident_count": 2,
+         "risk_score": 70.0, "risk_factors": factors}
+        for factors in segment_factors
+    ]
+    segments.append({"start": {"latitude": 12.95, "longitude": 77.55}, "is_high_risk": False,
+                     "incident_count": 1, "risk_score": 10.0, "risk_factors": []})
+    return {"segment_analysis": segments, "statistics": {"average_segment_risk": average_risk}}
+
+
+def row(writer, average_risk, *segment_factors, day=date(2026, 3, 1)):
+    r = writer.to_row(ROUTE, analysis(average_risk, *segment_factors))
+    r["analyzed_at"] = datetime.combine(day, datetime.min.time())
+    return r
+
+
+def test_normalize_factors():
+    assert _normalize_factors([
+        "Common conditions: Rain, Wet", "High severity incidents (3)", "Night driving"
+    ]) == ["Rain", "Wet", "High severity incidents", "Night driving"]
+
+
+def test_to_row():
+    writer = RouteHistoryWriter()
+    r = writer.to_row(ROUTE, analysis(45.5, ["Night driving"]))
+    assert r["safety_score"] == 54.5
+    assert r["total_risk_points"] == 3
+    assert (r["start_lat"], r["end_lng"]) == (12.90, 77.60)
+
+
+def test_rollups_add_up_across_batches(db):
+    writer = RouteHistoryWriter()
+    writer._write_batch(db, [
+        row(writer, 20, ["Common conditions: Rain, Wet"]),
+        row(writer, 50, ["High severity incidents (4)", "Common conditions: Rain"], ["Rain"]),
+    ])
+    writer._write_batch(db, [
+        row(writer, 10),
+        row(writer, 80, ["High severity incidents (1)"], day=date(2026, 3, 2)),
+    ])
+
+    assert db.query(RouteAnalysis).count() == 4
+    stats = writer.get_statistics(db, date(2026, 3, 1), date(2026, 3, 2))
+    assert stats["total_routes_analyzed"] == 4
+    assert stats["average_safety_score"] == round((80 + 50 + 90 + 20) / 4, 2)
+    assert stats["high_risk_routes"] == 2  # Safety scores 50 and 20
+    assert stats["high_risk_zones"] == 4
+    # Each route counts a factor once, however many zones mention it
+    assert {f["factor"]: f["routes"] for f in stats["most_common_risk_factors"]} == {
+        "Rain": 2, "Wet": 1, "High severity incidents": 2
+    }
+
+    first_day = writer.get_statistics(db, date(2026, 3, 1), date(2026, 3, 1))
+    assert first_day["total_routes_analyzed"] == 3
+    assert first_day["high_risk_routes"] == 1
+    assert writer.get_statistics(db, date(2026, 4, 1), date(2026, 4, 30))["average_safety_score"] == 0
@@ -1,6 +1,10 @@
 import math
 from typing import Tuple
 
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Calculate the great circle distance between two points 
@@ -100,4 +104,160 @@ def interpolate_points(lat1: float, lon1: float,
         lon = lon1 + (lon2 - lon1) * fraction
         points.append((lat, lon))
     
-    return points
\ No newline at end of file
+    return points
+
+def point_in_polygon(point_lat: float, point_lon: float, polygon: list) -> bool:
+    """
+    Check if a point is inside a polygon (ray casting)
+    
+    Args:
+        polygon: List of (lat, lon) vertices; closing vertex optional
+    
+    Returns:
+        True if point is inside the polygon
+    """
+    inside = False
+    n = len(polygon)
+    j = n - 1
+    for i in range(n):
+        lat_i, lon_i = polygon[i]
+        lat_j, lon_j = polygon[j]
+        if (lat_i > point_lat) != (lat_j > point_lat):
+            crossing_lon = lon_i + (point_lat - lat_i) * (lon_j - lon_i) / (lat_j - lat_i)
+            if point_lon < crossing_lon:
+                inside = not inside
+        j = i
+    
+    return inside
+
+
+def point_to_segments_distance(point_lats, point_lons,
+                               start_lats, start_lons,
+                               end_lats, end_lons) -> np.ndarray:
+    """
+    Distance from every point to every segment (vectorized)
+    
+    Each segment is projected onto a local equirectangular plane scaled by
+    the cosine of its mid latitude, so longitude shrink is accounted for.
+    Against haversine to the true closest point the error stays under 0.2%
+    for segments up to 50 km and points within 5 km, below 70° latitude.
+    
+    Args:
+        point_lats, point_lons: Arrays of P point coordinates (degrees)
+        start_lats, start_lons, end_lats, end_lons: Arrays of S segment ends
+    
+    Returns:
+        (P, S) array of distances in kilometers
+    """
+    p_lat = np.radians(np.asarray(point_lats, dtype=float))[:, None]
+    p_lon = np.radians(np.asarray(point_lons, dtype=float))[:, None]
+    a_lat = np.radians(np.asarray(start_lats, dtype=float))[None, :]
+    a_lon = np.radians(np.asarray(start_lons, dtype=float))[None, :]
+    b_lat = np.radians(np.asarray(end_lats, dtype=float))[None, :]
+    b_lon = np.radians(np.asarray(end_lons, dtype=float))[None, :]
+    
+    # Plane coordinates relative to the segment start (radians of arc)
+    d_lon = _wrap_longitude(b_lon - a_lon)
+    cos_ref = np.cos((a_lat + b_lat) / 2)
+    bx = d_lon * cos_ref
+    by = b_lat - a_lat
+    px = _wrap_longitude(p_lon - a_lon) * cos_ref
+    py = p_lat - a_lat
+    
+    # Projection parameter clamped to the segment; zero-length segments use t=0
+    length_sq = bx * bx + by * by
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(length_sq > 0, (px * bx + py * by) / length_sq, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    
+    # Measure to the closest point with the scale at its own latitude; the
+    # distance is flat in t near the minimum, so the projection above is
+    # accurate enough even where cos(latitude) varies along the segment
+    c_lat = a_lat + t * by
+    c_lon = a_lon + t * d_lon
+    dx = _wrap_longitude(p_lon - c_lon) * np.cos((p_lat + c_lat) / 2)
+    return EARTH_RADIUS_KM * np.hypot(dx, p_lat - c_lat)
+
+
+def points_near_segments(point_lats, point_lons,
+                         start_lats, start_lons,
+                         end_lats, end_lons,
+                         radius_km: float,
+                         chunk_size: int = 4096) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find every (point, segment) pair within a radius
+    
+    Works through the points in chunks so the distance matrix never holds
+    more than chunk_size x S entries.
+    
+    Returns:
+        (point_indices, segment_indices, distances_km), ordered by point
+    """
+    point_lats = np.asarray(point_lats, dtype=float)
+    point_lons = np.asarray(point_lons, dtype=float)
+    point_parts, segment_parts, distance_parts = [], [], []
+    
+    for offset in range(0, len(point_lats), chunk_size):
+        distances = point_to_segments_distance(
+            point_lats[offset:offset + chunk_size],
+            point_lons[offset:offset + chunk_size],
+            start_lats, start_lons, end_lats, end_lons
+        )
+        rows, cols = np.nonzero(distances <= radius_km)
+        point_parts.append(rows + offset)
+        segment_parts.append(cols)
+        distance_parts.append(distances[rows, cols])
+    
+    if not point_parts:
+        empty = np.empty(0)
+        return empty.astype(int), empty.astype(int), empty
+    return np.concatenate(point_parts), np.concatenate(segment_parts), np.concatenate(distance_parts)
+
+
+def split_path(lats, lons, spacing_km: float) -> Tuple[np.ndarray, ...]:
+    """
+    Cut a path into consecutive bins of spacing_km along its length
+    
+    The path is split wherever a bin boundary or an original vertex falls,
+    so every piece is straight and belongs to exactly one bin; bends inside
+    a bin are kept rather than cut across.
+    
+    Args:
+        lats, lons: Path vertices in order (degrees)
+        spacing_km: Bin length; the last bin holds the remainder
+    
+    Returns:
+        (start_lats, start_lons, end_lats, end_lons, piece_bins, bin_lengths_km)
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    lat_r, lon_r = np.radians(lats), np.radians(lons)
+    a = (np.sin(np.diff(lat_r) / 2) ** 2
+         + np.cos(lat_r[:-1]) * np.cos(lat_r[1:]) * np.sin(np.diff(lon_r) / 2) ** 2)
+    lengths = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    
+    # Drop repeated vertices so the cumulative distance strictly increases
+    keep = np.concatenate(([True], lengths > 0))
+    lats, lons = lats[keep], lons[keep]
+    cumulative = np.concatenate(([0.0], np.cumsum(lengths[lengths > 0])))
+    total = cumulative[-1]
+    
+    bins = max(1, math.ceil(total / spacing_km - 1e-9))
+    boundaries = spacing_km * np.arange(1, bins)
+    bin_lengths = np.diff(np.concatenate(([0.0], boundaries, [total])))
+    if len(lats) < 2:
+        # Zero-length path: one point-sized piece
+        return lats[:1], lons[:1], lats[:1], lons[:1], np.zeros(1, dtype=int), bin_lengths
+    
+    # Distance along the path is linear in each segment's coordinates
+    cuts = np.union1d(cumulative, boundaries)
+    cut_lats = np.interp(cuts, cumulative, lats)
+    cut_lons = np.interp(cuts, cumulative, lons)
+    middles = (cuts[:-1] + cuts[1:]) / 2
+    piece_bins = np.minimum((middles // spacing_km).astype(int), bins - 1)
+    return cut_lats[:-1], cut_lons[:-1], cut_lats[1:], cut_lons[1:], piece_bins, bin_lengths
+
+
+def _wrap_longitude(delta: np.ndarray) -> np.ndarray:
+    """Wrap longitude differences (radians) into [-pi, pi)"""
+    return (delta + np.pi) % (2 * np.pi) - np.pi
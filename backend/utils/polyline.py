@@ -0,0 +1,92 @@
+from typing import List, Tuple
+
+import numpy as np
+
+
+def encode_polyline(points: List[dict], precision: int = 5) -> str:
+    """
+    Encode points with the Google encoded polyline algorithm
+
+    Args:
+        points: [{'latitude': float, 'longitude': float}, ...]
+        precision: Decimal places kept (5 is ~1 m, the common default)
+
+    Returns:
+        Encoded polyline string
+    """
+    return encode_coordinates(
+        [p['latitude'] for p in points], [p['longitude'] for p in points], precision
+    )
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> List[dict]:
+    """
+    Decode an encoded polyline string
+
+    Returns:
+        [{'latitude': float, 'longitude': float}, ...]
+
+    Raises:
+        ValueError: If the string is truncated or contains invalid characters
+    """
+    lats, lngs = decode_coordinates(encoded, precision)
+    return [{"latitude": lat, "longitude": lng} for lat, lng in zip(lats.tolist(), lngs.tolist())]
+
+
+def encode_coordinates(lats, lngs, precision: int = 5) -> str:
+    """Encode coordinate arrays (vectorized; see encode_polyline)"""
+    factor = 10 ** precision
+    coords = np.column_stack((np.asarray(lats, dtype=float), np.asarray(lngs, dtype=float)))
+    if len(coords) == 0:
+        return ""
+    # Round half away from zero like the reference implementation
+    scaled = (np.sign(coords) * np.floor(np.abs(coords) * factor + 0.5)).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=0).ravel()  # lat, lng, lat, lng, ...
+
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+    chunk_counts = np.ones(len(values), dtype=np.int64)
+    max_chunks = 1
+    while (values >= (1 << (5 * max_chunks))).any():
+        chunk_counts += values >= (1 << (5 * max_chunks))
+        max_chunks += 1
+
+    # One 5-bit chunk per column, low bits first; all but the last get 0x20
+    positions = np.arange(max_chunks)
+    chunks = (values[:, None] >> (5 * positions)) & 0x1f
+    chunks |= np.where(positions < (chunk_counts - 1)[:, None], 0x20, 0)
+    chars = (chunks + 63)[positions < chunk_counts[:, None]]
+    return chars.astype(np.uint8).tobytes().decode("ascii")
+
+
+def decode_coordinates(encoded: str, precision: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode an encoded polyline into coordinate arrays (vectorized)
+
+    Returns:
+        (latitudes, longitudes)
+
+    Raises:
+        ValueError: If the string is truncated or contains invalid characters
+    """
+    data = np.frombuffer(encoded.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    if len(data) == 0:
+        return np.empty(0), np.empty(0)
+    invalid = np.flatnonzero((data < 0) | (data > 63))
+    if len(invalid):
+        raise ValueError(f"Invalid polyline character at position {invalid[0]}")
+
+    ends = data < 0x20
+    if not ends[-1]:
+        raise ValueError("Truncated polyline")
+    starts = np.flatnonzero(np.concatenate(([True], ends[:-1])))
+    group = np.cumsum(np.concatenate(([0], ends[:-1])))
+    shifts = 5 * (np.arange(len(data)) - starts[group])
+    if shifts.max() > 55:
+        raise ValueError("Polyline value out of range")
+
+    values = np.add.reduceat((data & 0x1f) << shifts, starts)
+    if len(values) % 2:
+        raise ValueError("Truncated polyline")
+    deltas = np.where(values & 1, ~(values >> 1), values >> 1)
+    coords = np.cumsum(deltas.reshape(-1, 2), axis=0) / 10 ** precision
+    return coords[:, 0], coords[:, 1]
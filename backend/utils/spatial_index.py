@@ -0,0 +1,211 @@
+import math
+from collections import defaultdict
+from typing import Dict, Hashable, Iterator, List, Set, Tuple
+
+from utils.distance import haversine_distance, get_bounding_box
+
+
+class GridIndex:
+    """
+    Uniform latitude/longitude grid for fast neighbour lookups
+
+    Keys are bucketed into square cells of `cell_size_deg` degrees, so a
+    radius or bounding-box query only touches the cells it overlaps instead
+    of every stored point.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.01):
+        self.cell_size = cell_size_deg
+        self.cells: Dict[Tuple[int, int], Set[Hashable]] = defaultdict(set)
+        self.positions: Dict[Hashable, Tuple[float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.positions
+
+    def cell_for(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        """Get the cell coordinates containing a point"""
+        return (
+            math.floor(latitude / self.cell_size),
+            math.floor(longitude / self.cell_size)
+        )
+
+    def insert(self, key: Hashable, latitude: float, longitude: float):
+        """Insert a key, moving it if it is already indexed"""
+        cell = self.cell_for(latitude, longitude)
+        previous = self.positions.get(key)
+        if previous is not None:
+            previous_cell = self.cell_for(*previous)
+            if previous_cell != cell:
+                self._discard_from_cell(previous_cell, key)
+        self.positions[key] = (latitude, longitude)
+        self.cells[cell].add(key)
+
+    def remove(self, key: Hashable):
+        """Remove a key if present"""
+        position = self.positions.pop(key, None)
+        if position is not None:
+            self._discard_from_cell(self.cell_for(*position), key)
+
+    def clear(self):
+        self.cells.clear()
+        self.positions.clear()
+
+    def query_bbox(self, min_lat: float, min_lng: float,
+                   max_lat: float, max_lng: float) -> Iterator[Hashable]:
+        """Yield keys whose position lies inside a bounding box"""
+        for key in self._candidates(min_lat, min_lng, max_lat, max_lng):
+            lat, lng = self.positions[key]
+            if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
+                yield key
+
+    def query_cells(self, boxes: List[Tuple[float, float, float, float]]) -> Set[Hashable]:
+        """
+        Keys in every cell touched by any of the boxes
+
+        A superset of the exact box hits, without per-key checks: cheap when
+        many overlapping boxes are queried and the caller filters later.
+        """
+        cells = set()
+        for min_lat, min_lng, max_lat, max_lng in boxes:
+            min_row, min_col = self.cell_for(min_lat, min_lng)
+            max_row, max_col = self.cell_for(max_lat, max_lng)
+            cells.update(
+                (row, col)
+                for row in range(min_row, max_row + 1)
+                for col in range(min_col, max_col + 1)
+            )
+        keys = set()
+        for cell in cells:
+            keys.update(self.cells.get(cell, ()))
+        return keys
+
+    def query_radius(self, latitude: float, longitude: float,
+                     radius_km: float) -> List[Tuple[Hashable, float]]:
+        """
+        Find keys within a radius of a point
+
+        Returns:
+            List of (key, distance_km) tuples
+        """
+        min_lat, min_lng, max_lat, max_lng = get_bounding_box(latitude, longitude, radius_km)
+        results = []
+        for key in self._candidates(min_lat, min_lng, max_lat, max_lng):
+            lat, lng = self.positions[key]
+            distance = haversine_distance(latitude, longitude, lat, lng)
+            if distance <= radius_km:
+                results.append((key, distance))
+        return results
+
+    def _candidates(self, min_lat: float, min_lng: float,
+                    max_lat: float, max_lng: float) -> Iterator[Hashable]:
+        """Yield every key stored in cells overlapping a bounding box"""
+        min_row, min_col = self.cell_for(min_lat, min_lng)
+        max_row, max_col = self.cell_for(max_lat, max_lng)
+        span = (max_row - min_row + 1) * (max_col - min_col + 1)
+
+        # Large boxes over sparse data: walking the occupied cells is cheaper
+        if span > len(self.cells):
+            for (row, col), keys in list(self.cells.items()):
+                if min_row <= row <= max_row and min_col <= col <= max_col:
+                    yield from list(keys)
+            return
+
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                keys = self.cells.get((row, col))
+                if keys:
+                    yield from list(keys)
+
+    def _discard_from_cell(self, cell: Tuple[int, int], key: Hashable):
+        keys = self.cells.get(cell)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.cells[cell]
+
+
+class RegionIndex:
+    """
+    Grid of bounding boxes for "which regions contain this point" lookups
+
+    Each region is registered in every cell its box overlaps. Boxes covering
+    more than `max_cells` cells are kept in a short list that every query
+    scans, so a city-wide subscription does not flood the grid.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.05, max_cells: int = 400):
+        self.cell_size = cell_size_deg
+        self.max_cells = max_cells
+        self.cells: Dict[Tuple[int, int], Set[Hashable]] = defaultdict(set)
+        self.boxes: Dict[Hashable, Tuple[float, float, float, float]] = {}
+        self.large: Set[Hashable] = set()
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def insert(self, key: Hashable, min_lat: float, min_lng: float,
+               max_lat: float, max_lng: float):
+        """Register a region, replacing any previous box for the key"""
+        self.remove(key)
+        self.boxes[key] = (min_lat, min_lng, max_lat, max_lng)
+        rows = math.floor(max_lat / self.cell_size) - math.floor(min_lat / self.cell_size) + 1
+        cols = math.floor(max_lng / self.cell_size) - math.floor(min_lng / self.cell_size) + 1
+        if rows * cols > self.max_cells:
+            self.large.add(key)
+            return
+        for cell in self._cells_for(min_lat, min_lng, max_lat, max_lng):
+            self.cells[cell].add(key)
+
+    def remove(self, key: Hashable):
+        box = self.boxes.pop(key, None)
+        if box is None:
+            return
+        if key in self.large:
+            self.large.discard(key)
+            return
+        for cell in self._cells_for(*box):
+            keys = self.cells.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.cells[cell]
+
+    def query_point(self, latitude: float, longitude: float) -> List[Hashable]:
+        """Keys whose bounding box contains a point"""
+        cell = (math.floor(latitude / self.cell_size), math.floor(longitude / self.cell_size))
+        candidates = list(self.cells.get(cell, ())) + list(self.large)
+        matches = []
+        for key in candidates:
+            min_lat, min_lng, max_lat, max_lng = self.boxes[key]
+            if min_lat <= latitude <= max_lat and min_lng <= longitude <= max_lng:
+                matches.append(key)
+        return matches
+
+    def query_bbox(self, min_lat: float, min_lng: float,
+                   max_lat: float, max_lng: float) -> Set[Hashable]:
+        """Keys whose bounding box overlaps a query box"""
+        candidates = set(self.large)
+        rows = math.floor(max_lat / self.cell_size) - math.floor(min_lat / self.cell_size) + 1
+        cols = math.floor(max_lng / self.cell_size) - math.floor(min_lng / self.cell_size) + 1
+        if rows * cols > len(self.cells):
+            candidates.update(self.boxes)
+        else:
+            for cell in self._cells_for(min_lat, min_lng, max_lat, max_lng):
+                candidates.update(self.cells.get(cell, ()))
+        matches = set()
+        for key in candidates:
+            b_min_lat, b_min_lng, b_max_lat, b_max_lng = self.boxes[key]
+            if b_min_lat <= max_lat and min_lat <= b_max_lat and b_min_lng <= max_lng and min_lng <= b_max_lng:
+                matches.add(key)
+        return matches
+
+    def _cells_for(self, min_lat: float, min_lng: float,
+                   max_lat: float, max_lng: float) -> Iterator[Tuple[int, int]]:
+        min_row, min_col = math.floor(min_lat / self.cell_size), math.floor(min_lng / self.cell_size)
+        max_row, max_col = math.floor(max_lat / self.cell_size), math.floor(max_lng / self.cell_size)
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                yield (row, col)
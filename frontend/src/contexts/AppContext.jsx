@@ -67,10 +67,31 @@ export const AppProvider = ({ children }) => {
         setAlerts(prev => prev.filter(a => a.id !== data.alert_id))
         break
 
+      case 'alert_updates': {
+        const updated = new Map(data.updates.map(a => [a.id, a]))
+        setAlerts(prev => prev.map(a => updated.get(a.id) || a))
+        break
+      }
+
+      case 'alert_expired': {
+        const expiredIds = new Set(data.alert_ids)
+        setAlerts(prev => prev.filter(a => !expiredIds.has(a.id)))
+        break
+      }
+
       case 'alert_created':
         addNotification('New alert created in your area', 'info')
         break
 
+      case 'snapshot':
+        // The server could not replay missed events; replace local state
+        setAlerts(data.data.alerts)
+        break
+
+      case 'connected':
+      case 'resume_complete':
+        break
+
       case 'system_update':
         addNotification(`System update: ${data.type}`, 'info')
         break
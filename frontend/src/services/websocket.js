@@ -6,6 +6,11 @@ let messageHandlers = []
 let reconnectAttempts = 0
 const MAX_RECONNECT_ATTEMPTS = 5
 
+// Position in the server's event stream, used to resume after a reconnect
+let lastSeq = null
+let logId = null
+let lastLocation = null
+
 export const connectWebSocket = (handlers = {}) => {
   const {
     onOpen = () => {},
@@ -34,6 +39,16 @@ export const connectWebSocket = (handlers = {}) => {
         reconnectInterval = null
       }
 
+      // Ask only for the events missed while disconnected
+      if (lastSeq !== null) {
+        sendMessage({
+          type: 'resume',
+          resume_from: lastSeq,
+          log_id: logId,
+          ...(lastLocation || {})
+        })
+      }
+
       // Send initial ping
       sendPing()
 
@@ -67,6 +82,13 @@ export const connectWebSocket = (handlers = {}) => {
         const data = JSON.parse(event.data)
         console.log('📩 WebSocket message:', data)
 
+        if (data.log_id) {
+          logId = data.log_id
+        }
+        if (typeof data.seq === 'number' && (data.event !== 'connected' || lastSeq === null)) {
+          lastSeq = data.seq
+        }
+
         // Call main handler
         onMessage(data)
 
@@ -113,6 +135,7 @@ export const sendPing = () => {
 }
 
 export const updateUserLocation = (latitude, longitude) => {
+  lastLocation = { latitude, longitude }
   return sendMessage({
     type: 'location_update',
     latitude,
@@ -142,6 +165,8 @@ export const closeWebSocket = () => {
 
   messageHandlers = []
   reconnectAttempts = 0
+  lastSeq = null
+  logId = null
 }
 
 export const getWebSocketState = () => {